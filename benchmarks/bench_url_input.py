@@ -0,0 +1,63 @@
+"""URL 입력창 파싱 벤치마크
+
+10,000줄 붙여넣기와 그 뒤의 한 줄 입력/삭제를 URLListModel로 처리하는 시간을
+예전 방식(변경 때마다 전체 줄을 다시 검사)과 비교합니다.
+
+    python benchmarks/bench_url_input.py [줄 수]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_parser import URLListModel, parse_url_line  # noqa: E402
+
+
+def make_lines(count):
+    lines = []
+    for i in range(count):
+        video_id = f"{i:011d}"
+        if i % 3 == 0:
+            lines.append(f"https://youtu.be/{video_id}")
+        else:
+            lines.append(f"https://www.youtube.com/watch?v={video_id}&t={i % 60}")
+    return lines
+
+
+def full_parse(text):
+    """예전 방식: 모든 줄을 매번 다시 검사"""
+    return [url for url in (parse_url_line(line) for line in text.split('\n')) if url]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pasted = '\n'.join(make_lines(count))
+    typed = pasted + "\nhttps://youtu.be/zzzzzzzzzzz"
+    deleted = typed.split('\n', 1)[1]
+
+    model = URLListModel()
+    new_urls, paste_ms = timed(model.update, pasted)
+    assert len(new_urls) == count and model.count == count
+
+    _, type_ms = timed(model.update, typed)
+    assert model.count == count + 1
+    _, delete_ms = timed(model.update, deleted)
+    assert model.count == count
+
+    _, full_ms = timed(full_parse, typed)
+
+    print(f"{count}줄 붙여넣기 (전체 파싱):        {paste_ms:8.2f} ms")
+    print(f"한 줄 추가 (바뀐 줄만 파싱):         {type_ms:8.2f} ms")
+    print(f"첫 줄 삭제 (바뀐 줄만 파싱):         {delete_ms:8.2f} ms")
+    print(f"예전 방식 - 변경마다 전체 다시 파싱: {full_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
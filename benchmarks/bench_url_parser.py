@@ -0,0 +1,81 @@
+"""URL 파서 마이크로 벤치마크
+
+예전 _parse_urls 방식(줄마다 번호 제거 + 패턴 4개를 매번 re.match)과
+url_parser.parse_urls(미리 컴파일한 정규식으로 텍스트를 한 번만 훑음)를 비교합니다.
+
+    python benchmarks/bench_url_parser.py [줄 수]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_parser import is_valid_youtube_url, parse_urls  # noqa: E402
+
+
+def legacy_is_valid(url):
+    if (not url or "VIDEO_ID" in url or "PLAYLIST_ID" in url or
+            url.startswith("여기에") or url.startswith("예시") or "형식:" in url):
+        return False
+    patterns = [
+        r'https?://(?:www\.|m\.)?youtube\.com/watch\?(?:\S*?&)?v=[\w-]{11}',
+        r'https?://(?:www\.)?youtu\.be/[\w-]{11}',
+        r'https?://(?:www\.|m\.)?youtube\.com/playlist\?(?:\S*?&)?list=[\w-]+',
+        r'https?://(?:www\.|m\.)?youtube\.com/shorts/[\w-]{11}',
+    ]
+    return any(re.match(pattern, url) for pattern in patterns)
+
+
+def legacy_parse_urls(text):
+    urls = []
+    for line in text.strip().split('\n'):
+        line = line.strip()
+        if line:
+            clean_line = re.sub(r'^\d+\.\s*', '', line)
+            if clean_line and legacy_is_valid(clean_line):
+                urls.append(clean_line)
+    return urls
+
+
+def make_text(count):
+    lines = []
+    for i in range(count):
+        video_id = f"{i:011d}"
+        if i % 4 == 0:
+            lines.append(f"{i + 1}. https://youtu.be/{video_id}")
+        elif i % 4 == 1:
+            lines.append(f"https://m.youtube.com/watch?feature=share&v={video_id}")
+        elif i % 4 == 2:
+            lines.append(f"https://www.youtube.com/shorts/{video_id}")
+        else:
+            lines.append("메모: 나중에 받을 것")
+    return '\n'.join(lines)
+
+
+def bench(label, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<34}{best * 1000:9.3f} ms")
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    text = make_text(count)
+    assert parse_urls(text) == legacy_parse_urls(text)
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=30"
+    assert is_valid_youtube_url(url) and legacy_is_valid(url)
+
+    number = max(1, 20000 // count)
+    print(f"{count}줄 텍스트")
+    old = bench("예전 _parse_urls", lambda: legacy_parse_urls(text), number)
+    new = bench("url_parser.parse_urls", lambda: parse_urls(text), number)
+    print(f"{'':<34}{old / new:8.1f}x")
+    old = bench("예전 _is_valid_youtube_url", lambda: legacy_is_valid(url), 20000)
+    new = bench("url_parser.is_valid_youtube_url", lambda: is_valid_youtube_url(url), 20000)
+    print(f"{'':<34}{old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
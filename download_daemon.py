@@ -0,0 +1,342 @@
+"""다운로드 엔진을 로컬 JSON-RPC 데몬으로 제공
+
+Electron 앱과 Python UI가 각자 yt-dlp를 띄우고 출력 문자열을 파싱하는 대신, 오래 살아 있는
+엔진 하나(스케줄러, 완료 기록, 재생목록 캐시)를 함께 쓰도록 합니다.
+
+    python -m download_daemon                  # 표준 입출력 (부모 프로세스가 직접 띄울 때)
+    python -m download_daemon --socket PATH    # 유닉스 소켓 (여러 클라이언트가 접속)
+    python -m download_daemon --port 8765      # 127.0.0.1 TCP (유닉스 소켓이 없는 Windows)
+
+한 줄에 하나씩 JSON-RPC 2.0 메시지를 주고받습니다.
+
+    enqueue      {urls, settings?, priority?}   -> {queued, archived, duplicate, run_id}
+    cancel       {url?, job_id?}                -> {cancelled}  (둘 다 없으면 전체 중단)
+    pause        {job_id}                       -> {paused}  (.part 파일을 남기고 작업 하나만 멈춤)
+    resume       {job_id}                       -> {resumed}  (일시정지한 작업을 이어받음)
+    status       {}                             -> 진행 상황
+    set_bandwidth {total_rate?, job_rate_limit?}  -> 전체/작업당 속도 제한 (바이트/초, 실행 중에도 반영)
+    prioritize   {job_id, priority}             -> {updated}  (대역폭 우선순위 변경, 내장 백엔드 작업만 가능)
+    subscribe    {} / unsubscribe {}            -> 엔진 이벤트를 'event' 알림으로 받음
+    shutdown     {}                             -> 데몬 종료
+
+엔진 이벤트(download_engine.DownloadEngine 참고)에 더해, 큐를 모두 처리하면
+{'event': 'done', run_id, successful, failed, cancelled} 알림을 보냅니다. run_id는 enqueue 응답의
+run_id와 같으므로, 이전 묶음의 done이 늦게 도착해도 새 묶음과 구분할 수 있습니다.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+from threading import Thread, Event, Lock
+
+from download_engine import (
+    APP_DATA_DIR, DEFAULT_MAX_WORKERS, DEFAULT_OUTPUT_PATH, DEFAULT_QUALITY, PRIORITIES, PRIORITY_NORMAL,
+    DownloadEngine, QueueStateStore,
+)
+
+DAEMON_QUEUE_STATE_FILE = os.path.join(APP_DATA_DIR, "daemon_queue_state.json")  # UI의 이어받기 상태와 분리
+
+# JSON-RPC 2.0 오류 코드
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RPCConnection:
+    """클라이언트 하나와의 줄 단위 JSON 연결 (여러 스레드에서 send 가능)"""
+
+    def __init__(self, writer):
+        self._writer = writer  # str 한 줄을 받아 보내는 함수
+        self._lock = Lock()
+        self.closed = False
+
+    def send(self, message):
+        line = json.dumps(message, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._writer(line)
+            except (OSError, ValueError):
+                # 상대가 연결을 끊음
+                self.closed = True
+
+    def notify(self, method, params):
+        self.send({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+
+class DownloadService:
+    """DownloadEngine 하나를 여러 클라이언트가 함께 쓰도록 묶는 RPC 서비스
+
+    큐가 비어 있을 때 enqueue가 들어오면 엔진을 백그라운드 스레드에서 실행하고,
+    실행 중이면 같은 큐에 넣기만 합니다. 모든 엔진 이벤트는 구독한 클라이언트에게 전달합니다.
+    """
+
+    def __init__(self, yt_dlp_path=None):
+        self.engine = DownloadEngine(on_event=self._broadcast, queue_state=QueueStateStore(DAEMON_QUEUE_STATE_FILE),
+                                     yt_dlp_path=yt_dlp_path)
+        self.engine.archive.load()
+        self.settings = {
+            'output_path': DEFAULT_OUTPUT_PATH,
+            'quality': DEFAULT_QUALITY,
+            'max_workers': DEFAULT_MAX_WORKERS,
+        }
+        self.shutdown_event = Event()
+        self._subscribers = set()
+        self._runner = None
+        self._run_id = 0  # 엔진 실행(묶음)마다 1씩 증가
+        self._lock = Lock()
+
+    def _broadcast(self, event):
+        for connection in list(self._subscribers):
+            if connection.closed:
+                self._subscribers.discard(connection)
+            else:
+                connection.notify('event', event)
+
+    def handle(self, connection, request):
+        """요청 하나를 처리하고 응답 dict를 반환 (알림이면 None)"""
+        if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or not isinstance(request.get('method'), str):
+            return _error_response(request.get('id') if isinstance(request, dict) else None,
+                                   INVALID_REQUEST, "잘못된 요청")
+        request_id = request.get('id')
+        params = request.get('params') or {}
+        handler = getattr(self, f"rpc_{request['method']}", None)
+        try:
+            if handler is None:
+                raise RPCError(METHOD_NOT_FOUND, f"알 수 없는 메서드: {request['method']}")
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params는 객체여야 합니다")
+            result = handler(connection, **params)
+        except RPCError as e:
+            response = _error_response(request_id, e.code, e.message)
+        except TypeError as e:
+            response = _error_response(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            response = _error_response(request_id, INTERNAL_ERROR, str(e))
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        return response if 'id' in request else None
+
+    # --- RPC 메서드 ---
+
+    def rpc_enqueue(self, connection, urls, settings=None, priority=PRIORITY_NORMAL):
+        if not isinstance(urls, list):
+            raise RPCError(INVALID_PARAMS, "urls는 URL 문자열 목록이어야 합니다")
+        with self._lock:
+            stopping = self._runner if self.engine.stop_event.is_set() else None
+        if stopping is not None:
+            # 중단 중인 엔진에 넣으면 곧 끝나는 실행과 함께 버려지므로, 끝날 때까지 기다린 뒤 새 묶음으로 시작
+            stopping.join()
+        with self._lock:
+            if self._runner is None:
+                # 새 다운로드 묶음: 이전 묶음의 중단 상태와 처리 기록을 비우고 설정 반영
+                self.engine.reset()
+                if settings:
+                    self.settings.update(settings)
+            results = [self.engine.enqueue(url, priority) for url in urls if isinstance(url, str)]
+            if self._runner is None and len(self.engine.queue):
+                self._run_id += 1
+                self._runner = Thread(target=self._run_loop, args=(dict(self.settings), self._run_id),
+                                      name="download-daemon-runner", daemon=True)
+                self._runner.start()
+            run_id = self._run_id
+        return {
+            'queued': results.count('queued'),
+            'archived': results.count('archived'),
+            'duplicate': results.count('duplicate'),
+            'run_id': run_id,
+        }
+
+    def rpc_cancel(self, connection, url=None, job_id=None):
+        if job_id is not None:
+            # 다운로드 중이거나 일시정지한 작업 하나만 취소
+            return {'cancelled': self.engine.cancel_job(job_id)}
+        if url is None:
+            self.engine.stop()
+            return {'cancelled': True}
+        # 대기 중인 작업은 큐에서 뺌 (받는 중인 작업은 job_id로 취소)
+        return {'cancelled': self.engine.remove_pending(url)}
+
+    def rpc_set_bandwidth(self, connection, total_rate=None, job_rate_limit=None):
+        for value in (total_rate, job_rate_limit):
+            if value is not None and (not isinstance(value, int) or value < 0):
+                raise RPCError(INVALID_PARAMS, "속도 제한은 0 이상의 정수(바이트/초)여야 합니다")
+        # 다음 enqueue로 새 묶음이 시작될 때도 같은 제한을 쓰도록 기본 설정에도 반영
+        self.settings.update(rate_limit=total_rate or None, job_rate_limit=job_rate_limit or None)
+        self.engine.set_rate_limit(total_rate or None, job_rate_limit or None)
+        return {'rates': self.engine.bandwidth.rates()}
+
+    def rpc_prioritize(self, connection, job_id, priority):
+        if priority not in PRIORITIES:
+            raise RPCError(INVALID_PARAMS, f"priority는 {PRIORITIES} 중 하나여야 합니다")
+        return {'updated': self.engine.set_job_priority(job_id, priority)}
+
+    def rpc_pause(self, connection, job_id):
+        return {'paused': self.engine.pause_job(job_id)}
+
+    def rpc_resume(self, connection, job_id):
+        return {'resumed': self.engine.resume_job(job_id)}
+
+    def rpc_status(self, connection):
+        successful, failed, active, pending = self.engine.stats()
+        active_jobs = [{'job_id': job.job_id, 'url': job.url, 'priority': job.priority}
+                       for job in self.engine.running_jobs()]
+        return {
+            'running': self._runner is not None,
+            'run_id': self._run_id,
+            'successful': successful,
+            'failed': failed,
+            'active': active,
+            'pending': pending,
+            'active_jobs': active_jobs,
+            'paused_jobs': [{'job_id': job.job_id, 'url': job.url} for job in self.engine.paused_jobs()],
+            'rates': self.engine.bandwidth.rates(),
+            'settings': self.settings,
+            'archived': len(self.engine.archive),
+        }
+
+    def rpc_subscribe(self, connection):
+        self._subscribers.add(connection)
+        return True
+
+    def rpc_unsubscribe(self, connection):
+        self._subscribers.discard(connection)
+        return True
+
+    def rpc_shutdown(self, connection):
+        self.shutdown_event.set()
+        return True
+
+    # --- 실행 ---
+
+    def _run_loop(self, settings, run_id):
+        while True:
+            result = self.engine.run(settings)
+            with self._lock:
+                # 엔진이 끝나는 사이에 들어온 URL이 있으면 한 번 더 실행
+                if result is not None and len(self.engine.queue) and not self.engine.stop_event.is_set():
+                    continue
+                self._runner = None
+            break
+        successful, failed = result if result is not None else (0, 0)
+        self._broadcast({'event': 'done', 'run_id': run_id, 'successful': successful, 'failed': failed,
+                         'cancelled': self.engine.stop_event.is_set() or result is None})
+
+    def close(self):
+        """데몬 종료: 실행 중인 다운로드는 다음에 이어받도록 상태를 저장한 뒤 중단"""
+        self.engine.save_state()
+        self.engine.stop()
+        runner = self._runner
+        if runner:
+            runner.join(timeout=5)
+
+
+def _error_response(request_id, code, message):
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _serve_lines(service, connection, lines):
+    """줄 단위 요청을 읽어 처리 (입력이 끝나거나 shutdown이 오면 반환)"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            connection.send(_error_response(None, PARSE_ERROR, "JSON 파싱 오류"))
+            continue
+        response = service.handle(connection, request)
+        if response is not None:
+            connection.send(response)
+        if service.shutdown_event.is_set():
+            break
+    service.rpc_unsubscribe(connection)
+
+
+def serve_stdio(service):
+    """표준 입출력으로 클라이언트 하나를 처리. 입력이 닫히면(부모 종료) 데몬도 끝남"""
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stdin.reconfigure(encoding='utf-8')
+
+    def write(line):
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+    _serve_lines(service, RPCConnection(write), sys.stdin)
+
+
+def serve_socket(service, socket_path=None, port=None):
+    """유닉스 소켓 또는 127.0.0.1 TCP로 여러 클라이언트를 처리"""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def write(line):
+                self.wfile.write(line.encode('utf-8'))
+                self.wfile.flush()
+
+            connection = RPCConnection(write)
+            try:
+                _serve_lines(service, connection, self.rfile)
+            finally:
+                connection.closed = True
+
+    if socket_path:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise SystemExit("이 플랫폼은 유닉스 소켓을 지원하지 않습니다. --port를 사용하세요.")
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    else:
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+
+    Thread(target=server.serve_forever, name="download-daemon-server", daemon=True).start()
+    try:
+        service.shutdown_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m download_daemon",
+                                     description="다운로드 엔진을 JSON-RPC 데몬으로 실행합니다.")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument('--socket', help="유닉스 소켓 경로 (생략하면 표준 입출력)")
+    transport.add_argument('--port', type=int, help="127.0.0.1에서 열 TCP 포트")
+    parser.add_argument('--yt-dlp', dest='yt_dlp_path', help="yt-dlp 실행 파일 경로")
+    args = parser.parse_args(argv)
+
+    service = DownloadService(yt_dlp_path=args.yt_dlp_path)
+    try:
+        if args.socket or args.port:
+            serve_socket(service, socket_path=args.socket, port=args.port)
+        else:
+            serve_stdio(service)
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
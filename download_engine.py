@@ -0,0 +1,2810 @@
+"""YouTube 다운로드 엔진 (UI 없이 동작)
+
+다운로드 큐, 완료 기록, 재생목록 펼치기, 워커 풀, 이어받기용 상태 저장을 담당합니다.
+tkinter/customtkinter는 불러오지 않으므로 서버나 cron 작업에서도 그대로 쓸 수 있습니다.
+
+    python -m download_engine urls.txt -o ~/Videos
+    cat urls.txt | python -m download_engine --backend inprocess
+
+진행 상황은 표준 출력에 한 줄에 하나씩 JSON(JSONL)으로 기록합니다.
+"""
+import errno
+import json
+import os
+import queue
+import random
+import re
+import shutil
+import subprocess
+import sys
+import time
+import zlib
+from collections import deque
+from threading import Thread, Event, Lock, Timer
+
+from url_parser import canonical_url_key, parse_urls
+
+# --- 동시 다운로드 설정 ---
+DEFAULT_MAX_WORKERS = 3  # 기본 동시 다운로드 개수
+DEFAULT_QUALITY = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+DEFAULT_OUTPUT_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "YouTube")
+MP3_QUALITY = "bestaudio/best"  # 이 품질을 고르면 음성만 받아 mp3로 변환
+
+# --- 후처리 (mp3 변환) 설정 ---
+DEFAULT_POSTPROCESS_NICE = 10  # 변환 프로세스의 nice 값 (Windows에서는 '낮은 우선순위' 클래스)
+MP3_BITRATE = "192k"
+
+# --- 연결 수 설정 (작업 하나를 여러 연결로 나눠 받기) ---
+DEFAULT_CONCURRENT_FRAGMENTS = 1  # 작업 하나가 동시에 받는 조각 수 (1이면 yt-dlp 기본 단일 연결)
+DEFAULT_CONNECTION_BUDGET = 16    # 모든 작업을 합친 최대 연결 수 (동시 다운로드 수 × 조각 수)
+EXTERNAL_DOWNLOADERS = ("aria2c",)  # yt-dlp --downloader로 넘길 수 있는 외부 다운로더
+
+# --- 대역폭 제한 (바이트/초, None이면 제한 없음) ---
+MIN_JOB_RATE = 32 * 1024  # 전체 한도를 나눌 때 작업 하나에 주는 최소 속도
+
+# --- 재시도 설정 ---
+DEFAULT_MAX_RETRIES = 3         # 일시적인 오류로 실패한 작업을 다시 시도하는 최대 횟수
+DEFAULT_RETRY_BASE_DELAY = 5.0  # 첫 재시도 대기 시간 (초). 재시도마다 두 배
+MAX_RETRY_DELAY = 300.0
+THROTTLE_COOLDOWN = 60.0        # 요청 제한(429 등)을 만났을 때 모든 워커가 새 작업을 멈추는 시간 (초)
+MAX_THROTTLE_COOLDOWN = 15 * 60.0
+
+# --- 디스크 공간 (staging 폴더와 시작 전 여유 공간 확인) ---
+DEFAULT_MIN_FREE_SPACE = 512 * 1024 ** 2  # 예상 크기를 예약하고도 디스크마다 남겨 둘 여유 공간 (바이트)
+STAGING_SPACE_FACTOR = 2  # 병합/변환 중에는 원본과 결과가 잠시 함께 있으므로 예상 크기의 두 배를 요구
+
+# --- 다운로드 엔진 (백엔드) 선택 ---
+BACKEND_SUBPROCESS = "subprocess"  # URL마다 yt-dlp.exe 프로세스 실행
+BACKEND_INPROCESS = "inprocess"    # 워커마다 yt_dlp.YoutubeDL 인스턴스 재사용
+
+# Windows에서 yt-dlp 콘솔 창을 띄우지 않음 (다른 OS에서는 0)
+_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+def plan_connections(max_workers, concurrent_fragments, budget=DEFAULT_CONNECTION_BUDGET):
+    """(동시 다운로드 수, 작업당 연결 수)를 반환. 둘을 곱한 값이 budget을 넘지 않도록 조각 수를 먼저 줄임"""
+    budget = max(1, int(budget))
+    max_workers = min(max(1, int(max_workers)), budget)
+    concurrent_fragments = max(1, min(int(concurrent_fragments), budget // max_workers))
+    return max_workers, concurrent_fragments
+
+
+def find_external_downloader(name):
+    """외부 다운로더 실행 파일 경로. 지원하지 않거나 설치되어 있지 않으면 None"""
+    if name not in EXTERNAL_DOWNLOADERS:
+        return None
+    return shutil.which(name)
+
+
+def parse_rate(value):
+    """'500K', '2M', '1.5G' 또는 숫자를 바이트/초로 변환. 비어 있거나 0이면 None (제한 없음)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) or None
+    text = str(value).strip().upper().rstrip('/S').rstrip('B').rstrip('I')
+    if not text:
+        return None
+    multiplier = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}.get(text[-1], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier) or None
+
+
+def format_size(num_bytes):
+    """바이트 수를 yt-dlp와 같은 형식(예: 1.50MiB)으로 변환"""
+    if not num_bytes:
+        return ''
+    value = float(num_bytes)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024 or unit == 'GiB':
+            return f"{value:.2f}{unit}"
+        value /= 1024
+
+
+def format_speed(bytes_per_sec):
+    """바이트/초를 yt-dlp와 같은 형식(예: 1.50MiB/s)으로 변환"""
+    size = format_size(bytes_per_sec)
+    return f"{size}/s" if size else ''
+
+
+def format_eta(seconds):
+    """남은 시간(초)을 mm:ss 또는 hh:mm:ss 형식으로 변환"""
+    if seconds is None:
+        return ''
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+# --- 구조화된 진행률 (yt-dlp가 진행 상황마다 JSON 한 줄을 출력) ---
+PROGRESS_PREFIX = "[progress]"
+OUTPUT_FILE_PREFIX = "[file]"  # 다운로드가 끝난 뒤 yt-dlp가 출력하는 최종 파일 경로 줄
+PROGRESS_FIELDS = ('status', 'downloaded_bytes', 'total_bytes', 'total_bytes_estimate',
+                   'speed', 'eta', 'fragment_index', 'fragment_count')
+
+
+def build_progress_template(job_id):
+    """yt-dlp --progress-template 값: 작업 ID가 들어간 JSON 한 줄 (값이 없으면 null)"""
+    fields = ','.join(f'"{name}":%(progress.{name}|null)j' for name in PROGRESS_FIELDS)
+    return f'download:{PROGRESS_PREFIX}{{"job_id":{int(job_id)},{fields}}}'
+
+
+def decode_progress_line(line):
+    """진행률 줄이면 yt-dlp 진행 상태 dict를, 아니면 None을 반환
+
+    접두어만 보고 일반 출력 줄을 바로 거르므로 진행률 줄에서만 json.loads를 호출합니다.
+    """
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        status = json.loads(line[len(PROGRESS_PREFIX):])
+    except ValueError:
+        return None
+    return status if isinstance(status, dict) else None
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def make_progress(job_id, status):
+    """yt-dlp 진행 상태(progress_hooks 인자 또는 decode_progress_line 결과)를 엔진 진행률 dict로 정리
+
+    전체 크기를 모르면 추정치를 쓰고, percent(0~1)는 바이트 기준으로 계산합니다.
+    크기를 전혀 모르면 조각(fragment) 번호로 계산하고, 그것도 없으면 None입니다.
+    """
+    downloaded = _number(status.get('downloaded_bytes'))
+    total = _number(status.get('total_bytes')) or _number(status.get('total_bytes_estimate'))
+    fragment_index = _number(status.get('fragment_index'))
+    fragment_count = _number(status.get('fragment_count'))
+
+    if status.get('status') == 'finished':
+        percent = 1.0
+    elif total and downloaded is not None:
+        percent = min(downloaded / total, 1.0)
+    elif fragment_index and fragment_count:
+        percent = min(fragment_index / fragment_count, 1.0)
+    else:
+        percent = None
+
+    return {
+        'job_id': job_id,
+        'status': status.get('status') or 'downloading',
+        'percent': percent,
+        'downloaded_bytes': downloaded,
+        'total_bytes': total,
+        'speed': _number(status.get('speed')),
+        'eta': _number(status.get('eta')),
+        'fragment_index': fragment_index,
+        'fragment_count': fragment_count,
+    }
+
+
+def format_progress_text(progress):
+    """진행률 dict를 사람이 읽는 한 줄로 변환"""
+    if progress['status'] == 'finished':
+        return "다운로드 완료"
+    parts = ["다운로드 중..."]
+    if progress['percent'] is not None:
+        parts.append(f"{progress['percent'] * 100:.1f}%")
+    if progress['fragment_count']:
+        parts.append(f"(조각 {progress['fragment_index'] or 0}/{progress['fragment_count']})")
+    speed = format_speed(progress['speed'])
+    if speed:
+        parts.append(f"속도: {speed}")
+    eta = format_eta(progress['eta'])
+    if eta:
+        parts.append(f"남은 시간: {eta}")
+    return ' '.join(parts)
+
+
+class _YtDlpLogger:
+    """yt_dlp.YoutubeDL의 출력을 앱 로그로 전달하는 로거"""
+
+    def __init__(self, downloader):
+        self.downloader = downloader
+
+    def debug(self, message):
+        # quiet 모드에서는 일반 출력도 debug로 들어옴. 진짜 디버그 메시지만 버림
+        if not message.startswith('[debug] '):
+            self.downloader.log(f"[yt-dlp #{self.downloader.current_job_id}] {message}")
+
+    def info(self, message):
+        self.downloader.log(f"[yt-dlp #{self.downloader.current_job_id}] {message}")
+
+    def warning(self, message):
+        pass  # --no-warnings 와 동일하게 경고는 표시하지 않음
+
+    def error(self, message):
+        self.downloader.log(f"[오류] {message}", level="error")
+
+
+class InProcessDownloader:
+    """워커 하나가 계속 재사용하는 yt_dlp.YoutubeDL 기반 다운로드 백엔드
+
+    URL마다 yt-dlp.exe를 새로 실행하지 않으므로 인터프리터 시작, 추출기 로딩,
+    HTTP 연결 수립 비용을 한 번만 치르고 이후 URL에서는 재사용합니다.
+    진행률은 yt-dlp의 progress_hooks로 직접 받습니다.
+    """
+
+    def __init__(self, output_path, quality, stop_event, on_progress=None, on_log=None,
+                 concurrent_fragments=DEFAULT_CONCURRENT_FRAGMENTS, external_downloader=None,
+                 extract_audio=True, on_output_file=None):
+        self.stop_event = stop_event
+        self.on_progress = on_progress  # (make_progress()로 만든 진행률 dict)
+        self.on_log = on_log  # (message, level=..., job_id=...)
+        self.on_output_file = on_output_file  # (job_id, 최종 파일 경로)
+        self.current_job_id = None
+        self._interrupted_job = None  # 이 작업만 멈추라는 요청 (일시정지/취소)
+        import yt_dlp  # 내장 백엔드를 쓸 때만 불러옴 (시작 시간 단축)
+        self._errors = yt_dlp.utils
+        self.ydl = yt_dlp.YoutubeDL(self._build_options(output_path, quality, concurrent_fragments, external_downloader,
+                                                        extract_audio))
+
+    def _build_options(self, output_path, quality, concurrent_fragments, external_downloader, extract_audio):
+        options = {
+            'outtmpl': os.path.join(output_path, '%(uploader)s - %(title)s.%(ext)s'),
+            'format': quality,
+            'nocheckcertificate': True,  # SSL 인증서 검증 비활성화
+            'continuedl': True,  # 남아 있는 .part 파일이 있으면 이어받기
+            'noplaylist': True,  # 재생목록은 미리 개별 영상으로 펼쳐서 큐에 넣음
+            'no_warnings': True,
+            'quiet': True,
+            'noprogress': True,
+            'logger': _YtDlpLogger(self),
+            'progress_hooks': [self._progress_hook],
+            'post_hooks': [self._post_hook],
+            'concurrent_fragment_downloads': concurrent_fragments,
+        }
+        if external_downloader:
+            # 외부 다운로더는 조각 형식이 아닌 단일 파일도 여러 연결로 나눠 받음
+            options['external_downloader'] = {'default': external_downloader}
+            options['external_downloader_args'] = {external_downloader: _external_downloader_args(concurrent_fragments)}
+        if quality == MP3_QUALITY and extract_audio:
+            options['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }]
+        return options
+
+    def log(self, message, level="info"):
+        if self.on_log:
+            self.on_log(message, level=level, job_id=self.current_job_id)
+
+    def set_rate_limit(self, rate):
+        """다운로드 중에도 속도 제한 변경 (yt-dlp 다운로더가 조각을 받을 때마다 params를 다시 읽음)"""
+        self.ydl.params['ratelimit'] = rate
+
+    def _progress_hook(self, status):
+        # 진행률 훅은 다운로드 루프 안에서 호출되므로 여기서 중단 요청을 반영 (.part 파일은 남음)
+        if self.stop_event.is_set() or self._interrupted_job == self.current_job_id:
+            raise self._errors.DownloadCancelled()
+
+        if status.get('status') in ('downloading', 'finished') and self.on_progress:
+            self.on_progress(make_progress(self.current_job_id, status))
+
+    def interrupt(self, job_id):
+        """job_id 작업만 멈춤 (다음 진행률 훅에서 중단)"""
+        self._interrupted_job = job_id
+
+    def _post_hook(self, filepath):
+        if self.on_output_file:
+            self.on_output_file(self.current_job_id, filepath)
+
+    def download(self, job_id, url, info_path=None):
+        """URL 하나를 다운로드하고 성공 여부를 반환 (info_path가 있으면 캐시된 정보로 바로 시작)"""
+        self.current_job_id = job_id
+        try:
+            if info_path:
+                return self.ydl.download_with_info_file(info_path) == 0
+            return self.ydl.download([url]) == 0
+        except self._errors.DownloadCancelled:
+            return False
+        except self._errors.DownloadError:
+            # 오류 내용은 로거를 통해 이미 기록됨
+            return False
+        finally:
+            self.current_job_id = None
+
+    def close(self):
+        self.ydl.close()
+
+
+# --- 앱 데이터 (세션이 끝나도 유지되는 파일) ---
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".youtube_downloader")
+ARCHIVE_FILE = os.path.join(APP_DATA_DIR, "download_archive.txt")
+QUEUE_STATE_FILE = os.path.join(APP_DATA_DIR, "queue_state.json")
+PLAYLIST_CACHE_FILE = os.path.join(APP_DATA_DIR, "playlist_cache.json")
+PLAYLIST_CACHE_TTL = 60 * 60  # 재생목록 펼침 결과 캐시 유지 시간 (초)
+INFO_CACHE_DIR = os.path.join(APP_DATA_DIR, "info_cache")
+INFO_CACHE_TTL = 60 * 60  # 영상 정보(info JSON) 캐시 유지 시간 (초). 안에 든 스트림 URL은 몇 시간 뒤 만료됨
+INFO_CACHE_MAX_ENTRIES = 500
+DEFAULT_PREFETCH_WORKERS = 2  # 다운로드보다 앞서 영상 정보를 가져오는 스레드 수
+PREFETCH_TIMEOUT = 120  # yt-dlp -J 한 번의 제한 시간 (초)
+
+
+def _atomic_write_json(path, data):
+    """임시 파일에 쓴 뒤 os.replace로 바꿔치기 (쓰는 도중 종료되어도 기존 파일이 깨지지 않음)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as temp_file:
+        json.dump(data, temp_file, ensure_ascii=False)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+
+class DownloadArchive:
+    """세션이 끝나도 유지되는 다운로드 완료 기록 (yt-dlp --download-archive 형식 호환)
+
+    파일 한 줄에 'youtube <영상ID>' 형식으로 기록하므로 같은 파일을 yt-dlp의
+    --download-archive 옵션에 그대로 넘길 수 있습니다. 조회는 메모리 집합으로 O(1)입니다.
+    """
+
+    EXTRACTOR = "youtube"
+
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path = path
+        self._ids = set()
+        self._loaded = False
+        self._lock = Lock()
+
+    def load(self):
+        """파일에서 기록을 읽음 (처음 한 번만)"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path, encoding='utf-8') as archive_file:
+                    for line in archive_file:
+                        parts = line.split()
+                        if len(parts) == 2 and parts[0].lower() == self.EXTRACTOR:
+                            self._ids.add(parts[1])
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key):
+        """canonical_url_key() 형식의 키가 이미 받은 영상인지 확인"""
+        return key.startswith('video:') and key[6:] in self._ids
+
+    def add(self, key):
+        """다운로드가 끝난 영상을 기록 (영상 키가 아니거나 이미 있으면 무시)"""
+        if not key.startswith('video:'):
+            return
+        video_id = key[6:]
+        with self._lock:
+            if video_id in self._ids:
+                return
+            self._ids.add(video_id)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as archive_file:
+                archive_file.write(f"{self.EXTRACTOR} {video_id}\n")
+
+
+class QueueStateStore:
+    """다운로드 큐와 작업 상태를 디스크에 저장해 재시작 후 이어받을 수 있게 함
+
+    변경될 때마다 바로 쓰지 않고 mark_dirty()로 표시만 해두면, 저장 스레드가
+    interval초마다 한 번씩 snapshot_func()의 결과를 원자적으로 기록합니다.
+    """
+
+    def __init__(self, path=QUEUE_STATE_FILE, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self._snapshot_func = None
+        self._dirty = Event()
+        self._stopped = Event()
+        self._thread = None
+        self._write_lock = Lock()
+
+    def load(self):
+        """저장된 상태를 읽음. 없거나 손상되었으면 None"""
+        try:
+            with open(self.path, encoding='utf-8') as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or not state.get('jobs'):
+            return None
+        return state
+
+    def save(self, state):
+        with self._write_lock:
+            _atomic_write_json(self.path, state)
+
+    def clear(self):
+        """저장된 상태 삭제 (모든 작업이 끝났을 때)"""
+        with self._write_lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def start(self, snapshot_func):
+        """주기적 저장 스레드 시작"""
+        self._snapshot_func = snapshot_func
+        self._stopped.clear()
+        self._dirty.set()
+        self._thread = Thread(target=self._save_loop, name="queue-state-saver", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    def flush(self):
+        """변경 사항이 있으면 즉시 저장"""
+        if self._snapshot_func and self._dirty.is_set():
+            self._dirty.clear()
+            self.save(self._snapshot_func())
+
+    def stop(self, flush=True):
+        """저장 스레드 종료 (flush=True면 마지막 상태를 저장)"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if flush:
+            self.flush()
+
+    def _save_loop(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except OSError:
+                # 저장 실패는 다음 주기에 다시 시도
+                self._dirty.set()
+
+
+class PlaylistExpander:
+    """재생목록 URL을 flat 추출로 개별 영상 URL 목록으로 펼침
+
+    flat 추출은 각 영상 페이지를 열지 않고 목록만 받아오므로 빠릅니다.
+    결과는 재생목록 ID별로 디스크에 캐시하고 ttl초가 지나면 다시 추출합니다.
+    """
+
+    def __init__(self, path=PLAYLIST_CACHE_FILE, ttl=PLAYLIST_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._cache = None
+        self._lock = Lock()
+
+    def _load_cache(self):
+        if self._cache is None:
+            try:
+                with open(self.path, encoding='utf-8') as cache_file:
+                    self._cache = json.load(cache_file)
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._load_cache().get(key)
+        if entry and time.time() - entry.get('fetched_at', 0) < self.ttl:
+            return entry
+        return None
+
+    def _store(self, key, entry):
+        with self._lock:
+            cache = self._load_cache()
+            now = time.time()
+            # 만료된 항목은 저장할 때 함께 정리
+            for stale_key in [k for k, v in cache.items() if now - v.get('fetched_at', 0) >= self.ttl]:
+                del cache[stale_key]
+            cache[key] = entry
+            try:
+                _atomic_write_json(self.path, cache)
+            except OSError:
+                pass
+
+    def expand(self, url):
+        """(재생목록 제목, 영상 URL 목록, 캐시 사용 여부)를 반환. 추출 실패 시 예외 발생"""
+        key = canonical_url_key(url)
+        entry = self._cached(key)
+        from_cache = entry is not None
+        if entry is None:
+            options = {
+                'extract_flat': 'in_playlist',
+                'skip_download': True,
+                'quiet': True,
+                'no_warnings': True,
+                'nocheckcertificate': True,
+            }
+            import yt_dlp
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=False)
+            video_ids = [item['id'] for item in (info.get('entries') or []) if item and item.get('id')]
+            entry = {'fetched_at': time.time(), 'title': info.get('title') or '', 'video_ids': video_ids}
+            self._store(key, entry)
+
+        urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in entry['video_ids']]
+        return entry['title'], urls, from_cache
+
+
+class InfoJsonCache:
+    """영상별 yt-dlp info JSON을 디스크에 보관하는 캐시 (파일 하나 = 영상 하나 × 품질)
+
+    파일 수정 시각으로 ttl을 판단하고, 저장할 때 만료된 파일과 max_entries를 넘는
+    오래된 파일을 지웁니다. 캐시된 파일은 yt-dlp --load-info-json으로 바로 다운로드에 씁니다.
+    info JSON의 requested_formats(예상 크기)는 품질(-f)에 따라 다르므로 variant(품질 문자열)를
+    파일 이름에 넣어 품질마다 따로 보관합니다.
+    """
+
+    def __init__(self, directory=INFO_CACHE_DIR, ttl=INFO_CACHE_TTL, max_entries=INFO_CACHE_MAX_ENTRIES, variant=''):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.variant = variant
+        self._lock = Lock()
+
+    def _path(self, key):
+        if not key.startswith('video:'):
+            return None
+        suffix = f".{zlib.crc32(self.variant.encode('utf-8')):08x}" if self.variant else ""
+        return os.path.join(self.directory, f"{key[6:]}{suffix}.info.json")
+
+    def fresh_path(self, key):
+        """만료되지 않은 캐시 파일 경로. 없으면 None"""
+        path = self._path(key)
+        try:
+            if path and time.time() - os.path.getmtime(path) < self.ttl:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def load(self, key):
+        """만료되지 않은 info dict. 없거나 읽을 수 없으면 None"""
+        path = self.fresh_path(key)
+        if not path:
+            return None
+        try:
+            with open(path, encoding='utf-8') as info_file:
+                return json.load(info_file)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, info):
+        path = self._path(key)
+        if not path:
+            return None
+        with self._lock:
+            try:
+                _atomic_write_json(path, info)
+            except OSError:
+                return None
+            self._evict()
+        return path
+
+    def invalidate(self, key):
+        path = self._path(key)
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """만료된 파일과 개수 제한을 넘는 오래된 파일 삭제 (잠금을 잡은 상태에서 호출)"""
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.info.json'):
+                    entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        now = time.time()
+        for index, (mtime, path) in enumerate(entries):
+            if index >= self.max_entries or now - mtime >= self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def summarize_info(info):
+    """info dict에서 화면에 보여줄 요약 (제목, 올린 사람, 길이, 예상 크기)을 뽑음"""
+    formats = info.get('requested_formats') or [info]
+    sizes = [f.get('filesize') or f.get('filesize_approx') for f in formats]
+    return {
+        'title': info.get('title') or '',
+        'uploader': info.get('uploader') or '',
+        'duration': info.get('duration'),
+        'filesize': sum(sizes) if sizes and all(sizes) else None,
+    }
+
+
+class MetadataPrefetcher:
+    """큐에 들어온 영상의 정보를 다운로드 워커보다 먼저 가져와 InfoJsonCache에 저장
+
+    extract(url)은 info dict를 반환하거나 예외를 던집니다. 이미 캐시가 있거나
+    is_wanted(url)이 False(이미 다운로드를 시작함 등)인 URL은 건너뜁니다.
+    on_result(url, info)는 새로 가져오거나 캐시에서 찾은 정보마다 prefetch 스레드에서 호출됩니다.
+    """
+
+    def __init__(self, cache, extract, workers=DEFAULT_PREFETCH_WORKERS, is_wanted=None, on_result=None, on_log=None):
+        self.cache = cache
+        self.extract = extract
+        self.workers = max(1, workers)
+        self.is_wanted = is_wanted
+        self.on_result = on_result
+        self.on_log = on_log
+        self._queue = queue.Queue()
+        self._seen = set()
+        self._threads = []
+        self._lock = Lock()
+
+    def start(self):
+        for index in range(self.workers):
+            thread = Thread(target=self._worker_loop, name=f"metadata-prefetch-{index + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, url):
+        """영상 URL을 미리 가져올 목록에 추가 (같은 영상은 한 번만)"""
+        key = canonical_url_key(url)
+        if not key.startswith('video:'):
+            return
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+        self._queue.put((key, url))
+
+    def close(self):
+        """가져오기 스레드 종료 (진행 중인 추출은 끝날 때까지 기다리지 않음)"""
+        for _ in self._threads:
+            self._queue.put(None)
+        self._threads = []
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            key, url = item
+            info = self.cache.load(key)
+            if info is None:
+                if self.is_wanted and not self.is_wanted(url):
+                    continue
+                try:
+                    info = self.extract(url)
+                except Exception as e:
+                    if self.on_log:
+                        self.on_log(f"영상 정보를 미리 가져오지 못했습니다: {url} ({e})", level="debug")
+                    continue
+                self.cache.store(key, info)
+            if self.on_result:
+                self.on_result(url, info)
+
+
+def format_metadata_text(summary):
+    """summarize_info() 결과를 '제목 (크기, 길이)' 한 줄로 변환"""
+    details = [text for text in (format_size(summary['filesize']), format_eta(summary['duration'])) if text]
+    if details:
+        return f"{summary['title']} ({', '.join(details)})"
+    return summary['title']
+
+
+# --- 작업별 중단 요청 (DownloadEngine.pause_job / cancel_job) ---
+JOB_PAUSE = "pause"
+JOB_CANCEL = "cancel"
+
+
+# --- 다운로드 큐 우선순위 (숫자가 작을수록 먼저 처리) ---
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+
+class DownloadJob:
+    """다운로드 큐의 작업 하나"""
+
+    __slots__ = ('job_id', 'url', 'key', 'priority')
+
+    def __init__(self, job_id, url, key, priority=PRIORITY_NORMAL):
+        self.job_id = job_id
+        self.url = url
+        self.key = key
+        self.priority = priority
+
+
+class DownloadJobQueue:
+    """우선순위별 deque와 해시 인덱스로 구성된 스레드 안전 다운로드 큐
+
+    추가, 꺼내기, 포함 여부 확인, 제거가 모두 O(1)입니다. 한 번 꺼내간(처리 중이거나
+    완료된) 키도 기억하므로 같은 URL이 다시 큐에 들어오지 않습니다.
+    제거는 인덱스에서만 지우고 deque에 남은 항목은 꺼낼 때 건너뜁니다.
+    """
+
+    def __init__(self, key_func=None):
+        self.key_func = key_func or (lambda url: url)
+        self._lanes = {priority: deque() for priority in PRIORITIES}
+        self._pending = {}  # key -> DownloadJob (대기 중)
+        self._processed = set()  # 이미 꺼내간 키
+        self._next_id = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, url):
+        key = self.key_func(url)
+        with self._lock:
+            return key in self._pending or key in self._processed
+
+    def add(self, url, priority=PRIORITY_NORMAL):
+        """URL을 큐에 추가하고 작업을 반환. 이미 대기 중이거나 처리된 URL이면 None"""
+        key = self.key_func(url)
+        with self._lock:
+            if key in self._pending or key in self._processed:
+                return None
+            self._next_id += 1
+            job = DownloadJob(self._next_id, url, key, priority)
+            self._pending[key] = job
+            self._lanes[priority].append(job)
+            return job
+
+    def pop(self):
+        """가장 높은 우선순위의 작업을 꺼내 처리됨으로 표시. 비어 있으면 None"""
+        with self._lock:
+            for priority in PRIORITIES:
+                lane = self._lanes[priority]
+                while lane:
+                    job = lane.popleft()
+                    # 제거되었거나 다른 우선순위로 다시 들어간 항목은 건너뜀
+                    if self._pending.get(job.key) is not job:
+                        continue
+                    del self._pending[job.key]
+                    self._processed.add(job.key)
+                    return job
+            return None
+
+    def is_pending(self, url):
+        """아직 꺼내가지 않은 URL인지 확인"""
+        key = self.key_func(url)
+        with self._lock:
+            return key in self._pending
+
+    def pending_jobs(self):
+        """대기 중인 작업을 처리될 순서대로 반환"""
+        with self._lock:
+            return [job for priority in PRIORITIES for job in self._lanes[priority]
+                    if self._pending.get(job.key) is job]
+
+    def remove(self, url):
+        """대기 중인 URL을 큐에서 제거. 제거했으면 True"""
+        key = self.key_func(url)
+        with self._lock:
+            return self._pending.pop(key, None) is not None
+
+    def forget(self, url):
+        """처리된 키 기록을 지워 같은 URL을 다시 추가할 수 있게 함"""
+        key = self.key_func(url)
+        with self._lock:
+            self._processed.discard(key)
+
+    def clear(self):
+        """대기 중인 작업과 처리 기록을 모두 비움"""
+        with self._lock:
+            for lane in self._lanes.values():
+                lane.clear()
+            self._pending.clear()
+            self._processed.clear()
+
+
+class DownloadWorkerPool:
+    """N개의 워커 스레드가 하나의 다운로드 큐를 동시에 비우는 다운로드 엔진
+
+    get_next_job()은 DownloadJob 또는 None을, run_job(job, backend)은 성공 여부를 반환합니다.
+    backend_factory가 주어지면 워커마다 백엔드를 하나씩 만들어 모든 작업에 재사용하고,
+    워커가 끝날 때 close()를 호출합니다. (없으면 backend는 None)
+    stop_event가 설정되면 모든 워커가 새 작업을 받지 않고 종료합니다.
+    실행 중인 프로세스를 끊는 것은 run_job 쪽에서 stop_event를 보고 처리합니다.
+    """
+
+    def __init__(self, max_workers, get_next_job, run_job, stop_event,
+                 on_job_start=None, on_job_finish=None, refill_queue=None, idle_wait=0.5,
+                 backend_factory=None, has_deferred_work=None):
+        self.max_workers = max(1, int(max_workers))
+        self.get_next_job = get_next_job
+        self.run_job = run_job
+        self.stop_event = stop_event
+        self.on_job_start = on_job_start
+        self.on_job_finish = on_job_finish
+        self.refill_queue = refill_queue
+        self.idle_wait = idle_wait
+        self.backend_factory = backend_factory
+        self.has_deferred_work = has_deferred_work  # 나중에 큐에 들어올 작업이 있는지 (재시도 대기 등)
+
+        self.successful = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.active_jobs = 0
+        self._fetching = 0  # get_next_job() 실행 중인 워커 수 (재생목록 펼치기 등)
+        self._lock = Lock()
+        self._workers = []
+
+    def stats(self):
+        """(성공, 실패, 진행 중) 개수를 반환"""
+        with self._lock:
+            return self.successful, self.failed, self.active_jobs
+
+    def run(self):
+        """워커들을 시작하고 큐가 빌 때까지 기다린 뒤 (성공, 실패) 개수를 반환"""
+        for index in range(self.max_workers):
+            worker = Thread(target=self._worker_loop, name=f"download-worker-{index + 1}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+        for worker in self._workers:
+            worker.join()
+
+        return self.successful, self.failed
+
+    def _fetch_job(self):
+        with self._lock:
+            self._fetching += 1
+        try:
+            return self.get_next_job()
+        finally:
+            with self._lock:
+                self._fetching -= 1
+
+    def _take_job(self):
+        """큐에서 다음 작업을 꺼냄. 비어 있으면 잠시 기다렸다가 다시 확인"""
+        while not self.stop_event.is_set():
+            job = self._fetch_job()
+            if job is not None:
+                return job
+
+            # 큐가 비어있으면 잠시 대기 후 새로운 URL 확인
+            if self.stop_event.wait(self.idle_wait):
+                return None
+            if self.refill_queue:
+                self.refill_queue()
+            job = self._fetch_job()
+            if job is not None:
+                return job
+
+            # 다른 워커가 아직 다운로드 중이거나 작업을 가져오는 중(재생목록 펼치기 등)이면
+            # 그동안 추가되는 URL을 기다림
+            with self._lock:
+                idle = self.active_jobs == 0 and self._fetching == 0
+            if idle and not (self.has_deferred_work and self.has_deferred_work()):
+                return None
+        return None
+
+    def _worker_loop(self):
+        backend = None
+        try:
+            while True:
+                job = self._take_job()
+                if job is None:
+                    break
+
+                # 백엔드는 첫 작업을 받을 때 만들어 이후 작업에 계속 재사용
+                if backend is None and self.backend_factory:
+                    backend = self.backend_factory()
+                self._run_one(job, backend)
+        finally:
+            if backend is not None:
+                backend.close()
+
+    def _run_one(self, job, backend):
+        with self._lock:
+            self.active_jobs += 1
+        if self.on_job_start:
+            self.on_job_start(job)
+
+        success = False
+        try:
+            success = self.run_job(job, backend)
+        finally:
+            with self._lock:
+                self.active_jobs -= 1
+                if success:
+                    self.successful += 1
+                elif self.stop_event.is_set():
+                    self.cancelled += 1
+                else:
+                    self.failed += 1
+            if self.on_job_finish:
+                self.on_job_finish(job, success)
+
+
+PRIORITY_WEIGHTS = {PRIORITY_HIGH: 4, PRIORITY_NORMAL: 2, PRIORITY_LOW: 1}  # 대역폭을 나눌 때의 비중
+
+
+class BandwidthScheduler:
+    """전체 대역폭 한도를 다운로드 중인 작업들에 우선순위 비중대로 나눠 주는 스케줄러
+
+    작업이 시작하거나 끝날 때, 한도나 우선순위가 바뀔 때마다 몫을 다시 계산해
+    바뀐 작업의 apply(rate) 콜백을 호출합니다. (rate가 None이면 제한 없음)
+    job_rate_limit를 넘는 몫은 그 한도로 자르고 남는 만큼을 다른 작업에 다시 나눕니다.
+
+    apply가 없는 작업(실행 중에 제한을 바꿀 수 없는 백엔드)은 시작할 때 전체 한도를 동시 작업
+    슬롯 수(slots)로 나눈 몫에 우선순위 비중을 곱한 만큼(다른 고정 작업이 쓰고 남은 한도 안에서)을
+    받고 끝날 때까지 유지합니다. 이런 작업은 우선순위를 바꿀 수 없습니다 (set_priority()가 False).
+    """
+
+    def __init__(self, total_rate=None, job_rate_limit=None, slots=1):
+        self.total_rate = total_rate
+        self.job_rate_limit = job_rate_limit
+        self.slots = slots
+        self._jobs = {}  # job_id -> {'priority', 'apply', 'rate'}
+        self._lock = Lock()
+
+    def configure(self, total_rate=None, job_rate_limit=None, slots=None):
+        """전체 한도와 작업당 한도(slots를 주면 동시 작업 수도)를 바꾸고 실행 중인 작업들의 몫을 다시 나눔"""
+        with self._lock:
+            self.total_rate = total_rate
+            self.job_rate_limit = job_rate_limit
+            if slots is not None:
+                self.slots = max(1, slots)
+            changes = self._rebalance()
+        self._apply(changes)
+
+    def add(self, job_id, priority=PRIORITY_NORMAL, apply=None):
+        """작업을 등록하고 그 작업이 받을 속도 제한을 반환"""
+        with self._lock:
+            self._jobs[job_id] = {'priority': priority, 'apply': apply, 'rate': None}
+            changes = self._rebalance(force=job_id)
+            rate = self._jobs[job_id]['rate']
+        self._apply(changes)
+        return rate
+
+    def remove(self, job_id):
+        with self._lock:
+            if self._jobs.pop(job_id, None) is None:
+                return
+            changes = self._rebalance()
+        self._apply(changes)
+
+    def set_priority(self, job_id, priority):
+        """실행 중인 작업의 우선순위를 바꿈. 그런 작업이 없거나 제한을 바꿀 수 없는 작업이면 False"""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry['apply'] is None:
+                return False
+            entry['priority'] = priority
+            changes = self._rebalance()
+        self._apply(changes)
+        return True
+
+    def rate(self, job_id):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            return entry['rate'] if entry else None
+
+    def rates(self):
+        """job_id -> 현재 속도 제한"""
+        with self._lock:
+            return {job_id: entry['rate'] for job_id, entry in self._jobs.items()}
+
+    def _split(self, force=None):
+        """바꿀 수 있는 작업들(과 막 시작한 고정 작업 force)의 몫 계산
+
+        제한이 고정된 작업의 몫을 뺀 나머지를 비중대로 나누고, 작업당 한도를 넘는 작업은
+        한도로 고정한 뒤 남는 만큼을 다시 나눕니다.
+        """
+        cap = self.job_rate_limit
+        fixed = {job_id: entry['rate'] for job_id, entry in self._jobs.items()
+                 if entry['apply'] is None and job_id != force}
+        adjustable = {job_id: entry for job_id, entry in self._jobs.items()
+                      if job_id not in fixed and entry['apply'] is not None}
+        rates = {}
+        if force is not None and self._jobs[force]['apply'] is None:
+            rates[force] = self._fixed_share(force, fixed)
+            fixed[force] = rates[force]
+        if not self.total_rate:
+            rates.update((job_id, cap) for job_id in adjustable)
+            return rates
+
+        remaining = self.total_rate - sum(rate or 0 for rate in fixed.values())
+        weights = {job_id: PRIORITY_WEIGHTS.get(entry['priority'], 1) for job_id, entry in adjustable.items()}
+        while weights:
+            weight_sum = sum(weights.values())
+            capped = [job_id for job_id, weight in weights.items() if cap and remaining * weight / weight_sum >= cap]
+            if not capped:
+                for job_id, weight in weights.items():
+                    rates[job_id] = max(MIN_JOB_RATE, int(remaining * weight / weight_sum))
+                break
+            for job_id in capped:
+                rates[job_id] = cap
+                remaining -= cap
+                del weights[job_id]
+        return rates
+
+    def _fixed_share(self, job_id, fixed):
+        """제한을 바꿀 수 없는 작업이 시작할 때 받을 몫: 슬롯 하나의 몫 × 우선순위 비중 (남은 한도 안에서)"""
+        cap = self.job_rate_limit
+        if not self.total_rate:
+            return cap
+        weight = PRIORITY_WEIGHTS.get(self._jobs[job_id]['priority'], 1) / PRIORITY_WEIGHTS[PRIORITY_NORMAL]
+        share = self.total_rate * weight / self.slots
+        available = self.total_rate - sum(rate or 0 for rate in fixed.values())
+        rate = max(MIN_JOB_RATE, int(min(share, available)))
+        return min(rate, cap) if cap else rate
+
+    def _rebalance(self, force=None):
+        """몫을 다시 계산해 저장하고, 알려야 할 (apply, rate) 목록을 반환 (잠금을 잡은 상태에서 호출)"""
+        changes = []
+        for job_id, rate in self._split(force).items():
+            entry = self._jobs[job_id]
+            if entry['rate'] != rate or job_id == force:
+                entry['rate'] = rate
+                if entry['apply'] is not None:
+                    changes.append((entry['apply'], rate))
+        return changes
+
+    @staticmethod
+    def _apply(changes):
+        for apply, rate in changes:
+            apply(rate)
+
+
+# --- 실패 분류 ---
+FAILURE_THROTTLED = "throttled"  # 요청 제한: 재시도하고 모든 워커를 잠시 멈춤
+FAILURE_TRANSIENT = "transient"  # 네트워크/서버 오류: 재시도
+FAILURE_PERMANENT = "permanent"  # 비공개/삭제된 영상 등: 재시도해도 소용없음
+FAILURE_UNKNOWN = "unknown"      # 알 수 없음: 일시적인 오류처럼 재시도
+
+_FAILURE_PATTERNS = (  # (종류, 설명, 정규식) - 위에서부터 먼저 맞는 것을 사용
+    (FAILURE_THROTTLED, "요청 제한", re.compile(
+        r"HTTP Error 429|Too Many Requests|rate[- ]limit|confirm you.re not a bot", re.I)),
+    (FAILURE_PERMANENT, "영상을 받을 수 없음", re.compile(
+        r"Private video|Video unavailable|has been removed|account .* terminated|members[- ]only|"
+        r"copyright|not available in your country|confirm your age|Unsupported URL|"
+        r"Requested format is not available|Incomplete YouTube ID", re.I)),
+    (FAILURE_TRANSIENT, "일시적인 네트워크/서버 오류", re.compile(
+        r"HTTP Error (?:403|5\d\d)|Connection (?:reset|refused|aborted)|timed? ?out|"
+        r"Temporary failure|Name or service not known|getaddrinfo|IncompleteRead|"
+        r"Unable to download|Got error|ConnectionError|SSL|EOF occurred", re.I)),
+)
+
+
+def classify_failure(messages):
+    """실패한 작업의 오류 메시지들로 (실패 종류, 설명)을 반환"""
+    text = '\n'.join(messages)
+    for kind, reason, pattern in _FAILURE_PATTERNS:
+        if pattern.search(text):
+            return kind, reason
+    return FAILURE_UNKNOWN, "알 수 없는 오류"
+
+
+class RetryPolicy:
+    """지수 백오프 + 지터로 재시도 대기 시간을 정함"""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                 max_delay=MAX_RETRY_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """attempt번째 재시도 전 대기 시간 (초). 절반은 고정, 절반은 무작위로 흩어 동시에 몰리지 않게 함"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """요청 제한을 만나면 일정 시간 동안 새 작업을 막는 회로 차단기
+
+    연달아 걸릴수록 차단 시간을 두 배로 늘리고(max_cooldown까지), 다운로드가 하나라도
+    성공하면 처음 값으로 되돌립니다.
+    """
+
+    def __init__(self, cooldown=THROTTLE_COOLDOWN, max_cooldown=MAX_THROTTLE_COOLDOWN):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._open_until = 0.0
+        self._trips = 0
+        self._lock = Lock()
+
+    def trip(self):
+        """차단 시작 (이미 차단 중이면 연장하지 않음). 차단 시간(초)을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._open_until:
+                return self._open_until - now
+            duration = min(self.max_cooldown, self.cooldown * 2 ** self._trips)
+            self._trips += 1
+            self._open_until = now + duration
+            return duration
+
+    def remaining(self):
+        """차단이 풀릴 때까지 남은 시간 (초, 차단 중이 아니면 0)"""
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic())
+
+    def is_open(self):
+        return self.remaining() > 0
+
+    def record_success(self):
+        with self._lock:
+            self._trips = 0
+
+    def reset(self):
+        with self._lock:
+            self._open_until = 0.0
+            self._trips = 0
+
+
+def _external_downloader_args(connections):
+    """aria2c가 파일 하나를 connections개 연결로 나눠 받도록 하는 인자"""
+    return ['-x', str(connections), '-s', str(connections), '-k', '1M']
+
+
+def infer_log_level(message):
+    """수준이 지정되지 않은 메시지의 수준을 앞부분 표시로 추정"""
+    if message.startswith(("❌", "[오류]")):
+        return "error"
+    if message.startswith("⚠️"):
+        return "warning"
+    return "info"
+
+
+def find_yt_dlp():
+    """실행 환경에 맞는 yt-dlp 실행 파일 경로를 반환"""
+    if getattr(sys, 'frozen', False):
+        # Running in a PyInstaller bundle (frozen)
+        if hasattr(sys, '_MEIPASS'):
+            # This is a one-file build, files are in the temp _MEIPASS dir
+            base_path = sys._MEIPASS
+        else:
+            # This is a one-folder build, files are relative to the executable
+            base_path = os.path.dirname(sys.executable)
+
+        # Based on the build, yt-dlp.exe seems to be in an '_internal' folder
+        # Let's check there first.
+        internal_path = os.path.join(base_path, '_internal', 'yt-dlp.exe')
+        if os.path.exists(internal_path):
+            return internal_path
+
+        # As a fallback, check the base path directly. This is the expected
+        # location for one-file builds and some one-folder configurations.
+        return os.path.join(base_path, 'yt-dlp.exe')
+
+    # Running in a normal Python environment
+    # Assumes yt-dlp.exe is in the project root, otherwise look it up on PATH (servers)
+    if os.path.exists('yt-dlp.exe'):
+        return 'yt-dlp.exe'
+    return shutil.which('yt-dlp') or 'yt-dlp.exe'
+
+
+PROCESS_LINE_LIMIT = 1024 * 1024  # 파이프에서 한 줄로 읽을 최대 길이 (asyncio 기본값 64KiB보다 넉넉히)
+PIPE_DRAIN_TIMEOUT = 1.0  # 프로세스가 끝난 뒤 남은 출력을 마저 읽는 최대 시간 (손자 프로세스가 파이프를 물려받은 경우)
+PROCESS_CLOSE_TIMEOUT = 3.0  # close() 때 종료한 프로세스가 정리되기를 기다리는 최대 시간
+
+
+class ProcessSupervisor:
+    """모든 자식 프로세스의 파이프와 종료를 asyncio 이벤트 루프 스레드 하나에서 감시
+
+    워커 스레드는 run()을 호출하고 프로세스가 끝날 때까지 블로킹으로 기다립니다 (폴링 없음).
+    출력 줄은 루프 스레드에서 handler로 넘어오므로 작업마다 읽기 스레드를 만들지 않으며,
+    동시 다운로드가 몇 개든 추가 스레드는 이 루프 하나뿐입니다. 키는 (group, job_id) 튜플이고
+    terminate()/terminate_all()은 어느 스레드에서나 부를 수 있습니다.
+
+    asyncio는 불러오는 데 오래 걸리므로 모듈 맨 위가 아니라 처음 프로세스를 실행할 때 불러옵니다
+    (UI는 시작할 때 이 모듈을 불러오지만 다운로드 전에는 asyncio가 필요 없음).
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._processes = {}  # (group, job_id) -> [asyncio.subprocess.Process, ...] (루프 스레드에서만 변경)
+        self._lock = Lock()
+
+    def _ensure_loop(self):
+        import asyncio
+        with self._lock:
+            if self._loop is None:
+                # Windows 기본 루프(Proactor)도 서브프로세스를 지원함
+                self._loop = asyncio.new_event_loop()
+                self._thread = Thread(target=self._loop.run_forever, name="process-supervisor", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, key, stages, pipe=False, cancel_event=None):
+        """stages의 명령을 모두 실행하고 끝나면 종료 코드 목록을 반환 (호출한 스레드는 끝날 때까지 대기)
+
+        stage는 {'command': [...], 'stdout': handler, 'stderr': handler, 'kwargs': {Popen 인자}} dict이며,
+        handler(line)은 줄 끝을 뗀 문자열로 루프 스레드에서 호출됩니다 (생략하면 출력을 버림).
+        stage에 'read_all': True를 넣으면 stdout handler는 줄 단위 대신 전체 출력으로 한 번만 호출됩니다.
+        pipe=True면 첫 명령의 표준 출력을 두 번째 명령의 표준 입력으로 바로 연결합니다.
+        cancel_event가 이미 설정되어 있으면 시작하자마자 종료합니다. 실행하지 못하면 OSError를 던집니다.
+        """
+        import asyncio
+        coroutine = self._run(key, stages, pipe, cancel_event)
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def terminate(self, key):
+        """key로 실행 중인 프로세스들을 종료 (run()은 프로세스가 끝나는 즉시 반환)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._terminate, lambda k: k == key)
+
+    def terminate_all(self, group=None):
+        """group(생략하면 전체)의 실행 중인 프로세스를 모두 종료"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._terminate, lambda k: group is None or k[0] == group)
+
+    def close(self):
+        """이벤트 루프 스레드 종료
+
+        아직 끝나지 않은 run()(영상 정보 미리 가져오기 등)은 프로세스를 종료해 끝내고, 그래도 끝나지 않으면
+        취소하므로 기다리던 스레드에는 concurrent.futures.CancelledError가 전달됩니다.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            import asyncio
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            self._terminate(lambda key: True)
+            tasks = asyncio.all_tasks(loop)
+            if tasks:
+                # 종료한 프로세스가 정리될 때까지 잠시 기다리고, 그래도 남은 작업은 취소
+                _, pending = loop.run_until_complete(asyncio.wait(tasks, timeout=PROCESS_CLOSE_TIMEOUT))
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+    def _terminate(self, matches):
+        for key, processes in list(self._processes.items()):
+            if matches(key):
+                for process in processes:
+                    if process.returncode is None:
+                        try:
+                            process.terminate()
+                        except ProcessLookupError:
+                            pass
+
+    async def _spawn(self, stages, pipe):
+        import asyncio
+        processes = []
+        read_fd = write_fd = None
+        if pipe:
+            read_fd, write_fd = os.pipe()
+        try:
+            for index, stage in enumerate(stages):
+                if pipe and index == 0:
+                    stdout = write_fd
+                else:
+                    stdout = asyncio.subprocess.PIPE if stage.get('stdout') else asyncio.subprocess.DEVNULL
+                processes.append(await asyncio.create_subprocess_exec(
+                    *stage['command'],
+                    stdin=read_fd if pipe and index == 1 else None,
+                    stdout=stdout,
+                    stderr=asyncio.subprocess.PIPE if stage.get('stderr') else asyncio.subprocess.DEVNULL,
+                    limit=PROCESS_LINE_LIMIT,
+                    **stage.get('kwargs', {}),
+                ))
+        except BaseException:
+            for process in processes:
+                process.kill()
+                await process.wait()
+            raise
+        finally:
+            # 파이프 양 끝은 자식들이 물려받았으므로 이쪽은 닫음 (ffmpeg가 먼저 끝나면 yt-dlp가 쓰기 오류로 멈춤)
+            for fd in (read_fd, write_fd):
+                if fd is not None:
+                    os.close(fd)
+        return processes
+
+    async def _run(self, key, stages, pipe, cancel_event):
+        import asyncio
+        processes = await self._spawn(stages, pipe)
+        self._processes[key] = processes
+        if cancel_event is not None and cancel_event.is_set():
+            # 중단 요청(terminate_all)이 등록보다 먼저 처리된 경우
+            self._terminate(lambda k: k == key)
+        try:
+            readers = []
+            for process, stage in zip(processes, stages):
+                stdout_reader = self._read_all if stage.get('read_all') else self._pump
+                for stream, handler, reader in ((process.stdout, stage.get('stdout'), stdout_reader),
+                                                (process.stderr, stage.get('stderr'), self._pump)):
+                    if stream is not None and handler:
+                        readers.append(asyncio.ensure_future(reader(stream, handler)))
+            return_codes = [await process.wait() for process in processes]
+            if readers:
+                done, pending = await asyncio.wait(readers, timeout=PIPE_DRAIN_TIMEOUT)
+                for reader in pending:
+                    reader.cancel()
+                for reader in done:
+                    reader.result()  # handler에서 난 예외를 호출한 쪽으로 전달
+            return return_codes
+        finally:
+            self._processes.pop(key, None)
+
+    @staticmethod
+    async def _read_all(stream, handler):
+        handler((await stream.read()).decode('utf-8', errors='replace'))
+
+    @staticmethod
+    async def _pump(stream, handler):
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                continue  # PROCESS_LINE_LIMIT보다 긴 줄은 건너뜀
+            if not line:
+                break
+            handler(line.decode('utf-8', errors='replace').rstrip('\r\n'))
+
+
+class SubprocessDownloader:
+    """URL마다 yt-dlp 실행 파일을 띄워 다운로드하는 백엔드 (모든 워커가 함께 사용)
+
+    진행률은 --progress-template으로 받은 JSON 줄(build_progress_template 참고)을 디코딩합니다.
+    프로세스 실행과 출력 읽기는 ProcessSupervisor가 맡으며 terminate_all()로 한 번에 끊을 수 있습니다.
+
+    stream_ffmpeg_path를 주면 mp3 품질에서 음성 스트림을 파일로 받지 않고 yt-dlp 표준 출력에서
+    ffmpeg로 바로 흘려 mp3만 씁니다 (작업당 디스크 사용량 ≈ 결과 파일 크기).
+    이 경우 원본 .part 파일이 없으므로 중단된 작업은 처음부터 다시 받습니다.
+    """
+
+    def __init__(self, yt_dlp_path, output_path, quality, stop_event, on_progress=None, on_log=None,
+                 concurrent_fragments=DEFAULT_CONCURRENT_FRAGMENTS, external_downloader=None,
+                 extract_audio=True, on_output_file=None, stream_ffmpeg_path=None, nice=DEFAULT_POSTPROCESS_NICE,
+                 supervisor=None):
+        self.yt_dlp_path = yt_dlp_path
+        self.output_path = output_path
+        self.quality = quality
+        self.concurrent_fragments = concurrent_fragments
+        self.external_downloader = external_downloader
+        self.extract_audio = extract_audio  # False면 음성 원본만 받고 mp3 변환은 후처리 풀에 맡김
+        self.stop_event = stop_event
+        self.on_progress = on_progress  # (make_progress()로 만든 진행률 dict)
+        self.on_log = on_log  # (message, level=..., job_id=...)
+        self.on_output_file = on_output_file  # (job_id, 최종 파일 경로)
+        self.stream_ffmpeg_path = stream_ffmpeg_path if quality == MP3_QUALITY else None
+        self.nice = nice  # 스트리밍 변환용 ffmpeg의 nice 값
+        self.supervisor = supervisor if supervisor is not None else ProcessSupervisor()
+        self._interrupted = set()  # 일시정지/취소로 끊은 job_id (오류로 기록하지 않음)
+        self._lock = Lock()
+
+    def log(self, message, level="info", job_id=None):
+        if self.on_log:
+            self.on_log(message, level=level, job_id=job_id)
+
+    def _build_command(self, job_id, url, rate_limit=None, info_path=None):
+        command = [
+            self.yt_dlp_path,
+            '--progress',
+            '--newline', # 진행률을 덮어쓰지 않고 한 줄씩 출력
+            '--progress-template', build_progress_template(job_id),
+            '-o', os.path.join(self.output_path, '%(uploader)s - %(title)s.%(ext)s'),
+            '--no-warnings',
+            '--encoding', 'utf-8', # Ensure output is utf-8
+            '--no-check-certificate', # SSL 인증서 검증 비활성화
+            '--continue', # 남아 있는 .part 파일이 있으면 이어받기
+            '--no-playlist', # 재생목록은 미리 개별 영상으로 펼쳐서 큐에 넣음
+            '--concurrent-fragments', str(self.concurrent_fragments), # DASH/HLS 조각을 동시에 받음
+            # 최종 파일 경로를 알려줌 (--print는 quiet/simulate를 켜므로 다시 끔)
+            '--print', f'after_move:{OUTPUT_FILE_PREFIX}%(filepath)s', '--no-simulate', '--no-quiet',
+        ]
+        if rate_limit:
+            command.extend(['--limit-rate', str(int(rate_limit))])
+        if self.external_downloader:
+            command.extend(['--downloader', self.external_downloader,
+                            '--downloader-args', f"{self.external_downloader}:"
+                                                 f"{' '.join(_external_downloader_args(self.concurrent_fragments))}"])
+
+        # Format selection
+        if self.quality == MP3_QUALITY and self.extract_audio:
+            command.extend(['-x', '--audio-format', 'mp3', '--audio-quality', '192'])
+        else:
+            command.extend(['-f', self.quality])
+
+        command.extend(_source_args(url, info_path))
+        return command
+
+    def download(self, job_id, url, rate_limit=None, info_path=None):
+        """URL 하나를 다운로드하고 성공 여부를 반환
+
+        rate_limit은 바이트/초(실행 중에는 바꿀 수 없음), info_path는 캐시된 info JSON 경로입니다.
+        """
+        if self.stream_ffmpeg_path:
+            return self._download_streaming(job_id, url, rate_limit, info_path)
+        stage = {
+            'command': self._build_command(job_id, url, rate_limit, info_path),
+            'stdout': lambda line: self._on_output_line(job_id, line),
+            'stderr': lambda line: self._on_error_line(job_id, line),
+            'kwargs': {'creationflags': _NO_WINDOW},
+        }
+        try:
+            return_code, = self.supervisor.run(('download', job_id), [stage], cancel_event=self.stop_event)
+        except Exception as e:
+            self.log(f"❌ 치명적인 오류 발생: {e}", level="error", job_id=job_id)
+            import traceback
+            self.log(traceback.format_exc(), level="error", job_id=job_id)
+            return False
+
+        if self._was_interrupted(job_id) or self.stop_event.is_set():
+            return False
+
+        if return_code == 0:
+            # 마지막 진행률 줄을 놓쳤을 수 있으므로 완료 상태를 직접 알림
+            if self.on_progress:
+                self.on_progress(make_progress(job_id, {'status': 'finished'}))
+            return True
+        else:
+            self.log(f"❌ 다운로드 오류 발생 (종료 코드: {return_code})", level="error", job_id=job_id)
+            return False
+
+    def terminate_all(self):
+        """실행 중인 모든 yt-dlp (스트리밍 변환 ffmpeg, 영상 정보 가져오기 포함) 프로세스 종료"""
+        self.supervisor.terminate_all('download')
+        self.supervisor.terminate_all('prefetch')
+
+    def interrupt(self, job_id):
+        """작업 하나의 프로세스만 종료. 일반 다운로드는 .part 파일이 남아 다음 실행 때 --continue로 이어받음"""
+        with self._lock:
+            self._interrupted.add(job_id)
+        self.supervisor.terminate(('download', job_id))
+
+    def _was_interrupted(self, job_id):
+        """interrupt()로 끊긴 작업인지 확인하고 표시를 지움"""
+        with self._lock:
+            if job_id in self._interrupted:
+                self._interrupted.discard(job_id)
+                return True
+        return False
+
+    def _is_interrupting(self, job_id):
+        with self._lock:
+            return job_id in self._interrupted
+
+    def _on_output_line(self, job_id, line):
+        """yt-dlp 표준 출력 한 줄 (진행률 JSON, 최종 파일 경로, 일반 로그)"""
+        line = line.strip()
+        if not line:
+            return
+        if line.startswith(OUTPUT_FILE_PREFIX):
+            if self.on_output_file:
+                self.on_output_file(job_id, line[len(OUTPUT_FILE_PREFIX):])
+            return
+        status = decode_progress_line(line)
+        if status is None:
+            # Regular log message from yt-dlp
+            self.log(f"[yt-dlp #{job_id}] {line}", job_id=job_id)
+        elif self.on_progress:
+            self.on_progress(make_progress(job_id, status))
+
+    def extract_info(self, url):
+        """yt-dlp -J로 영상 정보(info dict)를 가져옴 (다운로드하지 않음)
+
+        프로세스는 ('prefetch', URL 키)로 감시하므로 terminate_all()이나 cancel_prefetch()로 끊을 수 있고,
+        PREFETCH_TIMEOUT이 지나도 끝나지 않으면 종료합니다.
+        """
+        command = [self.yt_dlp_path, '-J', '--no-playlist', '--no-warnings', '--encoding', 'utf-8',
+                   '--no-check-certificate', '-f', self.quality, url]
+        key = ('prefetch', canonical_url_key(url))
+        output, errors = [], []
+        stage = {'command': command, 'stdout': output.append, 'read_all': True, 'stderr': errors.append,
+                 'kwargs': {'creationflags': _NO_WINDOW}}
+        timer = Timer(PREFETCH_TIMEOUT, self.supervisor.terminate, args=(key,))
+        timer.daemon = True
+        timer.start()
+        try:
+            return_code, = self.supervisor.run(key, [stage], cancel_event=self.stop_event)
+        finally:
+            timer.cancel()
+        if return_code != 0:
+            messages = [line for line in errors if line.strip()]
+            raise RuntimeError(messages[-1] if messages else f"종료 코드 {return_code}")
+        return json.loads(output[0])
+
+    def cancel_prefetch(self, url):
+        """url의 영상 정보를 가져오는 중이면 그 프로세스를 종료"""
+        self.supervisor.terminate(('prefetch', canonical_url_key(url)))
+
+    def _build_stream_commands(self, job_id, url, rate_limit, temp_path, info_path=None):
+        """(yt-dlp 명령, ffmpeg 명령): yt-dlp가 표준 출력으로 보낸 음성 스트림을 ffmpeg가 mp3로 씀"""
+        download_command = [
+            self.yt_dlp_path,
+            '--progress',
+            '--newline',
+            '--progress-template', build_progress_template(job_id),
+            # -o -이면 로그, 진행률, --print 출력이 모두 표준 오류로 나옴. %(...)S는 파일 이름으로 쓸 수 있게 정리
+            '--print', f'before_dl:{OUTPUT_FILE_PREFIX}%(uploader)S - %(title)S', '--no-simulate', '--no-quiet',
+            '-o', '-',
+            '--no-warnings',
+            '--encoding', 'utf-8',
+            '--no-check-certificate',
+            '--no-playlist',
+            '--concurrent-fragments', str(self.concurrent_fragments),
+            '-f', self.quality,
+        ]
+        if rate_limit:
+            download_command.extend(['--limit-rate', str(int(rate_limit))])
+        download_command.extend(_source_args(url, info_path))
+        return download_command, _mp3_encode_command(self.stream_ffmpeg_path, 'pipe:0', temp_path)
+
+    def _download_streaming(self, job_id, url, rate_limit, info_path=None):
+        """yt-dlp | ffmpeg 파이프로 mp3만 디스크에 쓰고 성공 여부를 반환"""
+        temp_path = os.path.join(self.output_path, f".stream-{job_id}.mp3.part")
+        download_command, encode_command = self._build_stream_commands(job_id, url, rate_limit, temp_path, info_path)
+        output_names = []  # yt-dlp가 알려준 파일 이름 (확장자 제외)
+        stages = [
+            {'command': download_command, 'stderr': lambda line: self._on_stream_log_line(job_id, line, output_names),
+             'kwargs': {'creationflags': _NO_WINDOW}},
+            {'command': encode_command, 'stderr': lambda line: self._on_error_line(job_id, line),
+             'kwargs': _low_priority_popen_kwargs(self.nice)},
+        ]
+        try:
+            download_code, encode_code = self.supervisor.run(('download', job_id), stages, pipe=True,
+                                                             cancel_event=self.stop_event)
+            interrupted = self._was_interrupted(job_id)
+            if interrupted or self.stop_event.is_set() or download_code != 0 or encode_code != 0:
+                # 스트리밍 모드는 원본 .part가 없으므로 멈춘 작업은 처음부터 다시 받음
+                _remove_quietly(temp_path)
+                if not (interrupted or self.stop_event.is_set()):
+                    self.log(f"❌ 스트리밍 변환 오류 (yt-dlp: {download_code}, ffmpeg: {encode_code})",
+                             level="error", job_id=job_id)
+                return False
+
+            output_path = os.path.join(self.output_path, f"{output_names[-1] if output_names else job_id}.mp3")
+            os.replace(temp_path, output_path)
+            if self.on_output_file:
+                self.on_output_file(job_id, output_path)
+            if self.on_progress:
+                self.on_progress(make_progress(job_id, {'status': 'finished'}))
+            return True
+
+        except Exception as e:
+            _remove_quietly(temp_path)
+            self.log(f"❌ 치명적인 오류 발생: {e}", level="error", job_id=job_id)
+            return False
+
+    def _on_stream_log_line(self, job_id, line, output_names):
+        """스트리밍 모드의 yt-dlp 표준 오류 한 줄 (로그, 진행률, 파일 이름이 섞여 나옴)"""
+        line = line.strip()
+        if not line:
+            return
+        if line.startswith(OUTPUT_FILE_PREFIX):
+            output_names.append(line[len(OUTPUT_FILE_PREFIX):])
+            return
+        status = decode_progress_line(line)
+        if status is not None:
+            if self.on_progress:
+                self.on_progress(make_progress(job_id, status))
+        elif line.startswith('ERROR'):
+            self.log(f"[오류] {line}", level="error", job_id=job_id)
+        else:
+            self.log(f"[yt-dlp #{job_id}] {line}", job_id=job_id)
+
+    def _on_error_line(self, job_id, line):
+        if not (self.stop_event.is_set() or self._is_interrupting(job_id)):
+            self.log(f"[오류] {line.strip()}", level="error", job_id=job_id)
+
+
+def _source_args(url, info_path):
+    """yt-dlp에 넘길 다운로드 대상: 캐시된 info JSON이 있으면 추출을 건너뛰고 그 정보로 시작"""
+    if info_path:
+        return ['--load-info-json', info_path]
+    return [url]
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _mp3_encode_command(ffmpeg_path, source, target):
+    """source(파일 경로 또는 pipe:0)를 target에 mp3로 쓰는 ffmpeg 명령"""
+    return [
+        ffmpeg_path, '-y', '-nostdin', '-loglevel', 'error',
+        '-i', source,
+        '-vn', '-codec:a', 'libmp3lame', '-b:a', MP3_BITRATE,
+        '-f', 'mp3', target,
+    ]
+
+
+def _low_priority_popen_kwargs(nice):
+    """nice 값만큼 낮은 CPU 우선순위로 자식 프로세스를 띄우는 Popen 인자"""
+    if nice <= 0:
+        return {'creationflags': _NO_WINDOW}
+    if os.name == 'nt':
+        return {'creationflags': _NO_WINDOW | getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0)}
+    return {'preexec_fn': lambda: os.nice(nice)}
+
+
+class PostProcessPool:
+    """다운로드가 끝난 음성 파일을 mp3로 변환하는 CPU 전용 작업 풀
+
+    네트워크 워커는 받은 파일을 submit()으로 넘기고 곧바로 다음 다운로드를 시작하므로
+    변환과 다음 다운로드가 겹쳐 진행됩니다. 변환 스레드 수는 CPU 코어 수, 대기열은
+    max_pending개로 제한하며 대기열이 가득 차면 submit()이 자리가 날 때까지 기다립니다.
+    ffmpeg는 nice 값만큼 낮은 우선순위로 실행해 UI와 다운로드를 방해하지 않습니다.
+    on_done(job, success, output_path)은 변환 스레드에서 호출됩니다.
+    """
+
+    def __init__(self, ffmpeg_path, stop_event, workers=None, nice=DEFAULT_POSTPROCESS_NICE,
+                 max_pending=None, on_done=None, on_log=None, supervisor=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.stop_event = stop_event
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.nice = nice
+        self.on_done = on_done
+        self.on_log = on_log  # (message, level=..., job_id=...)
+        self._queue = queue.Queue(maxsize=max_pending or self.workers * 2)
+        self._threads = []
+        self.supervisor = supervisor if supervisor is not None else ProcessSupervisor()
+
+    def log(self, message, level="info", job_id=None):
+        if self.on_log:
+            self.on_log(message, level=level, job_id=job_id)
+
+    def start(self):
+        for index in range(self.workers):
+            thread = Thread(target=self._worker_loop, name=f"postprocess-worker-{index + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, job, source_path):
+        """변환할 파일을 넘김. 대기열이 가득 차면 자리가 날 때까지 기다림 (중단되면 False)"""
+        while not self.stop_event.is_set():
+            try:
+                self._queue.put((job, source_path), timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def join(self):
+        """넘겨받은 파일을 모두 변환(또는 중단)할 때까지 기다린 뒤 변환 스레드 종료"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def terminate_all(self):
+        """실행 중인 ffmpeg 프로세스 종료"""
+        self.supervisor.terminate_all('mp3')
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job, source_path = item
+            if self.stop_event.is_set():
+                # 받은 원본은 남겨 두고 다음 실행 때 다시 변환
+                if self.on_done:
+                    self.on_done(job, False, None)
+                continue
+            success, output_path = self._convert(job, source_path)
+            if self.on_done:
+                self.on_done(job, success, output_path)
+
+    def _convert(self, job, source_path):
+        """source_path를 같은 이름의 mp3로 변환하고 원본을 지움. (성공 여부, mp3 경로)를 반환"""
+        output_path = os.path.splitext(source_path)[0] + '.mp3'
+        if os.path.normcase(output_path) == os.path.normcase(source_path):
+            return True, output_path  # 이미 mp3로 받음
+        temp_path = f"{output_path}.part"
+        command = _mp3_encode_command(self.ffmpeg_path, source_path, temp_path)
+        self.log(f"🎵 [{job.job_id}] mp3 변환 시작: {os.path.basename(source_path)}", job_id=job.job_id)
+        errors = []
+        stage = {'command': command, 'stderr': errors.append, 'kwargs': _low_priority_popen_kwargs(self.nice)}
+        try:
+            return_code, = self.supervisor.run(('mp3', job.job_id), [stage], cancel_event=self.stop_event)
+        except OSError as e:
+            self.log(f"❌ [{job.job_id}] ffmpeg를 실행할 수 없습니다: {e}", level="error", job_id=job.job_id)
+            return False, None
+
+        if return_code != 0:
+            if not self.stop_event.is_set():
+                for line in errors:
+                    self.log(f"[ffmpeg] {line}", level="error", job_id=job.job_id)
+                self.log(f"❌ [{job.job_id}] mp3 변환 실패 (종료 코드: {return_code})",
+                         level="error", job_id=job.job_id)
+            _remove_quietly(temp_path)
+            return False, None
+
+        os.replace(temp_path, output_path)
+        _remove_quietly(source_path)
+        return True, output_path
+
+
+# --- staging 폴더와 디스크 공간 ---
+_LIBRARY_LOCK = Lock()  # 이름 고르기와 옮기기가 작업끼리 겹치지 않도록 (같은 제목의 영상 두 개 등)
+
+
+def _unique_path(path):
+    """path가 이미 있으면 '이름 (1).ext', '이름 (2).ext' ... 중 없는 경로를 반환"""
+    base, ext = os.path.splitext(path)
+    number = 1
+    while os.path.lexists(path):
+        path = f"{base} ({number}){ext}"
+        number += 1
+    return path
+
+
+def move_into_library(source_path, library_dir):
+    """staging에서 완성된 파일을 라이브러리 폴더로 옮기고 옮긴 경로를 반환
+
+    같은 파일 시스템이면 이름만 바꾸고, 다른 디스크면 라이브러리 쪽에 임시 이름으로 복사한 뒤
+    os.replace로 바꿔치기하므로 옮기는 도중 중단되어도 라이브러리에 반쯤 쓴 파일이 보이지 않습니다.
+    같은 이름의 파일이 이미 있으면 덮어쓰지 않고 번호를 붙인 이름으로 저장합니다.
+    """
+    name = os.path.basename(source_path)
+    with _LIBRARY_LOCK:
+        target = _unique_path(os.path.join(library_dir, name))
+        try:
+            os.replace(source_path, target)
+            return target
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    import tempfile
+    descriptor, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".moving", dir=library_dir)
+    os.close(descriptor)
+    try:
+        shutil.copy2(source_path, temp_path)
+        with _LIBRARY_LOCK:
+            target = _unique_path(os.path.join(library_dir, name))
+            os.replace(temp_path, target)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    _remove_quietly(source_path)
+    return target
+
+
+class DiskSpaceGuard:
+    """작업을 시작하기 전에 예상 크기만큼 디스크 여유 공간이 있는지 확인하고 예약
+
+    다운로드 중인 작업이 앞으로 더 쓸 공간(예약한 크기 - 이미 쓴 바이트)을 여유 공간에서 빼고
+    계산하므로 여러 작업이 동시에 시작해도 합쳐서 디스크를 넘치지 않습니다.
+    같은 디스크에 있는 폴더들은 장치 번호(st_dev)로 묶어 합산합니다.
+    """
+
+    def __init__(self, min_free=DEFAULT_MIN_FREE_SPACE, disk_usage=shutil.disk_usage):
+        self.min_free = min_free
+        self._disk_usage = disk_usage
+        self._reservations = {}  # job_id -> [(장치 번호, 예약 바이트), ...] (첫 항목은 다운로드하며 채워지는 폴더)
+        self._written = {}  # job_id -> 지금까지 받은 바이트
+        self._lock = Lock()
+
+    def _pending(self, device):
+        """device에 다운로드 중인 작업들이 앞으로 더 쓸 바이트"""
+        total = 0
+        for job_id, entries in self._reservations.items():
+            written = self._written.get(job_id, 0)
+            for index, (entry_device, size) in enumerate(entries):
+                if entry_device == device:
+                    total += max(size - written, 0) if index == 0 else size
+        return total
+
+    def try_reserve(self, job_id, needs):
+        """needs = [(폴더, 바이트), ...]. 모두 들어가면 예약하고 None, 아니면 (폴더, 남은 바이트, 필요한 바이트)
+
+        첫 항목은 다운로드하면서 채워지는 폴더(update()로 받은 만큼 예약에서 뺌)입니다.
+        폴더가 없거나 여유 공간을 알 수 없으면 OSError가 그대로 올라갑니다.
+        """
+        entries = [(os.stat(directory).st_dev, directory, size) for directory, size in needs]
+        with self._lock:
+            totals = {}
+            for device, directory, size in entries:
+                first_directory, total = totals.get(device, (directory, 0))
+                totals[device] = (first_directory, total + size)
+            for device, (directory, size) in totals.items():
+                available = self._disk_usage(directory).free - self._pending(device) - self.min_free
+                if size > available:
+                    return directory, max(available, 0), size
+            self._reservations[job_id] = [(device, size) for device, _, size in entries]
+            self._written.pop(job_id, None)
+        return None
+
+    def update(self, job_id, written):
+        """job_id 작업이 지금까지 받은 바이트 (진행률마다 호출)"""
+        with self._lock:
+            if job_id in self._reservations:
+                self._written[job_id] = written
+
+    def has_reservations(self):
+        with self._lock:
+            return bool(self._reservations)
+
+    def release(self, job_id):
+        with self._lock:
+            self._reservations.pop(job_id, None)
+            self._written.pop(job_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._reservations.clear()
+            self._written.clear()
+
+
+class DownloadEngine:
+    """UI 없이 동작하는 다운로드 엔진
+
+    URL 큐(중복/완료 기록 확인), 재생목록 펼치기, 워커 풀, 이어받기용 상태 저장을 묶습니다.
+    진행 상황은 on_event({'event': 종류, ...}) 콜백으로 알리며 워커 스레드에서 호출되므로,
+    UI는 콜백 안에서 위젯을 직접 건드리지 말고 자기 스레드로 넘겨야 합니다.
+
+    이벤트 종류:
+        log               level, job_id, message
+        progress          job_id, status, percent(0~1, 모르면 None), downloaded_bytes, total_bytes,
+                          speed(바이트/초), eta(초), fragment_index, fragment_count, text,
+                          aggregate(throughput() 결과)
+        job_start         job_id, url
+        job_finish        job_id, url, success
+        job_retry         job_id, url, attempt, delay, reason  (job_finish 대신, 나중에 낮은 우선순위로 다시 큐에 들어감)
+        throttled         seconds, reason  (그동안 모든 워커가 새 작업을 받지 않음)
+        metadata          url, title, uploader, duration, filesize  (미리 가져온 영상 정보)
+        job_paused        job_id, url  (job_finish 대신, .part 파일을 남겨 둠)
+        job_resumed       job_id, url  (일시정지했던 작업이 새 작업 번호로 다시 큐에 들어감)
+        job_cancelled     job_id, url  (job_finish 대신)
+        disk_wait         job_id, url, directory, free, required  (디스크 공간이 모자라 보류, 공간이 생기면 시작)
+        postprocess       job_id, url, state('queued'/'done'/'failed')  (mp3 변환 단계)
+        playlist_expanded url, title, total, queued
+    """
+
+    def __init__(self, on_event=None, refill_queue=None, archive=None, queue_state=None,
+                 playlist_expander=None, yt_dlp_path=None):
+        self.on_event = on_event
+        self.refill_queue = refill_queue  # 큐가 비었을 때 새 URL을 채워 넣을 기회 (UI 입력창 동기화 등)
+        self.queue = DownloadJobQueue(key_func=canonical_url_key)  # 영상/재생목록 ID 기준 대기열 + 처리 기록
+        self.archive = archive if archive is not None else DownloadArchive()  # 이전 세션까지 포함한 완료 기록
+        self.skip_archived = True
+        self.queue_state = queue_state if queue_state is not None else QueueStateStore()  # 비정상 종료 후 이어받기용 큐 상태
+        self.playlist_expander = playlist_expander if playlist_expander is not None else PlaylistExpander()
+        self.yt_dlp_path = yt_dlp_path
+        self.stop_event = Event()
+        self.settings = {}  # 이번 다운로드의 경로/품질 (이어받기용)
+        self.is_running = False
+        self.worker_pool = None
+        self.supervisor = None  # 자식 프로세스 감시 이벤트 루프 (실행마다 새로 만듦)
+        self.subprocess_downloader = None
+        self.active_jobs = {}  # job_id -> DownloadJob (다운로드 중)
+        self.job_progress = {}  # job_id -> 마지막 진행률 dict (전체 속도/남은 시간 계산용)
+        self.bandwidth = BandwidthScheduler()  # 전체 속도 한도를 작업별로 나눔
+        self.postprocessor = None  # mp3 변환 풀 (mp3 품질일 때만)
+        self.output_files = {}  # job_id -> 다운로드가 끝난 파일 경로
+        self._postprocess_pending = 0  # 변환 대기/진행 중인 작업 수
+        self._postprocess_failed = 0
+        self._postprocess_cancelled = 0
+        self.info_cache = InfoJsonCache()  # 미리 가져온 영상 정보 (다운로드 때 추출을 건너뜀)
+        self.prefetcher = None
+        self.metadata = {}  # URL 키 -> summarize_info() 결과
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = CircuitBreaker()
+        self._job_errors = {}  # job_id -> 최근 오류 메시지 (실패 분류용)
+        self._attempts = {}  # URL 키 -> 지금까지 재시도한 횟수
+        self._retry_waiting = {}  # URL 키 -> (DownloadJob, Timer): 재시도 대기 중
+        self._retried = 0  # 워커 풀이 실패로 셌지만 재시도로 넘긴 작업 수
+        self._downloading = {}  # job_id -> 내장 백엔드 (외부 프로세스면 None): 일시정지/취소할 수 있는 작업
+        self._interrupts = {}  # job_id -> JOB_PAUSE/JOB_CANCEL: 요청을 받아 끊는 중인 작업
+        self._paused = {}  # job_id -> DownloadJob: 일시정지된 작업 (resume_job()으로 다시 큐에 넣음)
+        self._interrupted = 0  # 워커 풀이 실패로 셌지만 일시정지/취소로 끊은 작업 수
+        self.staging_path = None  # .part 파일과 병합/변환을 처리할 빠른 임시 폴더 (None이면 output_path에 바로 씀)
+        self.disk_guard = None  # 시작 전 여유 공간 확인 (끄면 None)
+        self._held = {}  # job_id -> DownloadJob: 디스크 공간이 모자라 시작을 미룬 작업
+        self._held_lock = Lock()
+        self._space_failed = 0  # 공간이 생길 가능성이 없어 시작하지 못하고 실패 처리한 작업 수
+        self._lock = Lock()
+
+    def _emit(self, kind, **fields):
+        if self.on_event:
+            self.on_event(dict(event=kind, **fields))
+
+    def log(self, message, level=None, job_id=None):
+        level = level or infer_log_level(message)
+        if level == "error" and job_id is not None:
+            # 작업이 실패하면 이 메시지들로 재시도할지 정함
+            with self._lock:
+                errors = self._job_errors.setdefault(job_id, deque(maxlen=20))
+                errors.append(message)
+        self._emit('log', level=level, job_id=job_id, message=message)
+
+    def reset(self):
+        """새 다운로드를 위해 대기열, 처리 기록, 중단 상태를 초기화"""
+        self.queue.clear()
+        with self._lock:
+            self.active_jobs.clear()
+            self.job_progress.clear()
+            self.output_files.clear()
+            self._job_errors.clear()
+            self._attempts.clear()
+            for _, timer in self._retry_waiting.values():
+                timer.cancel()
+            self._retry_waiting.clear()
+            self._retried = 0
+            self._interrupts.clear()
+            self._paused.clear()
+            self._interrupted = 0
+            self._held.clear()
+            self._space_failed = 0
+        if self.disk_guard:
+            self.disk_guard.clear()
+        self.circuit_breaker.reset()
+        self.stop_event.clear()
+
+    def is_archived(self, url):
+        """이전에 이미 다운로드한 영상인지 확인 (건너뛰기 옵션이 켜져 있을 때만)"""
+        return self.skip_archived and canonical_url_key(url) in self.archive
+
+    def enqueue(self, url, priority=PRIORITY_NORMAL):
+        """아카이브와 중복을 확인한 뒤 큐에 추가. 'queued', 'archived', 'duplicate' 중 하나를 반환"""
+        if self.is_archived(url):
+            return 'archived'
+        # 재생목록은 먼저 펼쳐야 영상들이 여러 워커에 나눠지므로 앞쪽에 배치
+        if canonical_url_key(url).startswith('playlist:'):
+            priority = PRIORITY_HIGH
+        # 이미 큐에 있거나 처리 중인 URL은 추가하지 않음 (해시 인덱스로 O(1) 확인)
+        if not self.queue.add(url, priority):
+            return 'duplicate'
+        self.queue_state.mark_dirty()
+        if self.prefetcher:
+            self.prefetcher.submit(url)
+        return 'queued'
+
+    def remove_pending(self, url):
+        """대기 중인 작업을 큐에서 빼고, 그 영상 정보를 가져오는 중이면 멈춤. 대기 중이 아니었으면 False"""
+        removed = self.queue.remove(url)
+        if removed:
+            self.queue_state.mark_dirty()
+            if self.subprocess_downloader:
+                self.subprocess_downloader.cancel_prefetch(url)
+        return removed
+
+    def stats(self):
+        """(성공, 실패, 진행 중, 대기 중) 개수를 반환 (mp3 변환 중인 작업은 진행 중으로 셈)"""
+        successful, failed, active = self.worker_pool.stats() if self.worker_pool else (0, 0, 0)
+        with self._lock:
+            converting = self._postprocess_pending
+            converted_failed = self._postprocess_failed
+            converted_cancelled = self._postprocess_cancelled
+            retried = self._retried + self._interrupted
+            space_failed = self._space_failed
+            waiting = len(self._retry_waiting) + len(self._paused) + len(self._held)
+        # 워커 풀은 다운로드가 끝나면 성공으로 세므로 변환이 끝나지 않은 작업은 빼서 셈
+        successful -= converting + converted_failed + converted_cancelled
+        # 재시도로 넘기거나 일시정지/취소한 작업은 실패에서 빼고, 재시도/재개/공간을 기다리는 작업은 대기 중으로 셈
+        return successful, failed + converted_failed + space_failed - retried, active + converting, len(self.queue) + waiting
+
+    def throughput(self):
+        """다운로드 중인 작업들의 실제 바이트 수로 계산한 전체 속도(바이트/초)와 남은 시간(초)
+
+        크기를 아는 작업만 남은 바이트에 더하므로, 크기를 모르는 작업이 있으면 eta는 하한값입니다.
+        """
+        with self._lock:
+            progresses = list(self.job_progress.values())
+        speed = sum(p['speed'] or 0 for p in progresses if p['status'] == 'downloading')
+        downloaded = sum(p['downloaded_bytes'] or 0 for p in progresses)
+        total = sum(p['total_bytes'] for p in progresses if p['total_bytes'])
+        remaining = sum(max(p['total_bytes'] - (p['downloaded_bytes'] or 0), 0)
+                        for p in progresses if p['total_bytes'] and p['status'] == 'downloading')
+        return {
+            'speed': speed,
+            'eta': remaining / speed if speed else None,
+            'downloaded_bytes': downloaded,
+            'total_bytes': total,
+            'active': len(progresses),
+        }
+
+    def running_jobs(self):
+        """다운로드 중인 작업 목록"""
+        with self._lock:
+            return list(self.active_jobs.values())
+
+    def paused_jobs(self):
+        """일시정지한 작업 목록"""
+        with self._lock:
+            return list(self._paused.values())
+
+    def snapshot(self):
+        """현재 큐 상태를 저장용 dict로 변환 (다운로드 중인 작업을 맨 앞에)"""
+        jobs = [{'url': job.url, 'priority': job.priority, 'state': 'active'} for job in self.running_jobs()]
+        jobs += [{'url': job.url, 'priority': job.priority, 'state': 'pending'}
+                 for job in self.queue.pending_jobs()]
+        with self._lock:
+            waiting = [job for job, _ in self._retry_waiting.values()] + list(self._held.values())
+            paused = list(self._paused.values())
+        jobs += [{'url': job.url, 'priority': job.priority, 'state': 'pending'} for job in waiting]
+        # 일시정지한 작업도 저장해 두면 다음 실행 때 .part 파일에서 이어받음
+        jobs += [{'url': job.url, 'priority': job.priority, 'state': 'paused'} for job in paused]
+        return {
+            'version': 1,
+            'saved_at': time.time(),
+            'settings': self.settings,
+            'jobs': jobs,
+        }
+
+    def save_state(self):
+        """종료 직전에 현재 큐 상태를 즉시 저장"""
+        if self.is_running:
+            self.queue_state.mark_dirty()
+            self.queue_state.stop(flush=True)
+
+    def stop(self):
+        """다운로드 중단 (새 작업을 받지 않고 실행 중인 프로세스도 종료)"""
+        self.stop_event.set()
+        with self._lock:
+            # 재시도 대기 중인 작업은 저장 상태에 남겨 다음 실행 때 이어받음
+            for _, timer in self._retry_waiting.values():
+                timer.cancel()
+        if self.subprocess_downloader:
+            self.subprocess_downloader.terminate_all()
+        if self.postprocessor:
+            self.postprocessor.terminate_all()
+
+    def run(self, settings):
+        """큐가 빌 때까지 다운로드하고 (성공, 실패) 개수를 반환 (호출한 스레드에서 끝날 때까지 실행)
+
+        settings에는 output_path, quality, max_workers, backend를 넣고, 필요하면 concurrent_fragments,
+        external_downloader('aria2c'), connection_budget, rate_limit/job_rate_limit(바이트/초),
+        postprocess_workers(0이면 다운로드 작업 안에서 변환), postprocess_nice,
+        stream_audio(mp3를 중간 파일 없이 파이프로 변환, 외부 프로세스 백엔드 전용),
+        max_retries(일시적인 오류 재시도 횟수, 0이면 재시도 안 함), prefetch_metadata(기본 True),
+        staging_path(.part 파일과 병합을 처리할 빠른 임시 폴더, 완성된 파일만 output_path로 옮김),
+        disk_preflight(기본 True, 예상 크기만큼 공간이 없으면 작업을 보류), min_free_space(바이트)도 넣습니다.
+        외부 프로세스 백엔드인데 yt-dlp 실행 파일이 없으면 None을 반환합니다.
+        """
+        self.settings = dict(settings)
+        backend = self.settings.get('backend', BACKEND_SUBPROCESS)
+        output_path = self.settings['output_path']
+        self._plan_connections()
+        self.retry_policy.max_retries = self.settings.get('max_retries', DEFAULT_MAX_RETRIES)
+        self.bandwidth.configure(self.settings.get('rate_limit'), self.settings.get('job_rate_limit'),
+                                 slots=self.settings['max_workers'])
+        stream_ffmpeg_path = self._stream_ffmpeg_path(backend)
+        self._configure_disk(output_path)
+        if self.info_cache.variant != self.settings['quality']:
+            # 품질이 바뀌면 미리 가져온 예상 크기도 달라지므로 그 품질의 캐시를 씀
+            self.info_cache.variant = self.settings['quality']
+            with self._lock:
+                self.metadata.clear()
+        # 다운로드와 mp3 변환의 모든 자식 프로세스를 이벤트 루프 하나에서 감시
+        self.supervisor = ProcessSupervisor()
+        self.postprocessor = None if stream_ffmpeg_path else self._create_postprocessor()
+        with self._lock:
+            self._postprocess_pending = self._postprocess_failed = self._postprocess_cancelled = 0
+        self.subprocess_downloader = None
+        if backend == BACKEND_SUBPROCESS:
+            yt_dlp_path = self.yt_dlp_path or find_yt_dlp()
+            if not os.path.exists(yt_dlp_path):
+                self.log(f"❌ yt-dlp.exe를 찾을 수 없습니다! (경로: {yt_dlp_path})")
+                return None
+            self.subprocess_downloader = SubprocessDownloader(
+                yt_dlp_path, self._download_dir(), self.settings['quality'], self.stop_event,
+                on_progress=self._on_progress, on_log=self.log,
+                concurrent_fragments=self.settings['concurrent_fragments'],
+                external_downloader=self.settings['external_downloader'],
+                extract_audio=self.postprocessor is None,
+                on_output_file=self._on_output_file,
+                stream_ffmpeg_path=stream_ffmpeg_path,
+                nice=self.settings.get('postprocess_nice', DEFAULT_POSTPROCESS_NICE),
+                supervisor=self.supervisor,
+            )
+        max_workers = self.settings['max_workers']
+        engine_label = self.settings.get('backend_label', backend)
+        if self.settings['external_downloader']:
+            engine_label += f" + {self.settings['external_downloader']}"
+        self.log(f"📋 다운로드 시작 - 동적 큐 시스템 활성화 "
+                 f"(동시 다운로드: {max_workers}개, 작업당 연결: {self.settings['concurrent_fragments']}개, "
+                 f"엔진: {engine_label})")
+        if self.bandwidth.total_rate:
+            self.log(f"🚦 전체 속도 제한: {format_speed(self.bandwidth.total_rate)} (우선순위에 따라 작업별로 나눔)")
+        if self.staging_path:
+            self.log(f"📂 임시 작업 폴더: {self.staging_path} (완성된 파일만 저장 위치로 옮김)")
+
+        self.worker_pool = DownloadWorkerPool(
+            max_workers,
+            get_next_job=self._get_next_job,
+            run_job=self._run_job,
+            stop_event=self.stop_event,
+            on_job_start=self._on_job_start,
+            on_job_finish=self._on_job_finish,
+            refill_queue=self.refill_queue,
+            backend_factory=self._create_inprocess_backend if backend == BACKEND_INPROCESS else None,
+            has_deferred_work=self._has_deferred_work,
+        )
+        self.queue_state.start(self.snapshot)
+        self.is_running = True
+        if self.postprocessor:
+            self.postprocessor.start()
+        if self.settings.get('prefetch_metadata', True):
+            self._start_prefetcher()
+        try:
+            self.worker_pool.run()
+            if self.postprocessor:
+                # 다운로드가 모두 끝나도 변환 중인 파일은 마저 처리
+                self.postprocessor.join()
+        finally:
+            self.is_running = False
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.prefetcher = None
+            self.supervisor.close()
+        successful_downloads, failed_downloads, _, _ = self.stats()
+
+        if self.stop_event.is_set():
+            # 남은 작업은 다음 실행 때 이어받을 수 있도록 저장
+            self.queue_state.stop(flush=True)
+            self.log("🛑 사용자에 의해 다운로드가 중단되었습니다.")
+        else:
+            self.queue_state.stop(flush=False)
+            self.queue_state.clear()
+            self.log(f"\n🎉 다운로드 완료!")
+            self.log(f"✅ 성공: {successful_downloads}개")
+            if failed_downloads > 0:
+                self.log(f"❌ 실패: {failed_downloads}개")
+            self.log(f"📁 저장 위치: {output_path}")
+        return successful_downloads, failed_downloads
+
+    def set_rate_limit(self, rate_limit=None, job_rate_limit=None):
+        """전체/작업당 속도 제한(바이트/초)을 바꿈. 다운로드 중이면 실행 중인 작업들의 몫도 다시 나눔"""
+        self.settings.update(rate_limit=rate_limit, job_rate_limit=job_rate_limit)
+        self.bandwidth.configure(rate_limit, job_rate_limit)
+        if rate_limit:
+            self.log(f"🚦 전체 속도 제한: {format_speed(rate_limit)}")
+        else:
+            self.log("🚦 전체 속도 제한 해제")
+
+    def set_job_priority(self, job_id, priority):
+        """다운로드 중인 작업의 우선순위(대역폭 비중)를 바꿈
+
+        그런 작업이 없거나 실행 중에 속도 제한을 바꿀 수 없는 백엔드(yt-dlp.exe)면 False
+        """
+        with self._lock:
+            job = self.active_jobs.get(job_id)
+        if job is None or not self.bandwidth.set_priority(job_id, priority):
+            return False
+        with self._lock:
+            job.priority = priority
+        self.queue_state.mark_dirty()
+        return True
+
+    def supports_live_priority(self):
+        """다운로드 중인 작업의 우선순위를 바꿀 수 있는지 (내장 백엔드만 실행 중에 속도 제한을 바꿈)"""
+        return self.settings.get('backend', BACKEND_SUBPROCESS) == BACKEND_INPROCESS
+
+    def pause_job(self, job_id):
+        """다운로드 중인 작업을 멈춤. 받던 .part 파일은 남겨 두고 resume_job()으로 이어받음
+
+        멈춘 작업이 쓰던 대역폭은 곧바로 다른 작업들에 다시 나눠집니다. 그런 작업이 없으면 False
+        """
+        return self._interrupt_job(job_id, JOB_PAUSE)
+
+    def resume_job(self, job_id):
+        """일시정지한 작업을 높은 우선순위로 다시 큐에 넣음 (새 작업 번호로 .part 파일에서 이어받음)"""
+        with self._lock:
+            job = self._paused.pop(job_id, None)
+        if job is None:
+            return False
+        self.queue.forget(job.url)
+        self.queue.add(job.url, PRIORITY_HIGH)
+        self.queue_state.mark_dirty()
+        self.log(f"▶️ [{job_id}] 다운로드를 이어받습니다.", job_id=job_id)
+        self._emit('job_resumed', job_id=job_id, url=job.url)
+        return True
+
+    def cancel_job(self, job_id):
+        """다운로드 중이거나 일시정지/보류한 작업 하나를 취소 (다른 작업은 계속). 그런 작업이 없으면 False"""
+        with self._lock:
+            job = self._paused.pop(job_id, None) or self._held.pop(job_id, None)
+        if job is not None:
+            self._on_job_interrupted(job, JOB_CANCEL, counted=False)
+            return True
+        return self._interrupt_job(job_id, JOB_CANCEL)
+
+    def _interrupt_job(self, job_id, action):
+        with self._lock:
+            if job_id not in self._downloading:
+                return False  # 다운로드 중이 아님 (대기 중이거나 이미 끝남, mp3 변환 중)
+            backend = self._downloading[job_id]
+            self._interrupts[job_id] = action
+        if backend is not None:
+            backend.interrupt(job_id)
+        else:
+            self.subprocess_downloader.interrupt(job_id)
+        return True
+
+    def _on_job_interrupted(self, job, action, counted=True):
+        """일시정지/취소로 끊긴 작업 정리 (counted: 워커 풀이 실패로 센 작업인지)"""
+        with self._lock:
+            self.active_jobs.pop(job.job_id, None)
+            if counted:
+                self._interrupted += 1
+            if action == JOB_PAUSE:
+                self._paused[job.job_id] = job
+        if action == JOB_CANCEL:
+            # 나중에 같은 URL을 다시 추가할 수 있도록 처리 기록에서 지움 (.part 파일은 남아 이어받기 가능)
+            self.queue.forget(job.url)
+        self.queue_state.mark_dirty()
+        if action == JOB_PAUSE:
+            self.log(f"⏸️ [{job.job_id}] 일시정지했습니다. 받은 부분은 남겨 둡니다.", job_id=job.job_id)
+            self._emit('job_paused', job_id=job.job_id, url=job.url)
+        else:
+            self.log(f"🚫 [{job.job_id}] 다운로드를 취소했습니다.", job_id=job.job_id)
+            self._emit('job_cancelled', job_id=job.job_id, url=job.url)
+
+    def _plan_connections(self):
+        """동시 다운로드 수와 작업당 연결 수를 연결 예산 안으로 맞추고, 없는 외부 다운로더는 끔"""
+        requested_workers = self.settings.get('max_workers', DEFAULT_MAX_WORKERS)
+        requested_fragments = self.settings.get('concurrent_fragments', DEFAULT_CONCURRENT_FRAGMENTS)
+        budget = self.settings.get('connection_budget', DEFAULT_CONNECTION_BUDGET)
+        max_workers, fragments = plan_connections(requested_workers, requested_fragments, budget)
+        if (max_workers, fragments) != (requested_workers, requested_fragments):
+            self.log(f"⚠️ 연결 수 제한({budget}개)에 맞춰 동시 다운로드 {max_workers}개 × "
+                     f"작업당 연결 {fragments}개로 조정합니다.")
+
+        external_downloader = self.settings.get('external_downloader')
+        if external_downloader and not find_external_downloader(external_downloader):
+            self.log(f"⚠️ 외부 다운로더 '{external_downloader}'를 찾을 수 없어 yt-dlp 내장 다운로더를 사용합니다.")
+            external_downloader = None
+
+        self.settings.update(max_workers=max_workers, concurrent_fragments=fragments,
+                             external_downloader=external_downloader)
+
+    def _stream_ffmpeg_path(self, backend):
+        """mp3 스트리밍 변환을 쓸 수 있으면 ffmpeg 경로, 아니면 None (후처리 풀이나 작업 안 변환으로 대체)"""
+        if self.settings.get('quality') != MP3_QUALITY or not self.settings.get('stream_audio'):
+            return None
+        if backend != BACKEND_SUBPROCESS:
+            self.log("⚠️ mp3 스트리밍 변환은 yt-dlp.exe (외부 프로세스) 엔진에서만 지원합니다. 파일로 받은 뒤 변환합니다.")
+            return None
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
+            self.log("⚠️ ffmpeg를 찾을 수 없어 mp3 스트리밍 변환을 사용할 수 없습니다.")
+            return None
+        self.log("🎵 mp3 스트리밍 변환: 음성 스트림을 중간 파일 없이 바로 mp3로 저장합니다.")
+        return ffmpeg_path
+
+    def _configure_disk(self, output_path):
+        """staging 폴더와 여유 공간 확인을 설정 (staging이 저장 위치와 같으면 쓰지 않음)"""
+        staging_path = self.settings.get('staging_path') or None
+        if staging_path and os.path.normcase(os.path.abspath(staging_path)) == \
+                os.path.normcase(os.path.abspath(output_path)):
+            staging_path = None
+        self.staging_path = staging_path
+        os.makedirs(output_path, exist_ok=True)
+        if staging_path:
+            os.makedirs(staging_path, exist_ok=True)
+        self.disk_guard = None
+        if self.settings.get('disk_preflight', True):
+            self.disk_guard = DiskSpaceGuard(self.settings.get('min_free_space', DEFAULT_MIN_FREE_SPACE))
+
+    def _download_dir(self):
+        """yt-dlp가 .part 파일과 병합/변환 결과를 쓰는 폴더"""
+        return self.staging_path or self.settings['output_path']
+
+    def _create_postprocessor(self):
+        """mp3 품질이면 변환 풀을 만듦. 끄도록 설정했거나 ffmpeg가 없으면 None (yt-dlp가 작업 안에서 변환)"""
+        if self.settings.get('quality') != MP3_QUALITY or self.settings.get('postprocess_workers') == 0:
+            return None
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
+            self.log("⚠️ ffmpeg를 찾을 수 없어 mp3 변환을 다운로드 작업 안에서 처리합니다.")
+            return None
+        postprocessor = PostProcessPool(
+            ffmpeg_path, self.stop_event,
+            workers=self.settings.get('postprocess_workers'),
+            nice=self.settings.get('postprocess_nice', DEFAULT_POSTPROCESS_NICE),
+            on_done=self._on_postprocess_done, on_log=self.log, supervisor=self.supervisor,
+        )
+        self.log(f"🎵 mp3 변환은 별도 작업 풀에서 처리합니다 (변환 동시 실행: {postprocessor.workers}개)")
+        return postprocessor
+
+    def _on_output_file(self, job_id, path):
+        with self._lock:
+            self.output_files[job_id] = path
+
+    def _on_progress(self, progress):
+        with self._lock:
+            self.job_progress[progress['job_id']] = progress
+        if self.disk_guard and progress['downloaded_bytes']:
+            self.disk_guard.update(progress['job_id'], progress['downloaded_bytes'])
+        self._emit('progress', **progress, text=format_progress_text(progress), aggregate=self.throughput())
+
+    def _create_inprocess_backend(self):
+        """워커 하나가 사용할 yt_dlp 내장 백엔드 생성"""
+        return InProcessDownloader(
+            self._download_dir(),
+            self.settings['quality'],
+            self.stop_event,
+            on_progress=self._on_progress,
+            on_log=self.log,
+            concurrent_fragments=self.settings['concurrent_fragments'],
+            external_downloader=self.settings['external_downloader'],
+            extract_audio=self.postprocessor is None,
+            on_output_file=self._on_output_file,
+        )
+
+    def _run_job(self, job, backend):
+        """워커 풀에서 호출: 선택된 백엔드로 작업 하나를 다운로드"""
+        # 미리 가져온 정보가 있으면 추출을 건너뛰고 바로 다운로드
+        info_path = self.info_cache.fresh_path(job.key)
+        if info_path:
+            self.log(f"⚡ [{job.job_id}] 캐시된 영상 정보로 시작합니다.", level="debug", job_id=job.job_id)
+        with self._lock:
+            self._downloading[job.job_id] = backend
+        try:
+            if backend is not None:
+                # 내장 백엔드는 다운로드 중에도 몫이 바뀌면 바로 반영
+                self.bandwidth.add(job.job_id, job.priority, apply=backend.set_rate_limit)
+                success = backend.download(job.job_id, job.url, info_path=info_path)
+            else:
+                rate_limit = self.bandwidth.add(job.job_id, job.priority)
+                success = self.subprocess_downloader.download(job.job_id, job.url, rate_limit=rate_limit,
+                                                              info_path=info_path)
+        finally:
+            self.bandwidth.remove(job.job_id)
+            with self._lock:
+                self._downloading.pop(job.job_id, None)
+        try:
+            if success and self.staging_path and not self.postprocessor:
+                # mp3 변환을 후처리 풀에서 하면 변환이 끝난 뒤에 옮김
+                with self._lock:
+                    source_path = self.output_files.get(job.job_id)
+                success = self._publish(job, source_path) is not None
+            return success
+        finally:
+            if self.disk_guard:
+                self.disk_guard.release(job.job_id)
+
+    def _publish(self, job, path):
+        """staging에서 끝난 파일을 저장 위치로 옮기고 옮긴 경로를 반환. 실패하면 None (파일은 staging에 남음)"""
+        if not path:
+            self.log(f"❌ [{job.job_id}] 완성된 파일 경로를 알 수 없어 저장 위치로 옮기지 못했습니다.",
+                     level="error", job_id=job.job_id)
+            return None
+        try:
+            target = move_into_library(path, self.settings['output_path'])
+        except OSError as e:
+            self.log(f"❌ [{job.job_id}] 저장 위치로 옮기지 못했습니다: {e}", level="error", job_id=job.job_id)
+            return None
+        if os.path.basename(target) != os.path.basename(path):
+            self.log(f"⚠️ [{job.job_id}] 같은 이름의 파일이 이미 있어 '{os.path.basename(target)}'(으)로 저장했습니다.",
+                     level="warning", job_id=job.job_id)
+        with self._lock:
+            if job.job_id in self.output_files:
+                self.output_files[job.job_id] = target
+        return target
+
+    def _start_prefetcher(self):
+        """큐에 있는 영상들의 정보를 다운로드 워커보다 먼저 가져오기 시작"""
+        if self.subprocess_downloader:
+            extract = self.subprocess_downloader.extract_info
+        else:
+            extract = self._extract_info_inprocess
+        self.prefetcher = MetadataPrefetcher(
+            self.info_cache, extract, is_wanted=self.queue.is_pending,
+            on_result=self._on_metadata, on_log=self.log,
+        )
+        self.prefetcher.start()
+        for job in self.queue.pending_jobs():
+            self.prefetcher.submit(job.url)
+
+    def _extract_info_inprocess(self, url):
+        import yt_dlp
+        options = {
+            'format': self.settings['quality'],
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            'nocheckcertificate': True,
+        }
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    def _on_metadata(self, url, info):
+        summary = summarize_info(info)
+        with self._lock:
+            self.metadata[canonical_url_key(url)] = summary
+        self._emit('metadata', url=url, **summary)
+
+    def _has_deferred_work(self):
+        """지금은 꺼낼 작업이 없어도 기다리면 생기는지 (재시도/재개/디스크 공간 대기 중이거나 차단 중인데 큐가 남음)"""
+        with self._lock:
+            if self._retry_waiting or self._paused or self._held:
+                return True
+        return self.circuit_breaker.is_open() and len(self.queue) > 0
+
+    def _get_next_job(self):
+        """큐에서 다음 작업 가져오기 (워커 풀에서 사용). 재생목록은 영상들로 펼친 뒤 다음 작업을 반환
+
+        디스크 공간이 모자라 보류한 작업을 먼저 다시 확인하고, 큐에서 꺼낸 작업도 공간이 모자라면
+        보류 목록에 넣고 None을 반환합니다 (워커 풀이 잠시 기다렸다가 다시 호출).
+        """
+        if self.circuit_breaker.is_open():
+            return None  # 요청 제한 중에는 새 작업을 시작하지 않음
+        try:
+            job = self._take_held_job()
+            if job is not None:
+                return job
+            while not self.stop_event.is_set():
+                job = self.queue.pop()
+                if job is None:
+                    return None
+                if not job.key.startswith('playlist:'):
+                    shortage = self._reserve_space(job)
+                    if shortage is None:
+                        return job
+                    self._hold(job, shortage)
+                    return None
+                self._expand_playlist(job)
+            return None
+        except Exception as e:
+            self.log(f"큐에서 URL 가져오기 오류: {e}", level="error")
+            return None
+
+    def _reserve_space(self, job):
+        """예상 크기만큼 디스크 공간을 예약. 시작해도 되면 None, 모자라면 (폴더, 남은 바이트, 필요한 바이트)
+
+        크기는 미리 가져온 영상 정보(metadata)로 알며, 모르면 확인 없이 시작합니다.
+        """
+        with self._lock:
+            summary = self.metadata.get(job.key)
+        size = summary and summary.get('filesize')
+        if not self.disk_guard or not size:
+            return None
+        needs = [(self._download_dir(), size * STAGING_SPACE_FACTOR)]
+        if self.staging_path:
+            needs.append((self.settings['output_path'], size))
+        try:
+            return self.disk_guard.try_reserve(job.job_id, needs)
+        except OSError as e:
+            self.log(f"⚠️ 디스크 여유 공간을 확인할 수 없습니다: {e}", level="debug")
+            return None
+
+    def _hold(self, job, shortage):
+        """공간이 모자란 작업을 보류 목록에 넣음 (다른 작업이 끝나 공간이 생기면 _take_held_job()에서 시작)
+
+        실행 중이거나 공간을 예약한 작업이 없으면 기다려도 공간이 생기지 않으므로 바로 실패 처리합니다.
+        """
+        if not self._space_may_free():
+            self._fail_for_space(job, shortage)
+            return
+        directory, free, required = shortage
+        with self._lock:
+            self._held[job.job_id] = job
+        self.queue_state.mark_dirty()
+        self.log(f"💾 [{job.job_id}] 디스크 공간이 모자라 보류합니다 ({directory}: 필요 {format_size(required)}, "
+                 f"남은 공간 {format_size(free)}). 공간이 생기면 자동으로 시작합니다.",
+                 level="warning", job_id=job.job_id)
+        self._emit('disk_wait', job_id=job.job_id, url=job.url, directory=directory, free=free, required=required)
+
+    def _take_held_job(self):
+        """보류한 작업 중 이제 공간이 있는 첫 작업을 꺼냄 (없으면 None)"""
+        # 여러 워커가 같은 보류 작업을 동시에 꺼내지 않도록 한 번에 한 워커만 확인
+        with self._held_lock:
+            with self._lock:
+                held = list(self._held.values())
+            for job in held:
+                shortage = self._reserve_space(job)
+                if shortage is not None:
+                    if not self._space_may_free():
+                        self._fail_for_space(job, shortage)
+                    continue
+                with self._lock:
+                    taken = self._held.pop(job.job_id, None)
+                if taken is not None:
+                    return job
+                self.disk_guard.release(job.job_id)  # 확인하는 사이 취소됨
+        return None
+
+    def _space_may_free(self):
+        """다운로드/변환 중이거나 공간을 예약한 작업이 있어 기다리면 여유 공간이 늘 수 있는지"""
+        with self._lock:
+            if self.active_jobs or self._postprocess_pending:
+                return True
+        if self.worker_pool and self.worker_pool.stats()[2]:
+            return True
+        return self.disk_guard.has_reservations()
+
+    def _fail_for_space(self, job, shortage):
+        """공간이 생길 가능성이 없는 작업을 시작하지 않고 실패로 끝냄 (워커 풀을 거치지 않은 작업)"""
+        directory, free, required = shortage
+        with self._lock:
+            self._held.pop(job.job_id, None)
+            self._space_failed += 1
+        self.queue_state.mark_dirty()
+        self.log(f"❌ [{job.job_id}] 디스크 공간이 부족해 시작할 수 없습니다 ({directory}: 필요 {format_size(required)}, "
+                 f"남은 공간 {format_size(free)})", level="error", job_id=job.job_id)
+        with self._lock:
+            self._job_errors.pop(job.job_id, None)
+        self._emit('job_finish', job_id=job.job_id, url=job.url, success=False)
+
+    def _expand_playlist(self, job):
+        """재생목록 작업을 개별 영상 작업으로 펼쳐 큐에 추가 (워커 스레드에서 실행)"""
+        self.log(f"📃 재생목록 목록을 가져오는 중: {job.url}")
+        try:
+            title, urls, from_cache = self.playlist_expander.expand(job.url)
+        except Exception as e:
+            self.log(f"❌ 재생목록을 가져오지 못했습니다: {job.url} ({e})")
+            return
+
+        results = [self.enqueue(url) for url in urls]
+        queued = results.count('queued')
+        source = " (캐시)" if from_cache else ""
+        self.log(f"📃 재생목록 '{title}'{source}: 영상 {len(urls)}개 중 {queued}개를 큐에 추가 "
+                 f"(이미 받음 {results.count('archived')}개, 중복 {results.count('duplicate')}개)")
+        self._emit('playlist_expanded', url=job.url, title=title, total=len(urls), queued=queued)
+
+    def _on_job_start(self, job):
+        """워커가 작업을 시작했을 때"""
+        with self._lock:
+            self.active_jobs[job.job_id] = job
+        self.queue_state.mark_dirty()
+        self.log(f"\n📥 [{job.job_id}] 다운로드 시작: {job.url}", job_id=job.job_id)
+        self._emit('job_start', job_id=job.job_id, url=job.url)
+
+    def _on_job_finish(self, job, success):
+        """워커가 작업을 마쳤을 때"""
+        with self._lock:
+            source_path = self.output_files.pop(job.job_id, None)
+            self.job_progress.pop(job.job_id, None)
+            errors = list(self._job_errors.pop(job.job_id, ()))
+            interrupt = self._interrupts.pop(job.job_id, None)
+        if interrupt and not success and not self.stop_event.is_set():
+            self._on_job_interrupted(job, interrupt)
+            return
+        if success:
+            self.circuit_breaker.record_success()
+        else:
+            # 캐시된 스트림 URL이 만료되었을 수 있으므로 다음 시도는 새로 추출
+            self.info_cache.invalidate(job.key)
+            if self._schedule_retry(job, errors):
+                return
+        if success and self.postprocessor and source_path and not self.stop_event.is_set():
+            # 변환은 후처리 풀에 넘기고 이 워커는 바로 다음 다운로드로 (작업 완료는 변환 후에 알림)
+            with self._lock:
+                self._postprocess_pending += 1
+            self.log(f"📦 [{job.job_id}] 다운로드 완료, mp3 변환 대기 중", job_id=job.job_id)
+            self._emit('postprocess', job_id=job.job_id, url=job.url, state='queued')
+            if not self.postprocessor.submit(job, source_path):
+                self._on_postprocess_done(job, False, None)
+            return
+        self._finish_job(job, success)
+
+    def _schedule_retry(self, job, errors):
+        """실패한 작업을 분류해 다시 시도할 만하면 대기 후 낮은 우선순위로 다시 큐에 넣음. 넣었으면 True"""
+        if self.stop_event.is_set():
+            return False
+        kind, reason = classify_failure(errors)
+        if kind == FAILURE_THROTTLED:
+            cooldown = self.circuit_breaker.trip()
+            self.log(f"🚧 요청 제한이 감지되어 {cooldown:.0f}초 동안 새 다운로드를 멈춥니다.", level="warning")
+            self._emit('throttled', seconds=cooldown, reason=reason)
+        if kind == FAILURE_PERMANENT:
+            self.log(f"⛔ [{job.job_id}] {reason} - 다시 시도하지 않습니다.", level="error", job_id=job.job_id)
+            return False
+
+        with self._lock:
+            attempt = self._attempts.get(job.key, 0) + 1
+        if attempt > self.retry_policy.max_retries:
+            if self.retry_policy.max_retries:
+                self.log(f"⛔ [{job.job_id}] 재시도 {self.retry_policy.max_retries}회를 모두 실패했습니다.",
+                         level="error", job_id=job.job_id)
+            return False
+
+        # 차단 중이면 적어도 차단이 풀린 뒤에 다시 시도
+        delay = max(self.retry_policy.delay(attempt), self.circuit_breaker.remaining())
+        timer = Timer(delay, self._requeue, args=(job,))
+        timer.daemon = True
+        with self._lock:
+            self._attempts[job.key] = attempt
+            self.active_jobs.pop(job.job_id, None)
+            self._retried += 1
+            self._retry_waiting[job.key] = (job, timer)
+        timer.start()
+        self.queue_state.mark_dirty()
+        self.log(f"🔁 [{job.job_id}] {reason}: {delay:.1f}초 후 다시 시도합니다 "
+                 f"({attempt}/{self.retry_policy.max_retries})", level="warning", job_id=job.job_id)
+        self._emit('job_retry', job_id=job.job_id, url=job.url, attempt=attempt, delay=delay, reason=reason)
+        return True
+
+    def _requeue(self, job):
+        """재시도 대기가 끝난 작업을 낮은 우선순위로 다시 큐에 넣음 (Timer 스레드에서 호출)"""
+        with self._lock:
+            if self.stop_event.is_set() or self._retry_waiting.pop(job.key, None) is None:
+                return
+        self.queue.forget(job.url)
+        self.queue.add(job.url, PRIORITY_LOW)
+        self.queue_state.mark_dirty()
+
+    def _on_postprocess_done(self, job, success, output_path):
+        """mp3 변환이 끝났을 때 (후처리 풀 스레드에서 호출)"""
+        if success and self.staging_path:
+            success = self._publish(job, output_path) is not None
+        with self._lock:
+            self._postprocess_pending -= 1
+            if not success and self.stop_event.is_set():
+                self._postprocess_cancelled += 1
+            elif not success:
+                self._postprocess_failed += 1
+        self._emit('postprocess', job_id=job.job_id, url=job.url, state='done' if success else 'failed')
+        self._finish_job(job, success)
+
+    def _finish_job(self, job, success):
+        """작업 하나가 (변환까지) 끝났을 때 기록을 갱신하고 job_finish를 알림"""
+        # 중단으로 끝난 작업은 저장 상태에 남겨 다음 실행 때 이어받음
+        if not self.stop_event.is_set():
+            with self._lock:
+                self.active_jobs.pop(job.job_id, None)
+            self.queue_state.mark_dirty()
+        if success:
+            self.archive.add(job.key)
+            self.log(f"✅ [{job.job_id}] 다운로드 성공!", job_id=job.job_id)
+        elif not self.stop_event.is_set():
+            self.log(f"❌ [{job.job_id}] 다운로드 실패!", job_id=job.job_id)
+        self._emit('job_finish', job_id=job.job_id, url=job.url, success=success)
+
+
+# --- 명령줄 (헤드리스) 실행 ---
+CLI_QUEUE_STATE_FILE = os.path.join(APP_DATA_DIR, "cli_queue_state.json")  # UI의 이어받기 상태와 분리
+
+
+class _JsonlWriter:
+    """이벤트를 한 줄에 하나씩 JSON으로 출력 (여러 워커 스레드에서 동시에 호출 가능)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = Lock()
+
+    def write(self, event):
+        line = json.dumps(dict(event, ts=round(time.time(), 3)), ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def _read_urls(source):
+    """URL 목록 파일(또는 '-'이면 표준 입력)에서 유효한 URL들을 읽음"""
+    if source == '-':
+        return parse_urls(sys.stdin.read())
+    with open(source, encoding='utf-8') as url_file:
+        return parse_urls(url_file.read())
+
+
+def main(argv=None):
+    import argparse  # CLI에서만 사용 (UI 시작 시간 단축)
+    parser = argparse.ArgumentParser(
+        prog="python -m download_engine",
+        description="UI 없이 YouTube URL 목록을 다운로드합니다. 진행 상황은 표준 출력에 JSONL로 기록합니다.",
+    )
+    parser.add_argument('source', nargs='?',
+                        help="URL 목록 파일 (한 줄에 하나). 생략하거나 '-'이면 표준 입력에서 읽음")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_PATH, help="저장 폴더")
+    parser.add_argument('-q', '--quality', default=DEFAULT_QUALITY,
+                        help="yt-dlp 포맷 ('bestaudio/best'는 mp3로 변환)")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_MAX_WORKERS, help="동시 다운로드 수")
+    parser.add_argument('--backend', choices=(BACKEND_SUBPROCESS, BACKEND_INPROCESS), default=BACKEND_SUBPROCESS,
+                        help="subprocess: URL마다 yt-dlp 실행, inprocess: yt_dlp 모듈을 워커마다 재사용")
+    parser.add_argument('-N', '--concurrent-fragments', type=int, default=DEFAULT_CONCURRENT_FRAGMENTS,
+                        help="작업 하나가 동시에 받는 조각(연결) 수")
+    parser.add_argument('--downloader', choices=EXTERNAL_DOWNLOADERS, help="외부 다운로더 사용 (예: aria2c)")
+    parser.add_argument('--connection-budget', type=int, default=DEFAULT_CONNECTION_BUDGET,
+                        help="전체 최대 연결 수 (동시 다운로드 수 × 조각 수의 상한)")
+    parser.add_argument('--limit-rate', type=parse_rate, help="전체 속도 제한 (예: 500K, 5M). 작업들이 우선순위대로 나눠 씀")
+    parser.add_argument('--job-limit-rate', type=parse_rate, help="작업 하나의 최대 속도 (예: 2M)")
+    parser.add_argument('--postprocess-workers', type=int,
+                        help="mp3 변환 동시 실행 수 (기본: CPU 코어 수, 0이면 다운로드 작업 안에서 변환)")
+    parser.add_argument('--postprocess-nice', type=int, default=DEFAULT_POSTPROCESS_NICE,
+                        help="mp3 변환 프로세스의 nice 값 (클수록 낮은 우선순위)")
+    parser.add_argument('--stream-audio', action='store_true',
+                        help="mp3 품질에서 음성 스트림을 중간 파일 없이 ffmpeg로 바로 변환 (subprocess 엔진 전용)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help="일시적인 오류(429/5xx, 연결 끊김 등)로 실패한 작업을 다시 시도하는 횟수")
+    parser.add_argument('--no-prefetch', action='store_true', help="영상 정보를 미리 가져오지 않음")
+    parser.add_argument('--staging', dest='staging_path',
+                        help=".part 파일과 병합을 처리할 빠른 임시 폴더 (완성된 파일만 저장 폴더로 옮김)")
+    parser.add_argument('--min-free-space', type=parse_rate, default=DEFAULT_MIN_FREE_SPACE,
+                        help="작업을 시작하고도 디스크에 남겨 둘 여유 공간 (예: 500M, 2G)")
+    parser.add_argument('--no-disk-check', action='store_true', help="시작 전에 디스크 여유 공간을 확인하지 않음")
+    parser.add_argument('--yt-dlp', dest='yt_dlp_path', help="yt-dlp 실행 파일 경로")
+    parser.add_argument('--no-skip-archived', action='store_true', help="이미 받은 영상도 다시 다운로드")
+    parser.add_argument('--resume', action='store_true', help="지난번 실행에서 끝내지 못한 작업부터 이어서 다운로드")
+    args = parser.parse_args(argv)
+
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    writer = _JsonlWriter(sys.stdout)
+    engine = DownloadEngine(on_event=writer.write, queue_state=QueueStateStore(CLI_QUEUE_STATE_FILE),
+                            yt_dlp_path=args.yt_dlp_path)
+    engine.skip_archived = not args.no_skip_archived
+    if engine.skip_archived:
+        engine.archive.load()
+
+    urls = []
+    if args.resume:
+        state = engine.queue_state.load()
+        if state:
+            urls.extend(job['url'] for job in state['jobs'] if job.get('url'))
+    if args.source is not None or not args.resume:
+        try:
+            urls.extend(_read_urls(args.source or '-'))
+        except OSError as e:
+            parser.error(f"URL 목록을 읽을 수 없습니다: {e}")
+
+    results = [engine.enqueue(url) for url in urls]
+    writer.write({'event': 'queued', 'total': len(urls), 'queued': results.count('queued'),
+                  'archived': results.count('archived'), 'duplicate': results.count('duplicate')})
+    if not len(engine.queue):
+        writer.write({'event': 'done', 'successful': 0, 'failed': 0, 'cancelled': False})
+        return 0
+
+    settings = {
+        'output_path': os.path.expanduser(args.output),
+        'quality': args.quality,
+        'max_workers': max(1, args.workers),
+        'backend': args.backend,
+        'concurrent_fragments': args.concurrent_fragments,
+        'external_downloader': args.downloader,
+        'connection_budget': args.connection_budget,
+        'rate_limit': args.limit_rate,
+        'job_rate_limit': args.job_limit_rate,
+        'postprocess_workers': args.postprocess_workers,
+        'postprocess_nice': args.postprocess_nice,
+        'stream_audio': args.stream_audio,
+        'max_retries': max(0, args.retries),
+        'prefetch_metadata': not args.no_prefetch,
+        'staging_path': os.path.expanduser(args.staging_path) if args.staging_path else None,
+        'disk_preflight': not args.no_disk_check,
+        'min_free_space': args.min_free_space or 0,
+    }
+    outcome = []
+    finished = Event()
+
+    def run_engine():
+        try:
+            outcome.append(engine.run(settings))
+        finally:
+            finished.set()
+
+    # Thread.join()은 KeyboardInterrupt를 받으면 실행 중인 스레드를 끝난 것으로 표시해 버리므로
+    # (이후 join()이 바로 반환됨) 엔진이 끝났는지는 Event로 기다림
+    Thread(target=run_engine, name="download-engine", daemon=True).start()
+    try:
+        while not finished.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        # Ctrl+C: 남은 작업을 저장하고 다음 --resume 때 이어받도록 정상 종료
+        engine.stop()
+        while True:
+            try:
+                while not finished.wait(0.5):
+                    pass
+                break
+            except KeyboardInterrupt:
+                # 정리하는 동안 다시 누른 Ctrl+C는 무시하고 저장이 끝날 때까지 기다림
+                continue
+
+    if not outcome or outcome[0] is None:
+        return 2
+    successful, failed = outcome[0]
+    cancelled = engine.stop_event.is_set()
+    writer.write({'event': 'done', 'successful': successful, 'failed': failed, 'cancelled': cancelled})
+    if cancelled:
+        return 130
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,12 +10,15 @@ const isDev = process.env.NODE_ENV === 'development';
 // 메인 윈도우 참조
 let mainWindow: BrowserWindow | null = null;
 
-// 다운로드 프로세스 관리
-let downloadProcess: ChildProcess | null = null;
+// 다운로드 상태 (실제 큐와 스케줄링은 Python 다운로드 데몬이 담당)
 let isDownloading = false;
-let downloadQueue: string[] = []; // 다운로드 큐
-let currentQuality = '';
-let currentOutputPath = '';
+let processedCount = 0; // 이번 다운로드 묶음에서 끝난 작업 수
+let totalCount = 0; // 이번 다운로드 묶음의 전체 작업 수
+let successCount = 0;
+let failCount = 0;
+const jobUrls = new Map<number, string>(); // job_id -> URL
+let currentRunId: number | null = null; // 이번 묶음을 처리하는 데몬 실행 번호 (enqueue 응답으로 앎)
+const earlyDoneRunIds = new Set<number>(); // enqueue 응답보다 먼저 도착한 done 이벤트의 실행 번호
 
 function createWindow(): void {
   // 메인 윈도우 생성
@@ -54,10 +57,9 @@ function createWindow(): void {
   // 윈도우가 닫힐 때
   mainWindow.on('closed', () => {
     mainWindow = null;
-    // 다운로드 프로세스가 실행 중이면 종료
-    if (downloadProcess) {
-      downloadProcess.kill();
-    }
+    // 다운로드 데몬 종료 (진행 중이던 작업은 데몬이 저장해 두고 다음에 이어받음)
+    engineClient?.stop();
+    engineClient = null;
   });
 }
 
@@ -161,228 +163,327 @@ function getYtDlpPath(): string {
   return path.join(process.cwd(), 'bin', 'yt-dlp.exe');
 }
 
-// 다운로드 시작
-ipcMain.handle('start-download', async (_, urls: string[], quality: string, outputPath: string) => {
-  if (isDownloading) {
-    // 이미 다운로드 중이면 큐에 추가
-    downloadQueue.push(...urls);
-    return { success: true, message: '다운로드 큐에 추가되었습니다.' };
+// 다운로드 데몬 (download_daemon.py)이 있는 폴더
+function getEngineDir(): string {
+  const possibleDirs = [
+    // 개발 환경: 프로젝트 루트
+    process.cwd(),
+    path.join(__dirname, '..', '..'),
+    // 프로덕션 환경: 리소스 폴더
+    path.join(process.resourcesPath, 'engine')
+  ];
+
+  for (const dir of possibleDirs) {
+    if (fs.existsSync(path.join(dir, 'download_daemon.py'))) {
+      return dir;
+    }
   }
+  return process.cwd();
+}
 
-  try {
-    isDownloading = true;
-    currentQuality = quality;
-    currentOutputPath = outputPath;
-    downloadQueue = [...urls]; // 큐 초기화
-    
-    const ytDlpPath = getYtDlpPath();
-    
-    // yt-dlp 존재 확인
-    if (!fs.existsSync(ytDlpPath)) {
-      throw new Error('yt-dlp.exe를 찾을 수 없습니다. bin/ 폴더에 yt-dlp.exe 파일이 있는지 확인하세요.');
+// Python 실행 파일 (YTDL_PYTHON 환경 변수로 지정 가능)
+function getPythonPath(): string {
+  return process.env.YTDL_PYTHON || (process.platform === 'win32' ? 'python' : 'python3');
+}
+
+interface PendingCall {
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+}
+
+// Python 다운로드 데몬과 표준 입출력으로 JSON-RPC 2.0 메시지를 주고받는 클라이언트
+class EngineClient {
+  private process: ChildProcess | null = null;
+  private nextId = 1;
+  private pending = new Map<number, PendingCall>();
+  private buffer = '';
+
+  constructor(private onEvent: (event: any) => void) {}
+
+  start(): void {
+    if (this.process) return;
+
+    const child = spawn(getPythonPath(), ['-m', 'download_daemon', '--yt-dlp', getYtDlpPath()], {
+      cwd: getEngineDir(),
+      windowsHide: true,
+      env: { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONUNBUFFERED: '1' }
+    });
+    this.process = child;
+
+    child.stdout?.setEncoding('utf8');
+    child.stdout?.on('data', (data: string) => {
+      this.buffer += data;
+      let newline = this.buffer.indexOf('\n');
+      while (newline >= 0) {
+        const line = this.buffer.slice(0, newline).trim();
+        this.buffer = this.buffer.slice(newline + 1);
+        if (line) {
+          this.handleMessage(line);
+        }
+        newline = this.buffer.indexOf('\n');
+      }
+    });
+
+    child.stderr?.on('data', (data) => {
+      sendToRenderer('download-log', `[엔진] ${data.toString()}`);
+    });
+
+    const fail = (error: Error) => {
+      if (this.process !== child) return;
+      this.process = null;
+      this.buffer = '';
+      this.pending.forEach(call => call.reject(error));
+      this.pending.clear();
+    };
+    child.on('error', fail);
+    child.on('close', (code) => fail(new Error(`다운로드 엔진이 종료되었습니다. (종료 코드: ${code})`)));
+  }
+
+  call(method: string, params: object = {}): Promise<any> {
+    this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.process?.stdin?.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+    });
+  }
+
+  stop(): void {
+    if (!this.process) return;
+    // 입력을 닫으면 데몬이 상태를 저장하고 스스로 종료함
+    this.process.stdin?.end();
+    this.process = null;
+  }
+
+  private handleMessage(line: string): void {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      return;
     }
 
-    // 출력 폴더 생성
-    if (!fs.existsSync(outputPath)) {
-      fs.mkdirSync(outputPath, { recursive: true });
+    if (message.method === 'event') {
+      this.onEvent(message.params);
+      return;
     }
 
-    // 다운로드 시작 알림
-    if (mainWindow) {
-      mainWindow.webContents.send('download-started', { totalCount: downloadQueue.length });
+    const call = this.pending.get(message.id);
+    if (!call) return;
+    this.pending.delete(message.id);
+    if (message.error) {
+      call.reject(new Error(message.error.message));
+    } else {
+      call.resolve(message.result);
     }
+  }
+}
 
-    let successCount = 0;
-    let failCount = 0;
-    let processedIndex = 0;
-
-    // 큐가 비어있지 않은 동안 계속 다운로드
-    while (downloadQueue.length > 0) {
-      const url = downloadQueue.shift()!; // 큐에서 첫 번째 URL 가져오기
-      
-      if (mainWindow) {
-        mainWindow.webContents.send('download-progress', {
-          currentIndex: processedIndex,
-          totalCount: processedIndex + downloadQueue.length + 1,
-          currentUrl: url,
-          status: 'starting',
-          percentage: 0,
-          speed: 'N/A',
-          eta: 'N/A'
-        });
-      }
+let engineClient: EngineClient | null = null;
+
+function sendToRenderer(channel: string, data: any): void {
+  if (mainWindow) {
+    mainWindow.webContents.send(channel, data);
+  }
+}
 
-      const success = await downloadSingleVideo(url, currentQuality, currentOutputPath, processedIndex + 1, processedIndex + downloadQueue.length + 1);
-      
-      if (success) {
+// 데몬 이벤트를 기존 렌더러 IPC 이벤트로 변환
+// 엔진은 속도(바이트/초)와 남은 시간(초)을 숫자로 보내므로 화면용 문자열로 변환
+function formatSpeed(bytesPerSec: number | null | undefined): string {
+  if (!bytesPerSec) {
+    return 'N/A';
+  }
+  const units = ['B', 'KiB', 'MiB', 'GiB'];
+  let value = bytesPerSec;
+  let unit = 0;
+  while (value >= 1024 && unit < units.length - 1) {
+    value /= 1024;
+    unit++;
+  }
+  return `${value.toFixed(2)}${units[unit]}/s`;
+}
+
+function formatEta(seconds: number | null | undefined): string {
+  if (seconds === null || seconds === undefined) {
+    return 'N/A';
+  }
+  const total = Math.floor(seconds);
+  const hours = Math.floor(total / 3600);
+  const minutes = Math.floor((total % 3600) / 60);
+  const pad = (n: number) => String(n).padStart(2, '0');
+  return hours ? `${pad(hours)}:${pad(minutes)}:${pad(total % 60)}` : `${pad(minutes)}:${pad(total % 60)}`;
+}
+
+function handleEngineEvent(event: any): void {
+  switch (event.event) {
+    case 'log':
+      sendToRenderer('download-log', event.message);
+      break;
+    case 'job_start':
+      jobUrls.set(event.job_id, event.url);
+      sendToRenderer('download-progress', {
+        currentIndex: processedCount,
+        totalCount,
+        currentUrl: event.url,
+        status: 'starting',
+        percentage: 0,
+        speed: 'N/A',
+        eta: 'N/A'
+      });
+      break;
+    case 'progress':
+      sendToRenderer('download-progress', {
+        currentIndex: processedCount,
+        totalCount,
+        currentUrl: jobUrls.get(event.job_id) || '',
+        status: 'downloading',
+        percentage: event.percent === null ? undefined : Math.round(event.percent * 1000) / 10,
+        // 동시에 받는 작업 전체의 실제 바이트 수로 합산한 속도와 남은 시간
+        speed: formatSpeed(event.aggregate.speed),
+        eta: formatEta(event.aggregate.eta)
+      });
+      break;
+    case 'job_finish':
+      jobUrls.delete(event.job_id);
+      processedCount++;
+      if (event.success) {
         successCount++;
-        if (mainWindow) {
-          mainWindow.webContents.send('download-completed', { url, success: true });
-        }
       } else {
         failCount++;
-        if (mainWindow) {
-          mainWindow.webContents.send('download-completed', { url, success: false });
-        }
       }
-      
-      processedIndex++;
-    }
+      sendToRenderer('download-completed', { url: event.url, success: event.success });
+      break;
+    case 'job_retry':
+      // 엔진이 잠시 뒤 같은 URL을 새 작업으로 다시 시작함 (완료 수에는 세지 않음)
+      jobUrls.delete(event.job_id);
+      break;
+    case 'job_paused':
+      // .part 파일을 남겨 두고 멈춤 (resume으로 새 작업 번호에서 이어받음)
+      jobUrls.delete(event.job_id);
+      break;
+    case 'job_cancelled':
+      jobUrls.delete(event.job_id);
+      totalCount--;
+      break;
+    case 'metadata':
+      // 다운로드 전에 미리 가져온 영상 제목
+      sendToRenderer('download-log', `📝 ${event.title} (${event.url})`);
+      break;
+    case 'playlist_expanded':
+      // 재생목록 한 줄이 영상 여러 개로 바뀜
+      totalCount += event.queued - 1;
+      break;
+    case 'done':
+      // 중단한 이전 묶음의 done이 늦게 와도 새 묶음을 끝내지 않도록 실행 번호로 구분
+      if (currentRunId === null) {
+        earlyDoneRunIds.add(event.run_id);
+      } else if (event.run_id === currentRunId) {
+        finishDownload();
+      }
+      break;
+  }
+}
 
-    // 완료 알림
-    if (mainWindow) {
-      mainWindow.webContents.send('all-downloads-completed', {
-        successCount,
-        failCount,
-        totalCount: successCount + failCount
-      });
-    }
+function finishDownload(): void {
+  if (!isDownloading) return;
+  isDownloading = false;
 
-    // 시스템 알림
-    if (Notification.isSupported()) {
-      new Notification({
-        title: 'YouTube Downloader',
-        body: `다운로드 완료! 성공: ${successCount}개, 실패: ${failCount}개`
-      }).show();
-    }
+  sendToRenderer('all-downloads-completed', {
+    successCount,
+    failCount,
+    totalCount: successCount + failCount
+  });
 
-    isDownloading = false;
-    downloadQueue = []; // 큐 초기화
-    return { success: true, successCount, failCount };
+  // 시스템 알림
+  if (Notification.isSupported()) {
+    new Notification({
+      title: 'YouTube Downloader',
+      body: `다운로드 완료! 성공: ${successCount}개, 실패: ${failCount}개`
+    }).show();
+  }
+}
 
-  } catch (error) {
-    isDownloading = false;
-    downloadQueue = []; // 큐 초기화
-    return { success: false, error: error instanceof Error ? error.message : '알 수 없는 오류' };
+async function getEngineClient(): Promise<EngineClient> {
+  if (!engineClient) {
+    engineClient = new EngineClient(handleEngineEvent);
   }
-});
+  // 데몬이 (다시) 시작되었을 수 있으므로 구독은 매번 요청 (중복 구독은 무시됨)
+  await engineClient.call('subscribe');
+  return engineClient;
+}
 
-// 단일 비디오 다운로드
-function downloadSingleVideo(url: string, quality: string, outputPath: string, current: number, total: number): Promise<boolean> {
-  return new Promise((resolve) => {
+// 다운로드 시작 (다운로드 중이면 같은 큐에 추가)
+ipcMain.handle('start-download', async (_, urls: string[], quality: string, outputPath: string) => {
+  try {
     const ytDlpPath = getYtDlpPath();
-    
-    const args = [
-      '--newline',
-      '-o', path.join(outputPath, '%(uploader)s - %(title)s.%(ext)s'),
-      '--no-warnings',
-      '--encoding', 'utf-8',
-      '--no-check-certificate',
-      '--progress'
-    ];
-
-    // 품질 설정
-    if (quality === 'bestaudio/best') {
-      args.push('-x', '--audio-format', 'mp3', '--audio-quality', '192');
-    } else {
-      args.push('-f', quality);
-    }
 
-    args.push(url);
+    // yt-dlp 존재 확인
+    if (!fs.existsSync(ytDlpPath)) {
+      throw new Error('yt-dlp.exe를 찾을 수 없습니다. bin/ 폴더에 yt-dlp.exe 파일이 있는지 확인하세요.');
+    }
 
-    downloadProcess = spawn(ytDlpPath, args);
+    const client = await getEngineClient();
+
+    // 데몬 이벤트가 enqueue 응답보다 먼저 올 수 있으므로 새 묶음의 상태는 미리 초기화
+    const startingBatch = !isDownloading;
+    if (startingBatch) {
+      isDownloading = true;
+      processedCount = 0;
+      totalCount = 0;
+      successCount = 0;
+      failCount = 0;
+      jobUrls.clear();
+      currentRunId = null;
+      earlyDoneRunIds.clear();
+    }
 
-    let lastPercentage = 0;
-    
-    downloadProcess.stdout?.on('data', (data) => {
-      const output = data.toString();
-      
-      // 로그 전송
-      if (mainWindow && output.trim()) {
-        mainWindow.webContents.send('download-log', output);
-      }
-      
-      // 진행률 파싱
-      try {
-        // yt-dlp 표준 출력 형식: "[download]  45.2% of 10.5MiB at 1.5MiB/s ETA 00:30"
-        if (output.includes('[download]') && output.includes('%')) {
-          // 퍼센트 추출
-          const percentMatch = output.match(/(\d+\.?\d*)%/);
-          if (percentMatch) {
-            const percentage = parseFloat(percentMatch[1]);
-            
-            // 유효한 퍼센트이고 변화가 있을 때만 업데이트
-            if (!isNaN(percentage) && percentage >= 0 && percentage <= 100 && percentage !== lastPercentage) {
-              lastPercentage = percentage;
-              
-              // 속도 추출 (예: "at 1.5MiB/s")
-              let speed = 'N/A';
-              const speedMatch = output.match(/at\s+([\d.]+\s*[KMG]iB\/s)/i);
-              if (speedMatch) {
-                speed = speedMatch[1];
-              }
-              
-              // ETA 추출 (예: "ETA 00:30")
-              let eta = 'N/A';
-              const etaMatch = output.match(/ETA\s+([\d:]+)/i);
-              if (etaMatch) {
-                eta = etaMatch[1];
-              }
-              
-              // 진행률 전송
-              if (mainWindow) {
-                mainWindow.webContents.send('download-progress', {
-                  currentIndex: current - 1,
-                  totalCount: total,
-                  currentUrl: url,
-                  status: 'downloading',
-                  percentage,
-                  speed,
-                  eta
-                });
-              }
-            }
-          }
-        }
-        // "100% of" 패턴으로 완료 감지
-        else if (output.includes('100%') && output.includes('of')) {
-          if (mainWindow && lastPercentage < 100) {
-            lastPercentage = 100;
-            mainWindow.webContents.send('download-progress', {
-              currentIndex: current - 1,
-              totalCount: total,
-              currentUrl: url,
-              status: 'downloading',
-              percentage: 100,
-              speed: 'N/A',
-              eta: '00:00'
-            });
-          }
-        }
-      } catch (error) {
-        // 파싱 오류 무시
+    let result;
+    try {
+      result = await client.call('enqueue', {
+        urls,
+        settings: { output_path: outputPath, quality }
+      });
+    } catch (error) {
+      if (startingBatch) {
+        isDownloading = false;
       }
-    });
+      throw error;
+    }
+    totalCount += result.queued;
 
-    downloadProcess.stderr?.on('data', (data) => {
-      if (mainWindow) {
-        mainWindow.webContents.send('download-log', `[오류] ${data.toString()}`);
-      }
-    });
+    if (!startingBatch) {
+      return { success: true, message: '다운로드 큐에 추가되었습니다.' };
+    }
 
-    downloadProcess.on('close', (code) => {
-      downloadProcess = null;
-      resolve(code === 0);
-    });
+    if (result.queued === 0) {
+      isDownloading = false;
+      return { success: false, error: '새로 다운로드할 영상이 없습니다. (이미 받았거나 중복된 URL)' };
+    }
 
-    downloadProcess.on('error', (error) => {
-      if (mainWindow) {
-        mainWindow.webContents.send('download-log', `[오류] ${error.message}`);
-      }
-      downloadProcess = null;
-      resolve(false);
-    });
-  });
-}
+    currentRunId = result.run_id;
+    sendToRenderer('download-started', { totalCount });
+    // 아주 짧은 작업은 응답 전에 이미 끝났을 수 있음
+    if (earlyDoneRunIds.has(result.run_id)) {
+      finishDownload();
+    }
+    return { success: true };
+
+  } catch (error) {
+    return { success: false, error: error instanceof Error ? error.message : '알 수 없는 오류' };
+  }
+});
 
 // 다운로드 중단
 ipcMain.handle('stop-download', async () => {
-  if (downloadProcess) {
-    downloadProcess.kill();
-    downloadProcess = null;
+  if (engineClient) {
+    try {
+      await engineClient.call('cancel');
+    } catch (error) {
+      // 데몬이 이미 종료된 경우
+    }
   }
   isDownloading = false;
-  downloadQueue = []; // 큐 초기화
+  jobUrls.clear();
   return true;
 });
 
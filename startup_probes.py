@@ -0,0 +1,181 @@
+"""시작할 때 필요한 외부 프로그램 점검 (ffmpeg, yt-dlp 버전, yt-dlp 자동 업데이트)
+
+창을 띄우기 전에 프로세스를 실행하거나 네트워크를 쓰지 않도록 모든 점검을 백그라운드
+스레드에서 합니다. 점검 결과는 실행 파일 경로와 수정 시각/크기를 키로 디스크에 캐시하므로,
+프로그램이 바뀌지 않았다면 다음 실행부터는 프로세스를 띄우지 않고 바로 결과를 돌려줍니다.
+yt-dlp -U(네트워크 필요)는 update_interval마다 한 번만 실행합니다.
+
+    probes = StartupProbes(on_result=print)
+    probes.start()   # on_result('ffmpeg', {...}), on_result('yt-dlp', {...}), on_result('update', {...})
+"""
+import json
+import os
+import shutil
+import subprocess
+import time
+from threading import Thread, Lock
+
+from download_engine import APP_DATA_DIR, _atomic_write_json, _NO_WINDOW, find_yt_dlp
+
+PROBE_CACHE_FILE = os.path.join(APP_DATA_DIR, "probe_cache.json")
+PROBE_TIMEOUT = 15           # 버전 확인 프로세스 제한 시간 (초)
+UPDATE_TIMEOUT = 120         # yt-dlp -U 제한 시간 (초)
+DEFAULT_UPDATE_INTERVAL = 24 * 60 * 60  # yt-dlp 업데이트 확인 주기 (초). 0이면 확인하지 않음
+
+# update 결과의 state 값
+UPDATE_UP_TO_DATE = "up_to_date"
+UPDATE_UPDATED = "updated"
+UPDATE_FAILED = "failed"
+UPDATE_SKIPPED = "skipped"  # 주기가 아직 안 됐거나 실행 파일이 없음
+UPDATE_UNKNOWN = "unknown"  # 알아볼 수 없는 출력 (message를 그대로 기록)
+
+
+def _binary_signature(path):
+    """캐시 키로 쓰는 (경로, 수정 시각, 크기). 파일이 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [os.path.abspath(path), stat.st_mtime, stat.st_size]
+
+
+class ProbeCache:
+    """점검 결과를 JSON 파일 하나에 보관
+
+    {'probes': {이름: {'signature': [...], 'result': {...}}}, 'last_update_check': 타임스탬프,
+     'startup': {'first_window_ms': ...}}
+    """
+
+    def __init__(self, path=PROBE_CACHE_FILE):
+        self.path = path
+        self._lock = Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, encoding='utf-8') as cache_file:
+                    self._data = json.load(cache_file)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        try:
+            _atomic_write_json(self.path, self._data)
+        except OSError:
+            pass
+
+    def get(self, name, signature):
+        """signature가 저장된 것과 같을 때만 캐시된 결과를 반환"""
+        with self._lock:
+            entry = self._load().get('probes', {}).get(name)
+        if entry and signature and entry.get('signature') == signature:
+            return entry.get('result')
+        return None
+
+    def put(self, name, signature, result):
+        with self._lock:
+            probes = self._load().setdefault('probes', {})
+            probes[name] = {'signature': signature, 'result': result}
+            self._save()
+
+    def last_update_check(self):
+        with self._lock:
+            return self._load().get('last_update_check', 0)
+
+    def mark_update_checked(self, when=None):
+        with self._lock:
+            self._load()['last_update_check'] = time.time() if when is None else when
+            self._save()
+
+    def record_startup(self, first_window_ms):
+        """창이 처음 뜰 때까지 걸린 시간을 기록 (이전 값과 비교용)"""
+        with self._lock:
+            self._load()['startup'] = {'first_window_ms': first_window_ms, 'recorded_at': time.time()}
+            self._save()
+
+
+def probe_version(path):
+    """path -version / --version을 실행해 첫 줄(버전 문자열)을 반환. 실행할 수 없으면 None"""
+    for flag in ('-version', '--version'):
+        try:
+            result = subprocess.run([path, flag], capture_output=True, text=True, encoding='utf-8',
+                                    errors='replace', timeout=PROBE_TIMEOUT, creationflags=_NO_WINDOW)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip().splitlines()[0]
+    return None
+
+
+class StartupProbes:
+    """ffmpeg/yt-dlp 점검과 yt-dlp 업데이트를 백그라운드에서 실행하고 결과를 콜백으로 알림
+
+    on_result(name, result)는 점검 스레드에서 호출됩니다. name과 result:
+        'ffmpeg'  {'ok', 'path', 'version', 'cached'}
+        'yt-dlp'  {'ok', 'path', 'version', 'cached'}
+        'update'  {'state', 'message'}  (UPDATE_* 참고)
+    """
+
+    def __init__(self, on_result, cache=None, update_interval=DEFAULT_UPDATE_INTERVAL,
+                 ffmpeg_path=None, yt_dlp_path=None):
+        self.on_result = on_result
+        self.cache = cache if cache is not None else ProbeCache()
+        self.update_interval = update_interval
+        self.ffmpeg_path = ffmpeg_path
+        self.yt_dlp_path = yt_dlp_path
+
+    def start(self, force=False):
+        """점검 스레드 시작. force=True면 캐시를 무시하고 다시 확인 (업데이트 주기는 그대로)"""
+        thread = Thread(target=self._run, args=(force,), name="startup-probes", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, force):
+        ffmpeg_path = self.ffmpeg_path or shutil.which('ffmpeg')
+        self.on_result('ffmpeg', self._probe('ffmpeg', ffmpeg_path, force))
+        yt_dlp_path = self.yt_dlp_path or find_yt_dlp()
+        self.on_result('yt-dlp', self._probe('yt-dlp', yt_dlp_path, force))
+        self.on_result('update', self._check_update(yt_dlp_path))
+
+    def _probe(self, name, path, force):
+        signature = _binary_signature(path)
+        if signature is None:
+            return {'ok': False, 'path': path, 'version': None, 'cached': False}
+        if not force:
+            cached = self.cache.get(name, signature)
+            if cached is not None:
+                return dict(cached, cached=True)
+        version = probe_version(path)
+        result = {'ok': version is not None, 'path': path, 'version': version}
+        self.cache.put(name, signature, result)
+        return dict(result, cached=False)
+
+    def update_due(self):
+        if self.update_interval <= 0:
+            return False
+        return time.time() - self.cache.last_update_check() >= self.update_interval
+
+    def _check_update(self, yt_dlp_path):
+        if _binary_signature(yt_dlp_path) is None:
+            return {'state': UPDATE_SKIPPED, 'message': "yt-dlp 실행 파일을 찾을 수 없어 업데이트를 건너뜁니다."}
+        if not self.update_due():
+            return {'state': UPDATE_SKIPPED, 'message': "최근에 업데이트를 확인했으므로 건너뜁니다."}
+
+        # 오프라인이어도 매번 다시 시도하지 않도록 결과와 관계없이 확인 시각을 기록
+        self.cache.mark_update_checked()
+        try:
+            process = subprocess.run([yt_dlp_path, '-U'], capture_output=True, text=True, encoding='utf-8',
+                                     errors='replace', timeout=UPDATE_TIMEOUT, creationflags=_NO_WINDOW)
+        except (OSError, subprocess.SubprocessError) as e:
+            return {'state': UPDATE_FAILED, 'message': str(e)}
+        output = process.stdout.strip()
+        if process.returncode != 0:
+            return {'state': UPDATE_FAILED, 'message': process.stderr.strip() or output}
+        if "Updated yt-dlp to" in output:
+            # 실행 파일이 바뀌었으므로 다음 버전 점검은 새로 실행됨 (수정 시각이 캐시 키)
+            return {'state': UPDATE_UPDATED, 'message': output}
+        if "is up to date" in output:
+            return {'state': UPDATE_UP_TO_DATE, 'message': output}
+        return {'state': UPDATE_UNKNOWN, 'message': output}
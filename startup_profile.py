@@ -0,0 +1,72 @@
+"""시작 시간 측정 (python youtube_downloader_ui.py --profile-startup)
+
+모듈 import, 창 생성, 첫 화면 그리기까지 걸린 시간을 단계별로 기록해 표준 오류로 출력합니다.
+import 시간은 builtins.__import__를 감싸서 처음 불러오는 모듈마다 잽니다. 다른 모듈 안에서
+불러온 하위 모듈 시간은 바깥 import에 포함되므로, 목록은 UI 모듈이 직접 부른 import 기준입니다.
+
+이 모듈은 측정 대상보다 먼저 불러와야 하므로 표준 라이브러리 외에는 아무것도 불러오지 않습니다.
+"""
+import builtins
+import sys
+import time
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+REPORT_TOP_IMPORTS = 10  # 보고서에 보여 줄 느린 import 개수
+
+
+class StartupProfiler:
+    """시작 단계별 시간과 import 시간을 기록 (enabled=False면 아무것도 하지 않음)"""
+
+    def __init__(self, started_at=None, enabled=False):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.enabled = enabled
+        self.imports = []  # (모듈 이름, 초)
+        self.marks = []    # (단계 이름, 시작부터 초)
+        self._depth = 0
+        self._original_import = None
+        if enabled:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 이미 불러온 모듈이나 다른 import 안에서 일어난 import는 바깥 측정에 포함됨
+        if self._depth or level or name in sys.modules:
+            self._depth += 1
+            try:
+                return self._original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports.append((name, time.perf_counter() - started))
+
+    def stop_import_timing(self):
+        """import 측정 종료 (이후에는 원래 __import__ 사용)"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, name):
+        """지금까지 걸린 시간을 단계 이름으로 기록"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.started_at))
+
+    def report(self, file=None):
+        """기록한 시간을 사람이 읽는 표로 출력"""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        print("⏱️ 시작 시간 분석", file=file)
+        previous = 0.0
+        for name, elapsed in self.marks:
+            print(f"  {name:<12} {elapsed * 1000:8.1f}ms  (+{(elapsed - previous) * 1000:.1f}ms)", file=file)
+            previous = elapsed
+        if self.imports:
+            print(f"  느린 import (전체 {sum(t for _, t in self.imports) * 1000:.1f}ms):", file=file)
+            for name, elapsed in sorted(self.imports, key=lambda item: item[1], reverse=True)[:REPORT_TOP_IMPORTS]:
+                print(f"    {name:<28} {elapsed * 1000:8.1f}ms", file=file)
+        file.flush()
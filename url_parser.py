@@ -0,0 +1,167 @@
+"""YouTube URL 파싱 유틸리티
+
+UI/다운로드 엔진 어디서든 쓸 수 있도록 위젯 접근이나 로그 출력 없이 순수 함수로만
+구성합니다. 정규식은 모듈을 불러올 때 한 번만 컴파일합니다.
+"""
+import re
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+
+
+# 영상/재생목록 URL 본문 (비디오 ID는 정확히 11자)
+_URL_BODY = (
+    r'https?://(?:'
+    r'(?:www\.|m\.)?youtube\.com/(?:'
+    r'watch\?(?:\S*?&)?v=[\w-]{11}'
+    r'|playlist\?(?:\S*?&)?list=[\w-]+'
+    r'|shorts/[\w-]{11})'
+    r'|(?:www\.)?youtu\.be/[\w-]{11})'
+)
+_URL_RE = re.compile(_URL_BODY)
+# 입력창 한 줄: 앞 공백과 '3. ' 같은 번호는 건너뛰고 URL부터 줄 끝까지
+_LINE_URL_RE = re.compile(r'^[ \t]*(?:\d+\.[ \t]*)?(' + _URL_BODY + r'[^\n]*)', re.MULTILINE)
+# 예시 텍스트/플레이스홀더에만 나오는 표시
+_PLACEHOLDER_MARKERS = ("VIDEO_ID", "PLAYLIST_ID", "형식:")
+
+
+def _is_placeholder(url):
+    return any(marker in url for marker in _PLACEHOLDER_MARKERS)
+
+
+def canonical_url_key(url):
+    """YouTube URL을 중복 확인용 정규 키로 변환
+
+    youtu.be/ID, watch?v=ID&t=30, m.youtube.com, /shorts/ID 처럼 형태가 달라도
+    같은 영상이면 'video:ID', 재생목록이면 'playlist:ID'를 반환합니다.
+    알 수 없는 형식이면 앞뒤 공백만 제거한 URL을 그대로 반환합니다.
+    """
+    url = url.strip()
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url
+    host = (parsed.hostname or '').lower()
+    segments = [segment for segment in parsed.path.split('/') if segment]
+
+    video_id = None
+    if host.endswith('youtu.be'):
+        video_id = segments[0] if segments else None
+    elif host.endswith('youtube.com'):
+        if segments and segments[0] in ('shorts', 'live', 'embed') and len(segments) > 1:
+            video_id = segments[1]
+        elif segments == ['watch']:
+            video_id = parse_qs(parsed.query).get('v', [None])[0]
+        elif segments == ['playlist']:
+            playlist_id = parse_qs(parsed.query).get('list', [None])[0]
+            if playlist_id:
+                return f"playlist:{playlist_id}"
+
+    if video_id and len(video_id) >= 11:
+        return f"video:{video_id[:11]}"
+    return url
+
+
+def is_valid_youtube_url(url):
+    """YouTube URL 유효성 검사"""
+    # 예시 텍스트나 플레이스홀더는 무조건 제외
+    if not url or _is_placeholder(url):
+        return False
+    return _URL_RE.match(url) is not None
+
+
+def parse_url_line(line):
+    """입력창의 한 줄에서 번호('3. ')를 떼어낸 유효한 URL을 반환 (URL이 아니면 None)"""
+    match = _LINE_URL_RE.match(line)
+    if not match:
+        return None
+    url = match.group(1).rstrip()
+    return None if _is_placeholder(url) else url
+
+
+def parse_urls(text):
+    """여러 줄 텍스트에서 유효한 YouTube URL들을 순서대로 반환 (텍스트를 한 번만 훑음)"""
+    urls = []
+    for match in _LINE_URL_RE.finditer(text):
+        url = match.group(1).rstrip()
+        if not _is_placeholder(url):
+            urls.append(url)
+    return urls
+
+
+class URLListModel:
+    """URL 입력창 내용을 줄 단위로 파싱해 들고 있는 모델 (Tk와 무관)
+
+    update()는 이전 내용과 앞뒤로 같은 줄들을 건너뛰고 바뀐 구간의 줄만 다시
+    검사하므로, 만 줄이 들어 있어도 한 줄 입력/삭제 비용은 바뀐 줄 수에 비례합니다.
+    """
+
+    def __init__(self, parse_line=parse_url_line):
+        self._parse_line = parse_line
+        self.text = ""
+        self.lines = []    # 입력창의 원본 줄
+        self.parsed = []   # 줄마다 정리된 URL 또는 None
+        self.count = 0     # 유효한 URL 개수
+
+    def update(self, text):
+        """새 내용을 반영하고 새로 생긴 유효한 URL 목록을 반환
+
+        번호만 바뀐 줄처럼 같은 URL이 다시 파싱된 경우는 새 URL로 치지 않습니다.
+        """
+        if text == self.text:
+            return []
+        new_lines = text.split('\n') if text else []
+        old_lines = self.lines
+        limit = min(len(old_lines), len(new_lines))
+
+        start = 0
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+        tail = 0
+        while tail < limit - start and old_lines[-1 - tail] == new_lines[-1 - tail]:
+            tail += 1
+
+        removed = self.parsed[start:len(old_lines) - tail]
+        added = [self._parse_line(line) for line in new_lines[start:len(new_lines) - tail]]
+        self.parsed[start:len(old_lines) - tail] = added
+        self.text = text
+        self.lines = new_lines
+
+        added_urls = [url for url in added if url]
+        removed_urls = [url for url in removed if url]
+        self.count += len(added_urls) - len(removed_urls)
+        if not removed_urls:
+            return added_urls
+        remaining = Counter(removed_urls)
+        new_urls = []
+        for url in added_urls:
+            if remaining[url]:
+                remaining[url] -= 1
+            else:
+                new_urls.append(url)
+        return new_urls
+
+    def clear(self):
+        self.update("")
+
+    @property
+    def urls(self):
+        return [url for url in self.parsed if url]
+
+    def numbering_changes(self):
+        """번호가 맞지 않는 줄들의 (줄 인덱스, 고쳐 쓸 내용) 목록"""
+        changes = []
+        number = 0
+        for index, url in enumerate(self.parsed):
+            if url:
+                number += 1
+                expected = f"{number}. {url}"
+                if self.lines[index] != expected:
+                    changes.append((index, expected))
+        return changes
+
+    def find_line(self, key, key_func=canonical_url_key):
+        """정규 키가 같은 URL이 있는 첫 줄의 인덱스 (없으면 -1)"""
+        for index, url in enumerate(self.parsed):
+            if url and key_func(url) == key:
+                return index
+        return -1
@@ -1,12 +1,28 @@
+import time
+_STARTED_AT = time.perf_counter()  # 창이 처음 뜰 때까지 걸린 시간 측정용 (다른 import보다 먼저)
+
+import sys
+from startup_profile import PROFILE_STARTUP_FLAG, StartupProfiler
+startup_profiler = StartupProfiler(_STARTED_AT, enabled=PROFILE_STARTUP_FLAG in sys.argv)
+
 import customtkinter as ctk
-from tkinter import filedialog, messagebox
-import yt_dlp
+from tkinter import messagebox
 from threading import Thread, Event
+from collections import deque
+import queue
 import os
-import sys
+import re
 import subprocess
-import webbrowser
-import time
+import logging
+from logging.handlers import RotatingFileHandler
+from startup_probes import (
+    UPDATE_FAILED, UPDATE_SKIPPED, UPDATE_UNKNOWN, UPDATE_UPDATED, StartupProbes,
+)
+from url_parser import URLListModel, canonical_url_key, is_valid_youtube_url
+from download_engine import (
+    APP_DATA_DIR, BACKEND_INPROCESS, BACKEND_SUBPROCESS, DEFAULT_MAX_WORKERS, DEFAULT_OUTPUT_PATH,
+    DEFAULT_CONCURRENT_FRAGMENTS, DEFAULT_CONNECTION_BUDGET, DEFAULT_QUALITY, PRIORITY_HIGH, PRIORITY_NORMAL, DownloadEngine, find_yt_dlp, format_eta, format_metadata_text, format_speed, infer_log_level,
+)
 #모듈 업데이트 pip install --upgrade yt_dlp 
 # 테마 및 글꼴 설정
 ctk.set_appearance_mode("System")  # "System", "Dark", "Light"
@@ -19,6 +35,132 @@ BASE_FONT = "Malgun Gothic" # 기본 폰트
 TITLE_FONT_SIZE = 20
 BODY_FONT_SIZE = 12
 
+# --- FFmpeg 설치 도움말 (도움말 창을 처음 열 때 표시) ---
+FFMPEG_HELP_TEXT = """FFmpeg 설치 안내
+
+FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로그램입니다.
+고품질 영상/음성 병합이나 음성 추출(mp3 변환)을 위해 필요합니다.
+
+🔹 Windows 설치 방법:
+
+방법 1: winget (Windows 10/11 내장)
+1. Windows PowerShell 또는 명령 프롬프트를 관리자 권한으로 실행
+2. 다음 명령어 입력 후 실행:
+   winget install FFmpeg
+
+방법 2: Chocolatey (패키지 관리자)
+1. Chocolatey가 설치되어 있다면 다음 명령어 실행:
+   choco install ffmpeg
+
+방법 3: 수동 설치
+1. https://ffmpeg.org/download.html 방문
+2. Windows 아이콘 클릭 후, gyan.dev 빌드 다운로드
+3. 압축 해제 후 bin 폴더를 시스템 환경 변수 'Path'에 추가
+
+🔹 설치 확인:
+명령 프롬프트에서 'ffmpeg -version' 입력 시 버전 정보가 표시되면 성공입니다.
+
+🔹 FFmpeg 없이 사용 가능한 기능:
+- 최고 품질 (단일 파일) ✅
+- 720p, 480p 다운로드 ✅
+
+🔹 FFmpeg 필요한 기능:
+- 최고 품질 (병합) ⚠️
+- 음성만 추출 (mp3) ⚠️
+
+설치 후에는 프로그램을 재시작해야 적용됩니다.
+"""
+
+# --- yt-dlp 자동 업데이트 ---
+UPDATE_CHECK_INTERVAL_HOURS = 24  # 시작할 때 yt-dlp -U를 실행하는 최소 간격 (0이면 자동 업데이트 안 함)
+
+# --- 동시 다운로드 설정 ---
+MAX_WORKERS_CHOICES = ["1", "2", "3", "4", "5", "6", "8"]
+
+# --- 성능 설정 (작업당 연결 수, 외부 다운로더, 전체 연결 수 제한) ---
+FRAGMENT_CHOICES = ["1", "2", "4", "8", "16"]
+CONNECTION_BUDGET_CHOICES = ["4", "8", "16", "32"]
+EXTERNAL_DOWNLOADER_CHOICES = {
+    "yt-dlp 내장": None,
+    "aria2c (설치 필요)": "aria2c",
+}
+RATE_LIMIT_CHOICES = {  # 전체 속도 제한 (바이트/초). 다운로드 중에 바꿔도 바로 반영
+    "제한 없음": None,
+    "1 MiB/s": 1024 ** 2,
+    "5 MiB/s": 5 * 1024 ** 2,
+    "10 MiB/s": 10 * 1024 ** 2,
+    "50 MiB/s": 50 * 1024 ** 2,
+}
+
+# --- 다운로드 엔진 (백엔드) 선택 ---
+BACKEND_CHOICES = {
+    "yt-dlp.exe (외부 프로세스)": BACKEND_SUBPROCESS,
+    "yt_dlp 내장 (연결 재사용)": BACKEND_INPROCESS,
+}
+
+
+# --- 로그 설정 ---
+LOG_VIEW_MAX_LINES = 2000     # 로그 창에 표시하는 최대 줄 수
+LOG_BUFFER_MAX_LINES = 20000  # 필터링용으로 메모리에 보관하는 최대 줄 수 (링 버퍼)
+LOG_DIR = os.path.join(APP_DATA_DIR, "logs")
+LOG_FILE_MAX_BYTES = 2 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+LOG_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+LOG_LEVEL_FILTERS = {  # 로그 창 필터 표시 이름 -> 최소 수준
+    "전체": logging.DEBUG,
+    "경고 이상": logging.WARNING,
+    "오류만": logging.ERROR,
+}
+
+file_logger = logging.getLogger("youtube_downloader")
+
+
+def _setup_file_logging():
+    """전체 로그를 크기 제한이 있는 회전 파일로 기록 (실패해도 앱은 계속 동작)"""
+    if file_logger.handlers:
+        return
+    file_logger.setLevel(logging.DEBUG)
+    file_logger.propagate = False
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(os.path.join(LOG_DIR, "downloader.log"), maxBytes=LOG_FILE_MAX_BYTES,
+                                      backupCount=LOG_FILE_BACKUP_COUNT, encoding='utf-8')
+    except OSError:
+        file_logger.addHandler(logging.NullHandler())
+        return
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    file_logger.addHandler(handler)
+
+
+# --- UI 이벤트 버스 ---
+URL_RENUMBER_BATCH_LINES = 200  # 번호를 고칠 줄이 이보다 많으면 입력창을 한 번에 다시 씀
+UI_TICK_MS = 50  # 워커 → UI 이벤트를 모아서 그리는 주기 (ms)
+
+
+class UIEventBus:
+    """워커 스레드에서 UI로 보내는 모든 요청을 모으는 스레드 안전 큐
+
+    워커는 post()만 하고 위젯에는 손대지 않습니다. Tk 스레드가 UI_TICK_MS마다
+    drain()으로 쌓인 이벤트를 한꺼번에 꺼내 한 번에 그립니다.
+    """
+
+    def __init__(self):
+        self._events = queue.SimpleQueue()
+
+    def post(self, kind, *args):
+        self._events.put((kind, args))
+
+    def drain(self):
+        """지금까지 쌓인 이벤트를 모두 꺼내 순서대로 반환"""
+        events = []
+        try:
+            while True:
+                events.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+
 class YouTubeDownloaderUI(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -31,101 +173,246 @@ class YouTubeDownloaderUI(ctk.CTk):
         self.body_font = ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE)
         self.small_font = ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE - 2)
 
-        # 다운로드 상태 및 중단 이벤트
+        # 다운로드 상태
         self.download_thread = None
-        self.stop_event = Event()
-        
-        # 동적 URL 큐 관리
-        self.download_queue = []  # 다운로드 대기 중인 URL 목록
-        self.processed_urls = set()  # 이미 처리 중이거나 완료된 URL 목록
         self.is_downloading = False  # 다운로드 진행 중 여부
-        self.queue_lock = Thread().lock if hasattr(Thread(), 'lock') else None
-        from threading import Lock
-        self.queue_lock = Lock()
+
+        # 다운로드 엔진: 큐, 완료 기록, 재생목록 펼치기, 워커 풀 (UI와 분리되어 헤드리스로도 동작)
+        self.engine = DownloadEngine(
+            on_event=self._on_engine_event,
+            refill_queue=lambda: self._call_on_ui_thread(self._update_queue_from_textbox),
+        )
+        self.download_settings = {}  # 이번 다운로드의 경로/품질 (이어받기용)
+
+        # URL 입력창 파싱 결과 (텍스트 변경 이벤트마다 바뀐 줄만 다시 검사)
+        self.url_model = URLListModel()
+        self._url_sync_pending = False
+        self._url_renumber_job = None
+
+        # 워커 스레드 → UI 메시지 (Tk 스레드에서 주기적으로 모아서 처리)
+        self.ui_events = UIEventBus()
+
+        # 로그: 메모리 링 버퍼 + 회전 파일 (로그 창은 필터에 맞는 마지막 일부만 표시)
+        _setup_file_logging()
+        self.log_records = deque(maxlen=LOG_BUFFER_MAX_LINES)  # (levelno, job_id, message)
+        self.log_view_lines = 0
+        self.log_min_level = logging.DEBUG
+        self.log_job_filter = None
+
+        # 작업별 진행률 줄
+        self.job_rows = {}  # job_id -> (label, progress_bar, 우선 버튼, 일시정지 버튼, 취소 버튼)
+        self.job_keys = {}  # job_id -> URL 키 (미리 가져온 영상 정보를 찾을 때 사용)
+        self.video_captions = {}  # URL 키 -> '제목 (크기, 길이)'
+        self.transfer_stats = None  # 엔진이 합산한 전체 속도/남은 시간 (DownloadEngine.throughput)
+        self.ffmpeg_help_window = None  # 처음 열 때 만듦
 
         self.create_widgets()
-        self.check_ffmpeg_status()
 
-        # yt-dlp.exe 자동 업데이트 시작
-        Thread(target=self.run_yt_dlp_update, daemon=True).start()
+        # ffmpeg/yt-dlp 점검과 yt-dlp.exe 자동 업데이트는 창을 띄운 뒤 백그라운드에서 (결과는 디스크에 캐시)
+        self.startup_probes = StartupProbes(
+            on_result=lambda name, result: self._post_ui(self._on_probe_result, name, result),
+            update_interval=UPDATE_CHECK_INTERVAL_HOURS * 60 * 60,
+            yt_dlp_path=self._get_yt_dlp_path(),
+        )
+        self.startup_probes.start()
+        self.after_idle(self._record_first_window)
 
-    def check_ffmpeg_status(self):
-        """FFmpeg 설치 상태 확인"""
-        try:
-            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            self.ffmpeg_status.set("✅ FFmpeg 설치됨")
-            self.ffmpeg_label.configure(text_color="green")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            self.ffmpeg_status.set("❌ FFmpeg 미설치")
-            self.ffmpeg_label.configure(text_color="red")
-            self.log_message("⚠️ FFmpeg가 설치되지 않았습니다. 일부 기능이 제한됩니다.")
-            self.log_message("📋 FFmpeg 설치 방법은 '도움말' 버튼을 클릭하세요.")
+        # 이전 실행에서 끝내지 못한 다운로드가 있으면 이어받기 제안
+        self.after(500, self._offer_resume)
 
-    def _get_yt_dlp_path(self):
-        """Determines the path to yt-dlp.exe based on the execution context."""
-        if getattr(sys, 'frozen', False):
-            # Running in a PyInstaller bundle (frozen)
-            if hasattr(sys, '_MEIPASS'):
-                # This is a one-file build, files are in the temp _MEIPASS dir
-                base_path = sys._MEIPASS
-            else:
-                # This is a one-folder build, files are relative to the executable
-                base_path = os.path.dirname(sys.executable)
-
-            # Based on the build, yt-dlp.exe seems to be in an '_internal' folder
-            # Let's check there first.
-            internal_path = os.path.join(base_path, '_internal', 'yt-dlp.exe')
-            if os.path.exists(internal_path):
-                return internal_path
-
-            # As a fallback, check the base path directly. This is the expected
-            # location for one-file builds and some one-folder configurations.
-            fallback_path = os.path.join(base_path, 'yt-dlp.exe')
-            return fallback_path
-        else:
-            # Running in a normal Python environment
-            # Assumes yt-dlp.exe is in the project root.
-            return 'yt-dlp.exe'
+        self.after(UI_TICK_MS, self._process_ui_events)
 
-    def run_yt_dlp_update(self):
-        """Checks for and applies updates to yt-dlp.exe."""
-        self.log_message("🔄 yt-dlp.exe 업데이트를 확인합니다...")
-        yt_dlp_path = self._get_yt_dlp_path()
+    def _post_ui(self, func, *args):
+        """func(*args)를 Tk 스레드에서 실행하도록 예약 (어느 스레드에서나 호출 가능)"""
+        self.ui_events.post('call', func, args)
 
-        if not yt_dlp_path or not os.path.exists(yt_dlp_path):
-            self.log_message("ℹ️ yt-dlp.exe를 찾을 수 없어 업데이트를 건너뜁니다.")
-            return
+    def _call_on_ui_thread(self, func, timeout=2.0):
+        """func()를 Tk 스레드에서 실행하고 끝날 때까지 기다림 (워커 스레드 전용)"""
+        done = Event()
+
+        def run():
+            try:
+                func()
+            finally:
+                done.set()
 
+        self._post_ui(run)
+        done.wait(timeout)
+
+    def _process_ui_events(self):
+        """쌓인 UI 이벤트를 한 번에 처리 (Tk 스레드, UI_TICK_MS마다)"""
         try:
-            process = subprocess.run(
-                [yt_dlp_path, '-U'],
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8',
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            
-            output = process.stdout
-            if "is up to date" in output:
-                self.log_message("✅ yt-dlp.exe가 이미 최신 버전입니다.")
-            elif "Updated yt-dlp to" in output:
-                self.log_message("✨ yt-dlp.exe가 성공적으로 업데이트되었습니다!")
-                self.after(100, lambda: messagebox.showinfo("업데이트 완료", "yt-dlp.exe가 최신 버전으로 업데이트되었습니다."))
-            else:
-                # Log the output for inspection if it's unexpected
-                self.log_message(f"[yt-dlp-update] {output.strip()}")
+            log_records = []
+            progress = {}  # job_id -> (percent, text): 같은 작업은 마지막 값만 그림
+            aggregate = None  # 마지막 전체 속도/남은 시간
+            for kind, args in self.ui_events.drain():
+                if kind == 'log':
+                    log_records.append(args)
+                elif kind == 'progress':
+                    job_id, percent, text, aggregate = args
+                    progress[job_id] = (percent, text)
+                elif kind == 'call':
+                    func, call_args = args
+                    func(*call_args)
+
+            for job_id, (percent, text) in progress.items():
+                if job_id is None:
+                    self.current_progress_bar.configure(mode='determinate')
+                    if percent is not None:
+                        self.current_progress_bar.set(percent)
+                    self.current_progress_var.set(text)
+                else:
+                    self._update_job_row(job_id, percent, text)
+            if aggregate is not None:
+                self.transfer_stats = aggregate
+                self._update_overall_status()
 
-        except subprocess.CalledProcessError as e:
-            self.log_message(f"❌ yt-dlp.exe 업데이트 중 오류 발생: {e.stderr}")
-            self.after(100, lambda: messagebox.showerror("업데이트 오류", f"yt-dlp.exe 업데이트에 실패했습니다.\n{e.stderr}"))
+            if log_records:
+                self._append_log_records(log_records)
         except Exception as e:
-            self.log_message(f"❌ 예상치 못한 오류 발생: {e}")
+            print(f"UI 이벤트 처리 오류: {e}", file=sys.stderr)
+        finally:
+            self.after(UI_TICK_MS, self._process_ui_events)
+
+    def _on_engine_event(self, event):
+        """다운로드 엔진 이벤트를 UI 이벤트로 변환 (워커 스레드에서 호출됨)"""
+        kind = event['event']
+        if kind == 'log':
+            self.log_message(event['message'], level=event['level'], job_id=event['job_id'])
+        elif kind == 'progress':
+            self.ui_events.post('progress', event['job_id'], event['percent'], event['text'], event['aggregate'])
+        elif kind == 'job_start':
+            self._post_ui(self._create_job_row, event['job_id'], event['url'])
+            self._post_ui(self._update_overall_status)
+        elif kind == 'job_finish':
+            if event['success']:
+                # 성공한 URL을 텍스트박스에서 제거
+                self._post_ui(self._remove_completed_url, event['url'])
+            self._post_ui(self._remove_job_row, event['job_id'])
+            self._post_ui(self._update_overall_status)
+        elif kind == 'job_retry':
+            # 잠시 뒤 새 작업 번호로 다시 시작하므로 지금 줄은 지움 (URL은 입력창에 남김)
+            self._post_ui(self._remove_job_row, event['job_id'])
+            self._post_ui(self._update_overall_status)
+        elif kind == 'job_paused':
+            self._post_ui(self._on_job_paused, event['job_id'])
+            self._post_ui(self._update_overall_status)
+        elif kind == 'job_resumed':
+            # 새 작업 번호로 다시 시작하므로 일시정지했던 줄은 지움
+            self._post_ui(self._remove_job_row, event['job_id'])
+        elif kind == 'job_cancelled':
+            self._post_ui(self._remove_completed_url, event['url'])
+            self._post_ui(self._remove_job_row, event['job_id'])
+            self._post_ui(self._update_overall_status)
+        elif kind == 'postprocess' and event['state'] == 'queued':
+            # 다운로드 슬롯은 이미 다음 작업으로 넘어갔고, 이 줄은 변환이 끝날 때까지 남겨 둠
+            self.ui_events.post('progress', event['job_id'], None, "🎵 mp3 변환 대기/진행 중...", None)
+        elif kind == 'disk_wait':
+            # 공간이 생길 때까지 대기 중으로 셈 (이유는 로그에 남음)
+            self._post_ui(self._update_overall_status)
+        elif kind == 'metadata':
+            self._post_ui(self._on_metadata, event['url'], format_metadata_text(event))
+        elif kind == 'playlist_expanded':
+            # 재생목록 줄은 영상들로 대체되었으므로 텍스트박스에서 제거
+            self._post_ui(self._remove_completed_url, event['url'])
+            self._post_ui(self._update_overall_status)
+
+    def save_queue_state(self):
+        """종료 직전에 현재 큐 상태를 즉시 저장"""
+        self.engine.save_state()
+
+    def _offer_resume(self):
+        """저장된 큐가 있으면 복원해서 이어받을지 묻기"""
+        state = self.engine.queue_state.load()
+        if not state:
+            return
+
+        urls = [job['url'] for job in state['jobs'] if job.get('url')]
+        partial_count = sum(1 for job in state['jobs'] if job.get('state') == 'active')
+        message = f"이전에 끝나지 않은 다운로드 {len(urls)}개가 있습니다."
+        if partial_count:
+            message += f"\n(이 중 {partial_count}개는 받다가 중단된 파일이 있어 이어서 받습니다.)"
+        if not messagebox.askyesno("다운로드 이어받기", message + "\n\n이어서 다운로드하시겠습니까?"):
+            self.engine.queue_state.clear()
+            return
+
+        # 같은 경로/품질이어야 .part 파일을 이어받을 수 있으므로 설정도 복원
+        settings = state.get('settings') or {}
+        if settings.get('output_path'):
+            self.path_var.set(settings['output_path'])
+        if settings.get('quality'):
+            self.quality_var.set(settings['quality'])
+        if settings.get('staging_path'):
+            self.staging_var.set(settings['staging_path'])
+
+        self.url_textbox.delete("1.0", "end")
+        self.url_textbox.insert("1.0", '\n'.join(urls))
+        self.url_textbox.configure(text_color=("black", "white"))
+        self._update_url_numbers()
+        self.log_message(f"♻️ 저장된 다운로드 큐 {len(urls)}개를 복원했습니다.")
+        self.start_download()
+
+    def check_ffmpeg_status(self):
+        """FFmpeg/yt-dlp 설치 상태를 캐시 없이 다시 확인"""
+        self.ffmpeg_status.set("확인 중...")
+        self.ffmpeg_label.configure(text_color="gray")
+        self.startup_probes.start(force=True)
+
+    def _record_first_window(self):
+        """프로그램 시작부터 창이 처음 그려질 때까지 걸린 시간 기록"""
+        elapsed_ms = round((time.perf_counter() - _STARTED_AT) * 1000)
+        self.log_message(f"⏱️ 창 표시까지 {elapsed_ms}ms", level="debug")
+        Thread(target=self.startup_probes.cache.record_startup, args=(elapsed_ms,), daemon=True).start()
+        if startup_profiler.enabled:
+            # --profile-startup: 첫 화면까지의 시간을 출력하고 종료
+            startup_profiler.mark("첫 화면")
+            startup_profiler.report()
+            self.after(0, self.destroy)
+
+    def _on_probe_result(self, name, result):
+        """시작 점검 결과를 화면에 반영 (UI 스레드에서 호출)"""
+        if name == 'ffmpeg':
+            if result['ok']:
+                self.ffmpeg_status.set("✅ FFmpeg 설치됨")
+                self.ffmpeg_label.configure(text_color="green")
+            else:
+                self.ffmpeg_status.set("❌ FFmpeg 미설치")
+                self.ffmpeg_label.configure(text_color="red")
+                self.log_message("⚠️ FFmpeg가 설치되지 않았습니다. 일부 기능이 제한됩니다.")
+                self.log_message("📋 FFmpeg 설치 방법은 '도움말' 버튼을 클릭하세요.")
+        elif name == 'yt-dlp':
+            if result['ok']:
+                self.log_message(f"ℹ️ yt-dlp {result['version']}", level="debug")
+            else:
+                self.log_message("⚠️ yt-dlp.exe를 실행할 수 없습니다. 다운로드가 실패할 수 있습니다.", level="warning")
+        elif name == 'update':
+            self._on_yt_dlp_update(result)
+
+    def _get_yt_dlp_path(self):
+        """Determines the path to yt-dlp.exe based on the execution context."""
+        return find_yt_dlp()
+
+    def _on_yt_dlp_update(self, result):
+        """yt-dlp.exe 자동 업데이트 결과 표시 (UI 스레드에서 호출)"""
+        state, output = result['state'], result['message']
+        if state == UPDATE_SKIPPED:
+            self.log_message(f"ℹ️ {output}", level="debug")
+        elif state == UPDATE_UPDATED:
+            self.log_message("✨ yt-dlp.exe가 성공적으로 업데이트되었습니다!")
+            messagebox.showinfo("업데이트 완료", "yt-dlp.exe가 최신 버전으로 업데이트되었습니다.")
+        elif state == UPDATE_FAILED:
+            # 오프라인일 수 있으므로 대화상자 없이 기록만 (다음 확인 주기에 다시 시도)
+            self.log_message(f"❌ yt-dlp.exe 업데이트 중 오류 발생: {output}", level="warning")
+        elif state == UPDATE_UNKNOWN:
+            self.log_message(f"[yt-dlp-update] {output}")
+        else:
+            self.log_message("✅ yt-dlp.exe가 이미 최신 버전입니다.")
 
     def check_and_update_yt_dlp(self):
         """yt-dlp 업데이트 페이지를 엽니다."""
         self.log_message("🌐 yt-dlp 업데이트 페이지를 엽니다...")
         try:
+            import webbrowser  # 버튼을 누를 때만 필요 (시작 시간 단축)
             webbrowser.open("https://github.com/yt-dlp/yt-dlp/releases/latest")
             self.log_message("✅ 브라우저에서 최신 버전을 다운로드하고 exe 파일을 교체해주세요.")
             messagebox.showinfo("업데이트 안내", "웹 브라우저에서 yt-dlp 최신 릴리스 페이지가 열립니다.\n\n1. 'yt-dlp.exe' 파일을 다운로드하세요.\n2. 현재 프로그램이 있는 폴더의 'yt-dlp.exe'를 다운로드한 새 파일로 교체하세요.")
@@ -147,6 +434,7 @@ class YouTubeDownloaderUI(ctk.CTk):
         self._create_url_input(main_frame)
         self._create_path_selection(main_frame)
         self._create_quality_options(main_frame)
+        self._create_performance_options(main_frame)
 
         # 컨트롤 프레임
         control_frame = ctk.CTkFrame(self, corner_radius=10)
@@ -169,8 +457,8 @@ class YouTubeDownloaderUI(ctk.CTk):
 
         # 초기 메시지
         self.log_message("🚀 YouTube Downloader 준비 완료!")
-        self.log_message("📝 최대 10개의 YouTube URL을 입력하고 다운로드 버튼을 클릭하세요.")
-        self.log_message("💡 한 줄에 하나씩 URL을 입력하면 순차적으로 다운로드됩니다.")
+        self.log_message("📝 YouTube URL을 입력하고 다운로드 버튼을 클릭하세요.")
+        self.log_message("💡 한 줄에 하나씩 URL을 입력하면 설정한 개수만큼 동시에 다운로드됩니다.")
 
     def _create_header(self, parent):
         header_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -197,8 +485,8 @@ class YouTubeDownloaderUI(ctk.CTk):
         url_label_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10)
         url_label_frame.columnconfigure(1, weight=1)
         
-        ctk.CTkLabel(url_label_frame, text="📋 YouTube URL 입력 (최대 10개):", font=self.body_font).grid(row=0, column=0, sticky="w")
-        self.url_count_label = ctk.CTkLabel(url_label_frame, text="0/10", font=self.small_font, text_color="gray")
+        ctk.CTkLabel(url_label_frame, text="📋 YouTube URL 입력:", font=self.body_font).grid(row=0, column=0, sticky="w")
+        self.url_count_label = ctk.CTkLabel(url_label_frame, text="0개", font=self.small_font, text_color="gray")
         self.url_count_label.grid(row=0, column=1, sticky="e")
         
         # URL 입력 안내 프레임
@@ -229,7 +517,6 @@ class YouTubeDownloaderUI(ctk.CTk):
         # 이벤트 바인딩
         self.url_textbox.bind("<FocusIn>", self._on_url_focus_in)
         self.url_textbox.bind("<FocusOut>", self._on_url_focus_out)
-        self.url_textbox.bind("<KeyRelease>", self._update_url_count)
         self.url_textbox.bind("<Enter>", self._on_url_hover_in)
         self.url_textbox.bind("<Leave>", self._on_url_hover_out)
         
@@ -243,9 +530,9 @@ class YouTubeDownloaderUI(ctk.CTk):
         self.url_textbox.bind("<Return>", self._on_enter_key)
         self.url_textbox.bind("<Key>", self._on_key_press)
         
-        # 텍스트 변경 감지를 위한 추가 모니터링
-        self._last_text_content = ""
-        self._monitor_text_changes()
+        # 텍스트 변경 감지 (폴링 대신 Tk의 <<Modified>> 이벤트 사용)
+        self.url_textbox.bind("<<Modified>>", self._on_url_text_modified)
+        self.url_textbox.edit_modified(False)
 
     def _create_path_selection(self, parent):
         ctk.CTkLabel(parent, text="다운로드 경로:", font=self.body_font).grid(row=3, column=0, sticky="w", padx=10)
@@ -271,7 +558,7 @@ class YouTubeDownloaderUI(ctk.CTk):
         
         ctk.CTkLabel(quality_frame, text="품질 설정", font=ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE, weight="bold")).grid(row=0, column=0, sticky="w", padx=10, pady=(5,5))
 
-        self.quality_var = ctk.StringVar(value="bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best")
+        self.quality_var = ctk.StringVar(value=DEFAULT_QUALITY)
         quality_options = [
             ("최고 품질 (단일 파일) - 권장", "best[ext=mp4]/best", False),
             ("최고 품질 (병합) - FFmpeg 필요", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best", True),
@@ -286,6 +573,66 @@ class YouTubeDownloaderUI(ctk.CTk):
             rb = ctk.CTkRadioButton(quality_frame, text=text, variable=self.quality_var, value=value, font=self.body_font)
             rb.grid(row=i + 1, column=0, sticky="w", padx=15, pady=3)
 
+    def _create_performance_options(self, parent):
+        # 변수는 다운로드 설정에서 읽으므로 바로 만들고, 자주 쓰지 않는 위젯은 처음 펼칠 때 만듦
+        self.fragments_var = ctk.StringVar(value=str(DEFAULT_CONCURRENT_FRAGMENTS))
+        self.external_downloader_var = ctk.StringVar(value=next(iter(EXTERNAL_DOWNLOADER_CHOICES)))
+        self.connection_budget_var = ctk.StringVar(value=str(DEFAULT_CONNECTION_BUDGET))
+        self.rate_limit_var = ctk.StringVar(value=next(iter(RATE_LIMIT_CHOICES)))
+        self.stream_audio_var = ctk.BooleanVar(value=False)
+        self.staging_var = ctk.StringVar(value="")
+
+        self.performance_frame = ctk.CTkFrame(parent)
+        self.performance_frame.grid(row=6, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
+        self.performance_toggle = ctk.CTkButton(
+            self.performance_frame, text="▸ 성능 설정", anchor="w", fg_color="transparent", text_color=("black", "white"),
+            hover=False, command=self._toggle_performance_options,
+            font=ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE, weight="bold"),
+        )
+        self.performance_toggle.grid(row=0, column=0, sticky="w", padx=5, pady=(5, 5))
+        self.performance_body = None
+
+    def _toggle_performance_options(self):
+        """성능 설정 펼치기/접기 (위젯은 처음 펼칠 때 한 번만 만듦)"""
+        if self.performance_body is None:
+            self.performance_body = self._build_performance_body(self.performance_frame)
+        elif self.performance_body.winfo_manager():
+            self.performance_body.grid_remove()
+            self.performance_toggle.configure(text="▸ 성능 설정")
+            return
+        self.performance_body.grid(row=1, column=0, sticky="ew")
+        self.performance_toggle.configure(text="▾ 성능 설정")
+
+    def _build_performance_body(self, parent):
+        body = ctk.CTkFrame(parent, fg_color="transparent")
+
+        ctk.CTkLabel(body, text="작업당 연결 수:", font=self.body_font).grid(row=0, column=0, sticky="w", padx=(15, 5), pady=(0, 5))
+        ctk.CTkOptionMenu(body, variable=self.fragments_var, values=FRAGMENT_CHOICES, width=70, font=self.body_font).grid(row=0, column=1, sticky="w", padx=5, pady=(0, 5))
+
+        ctk.CTkLabel(body, text="다운로더:", font=self.body_font).grid(row=0, column=2, sticky="w", padx=(15, 5), pady=(0, 5))
+        ctk.CTkOptionMenu(body, variable=self.external_downloader_var, values=list(EXTERNAL_DOWNLOADER_CHOICES), width=150, font=self.body_font).grid(row=0, column=3, sticky="w", padx=5, pady=(0, 5))
+
+        # 동시 다운로드 수 × 작업당 연결 수가 이 값을 넘으면 엔진이 연결 수를 줄임
+        ctk.CTkLabel(body, text="전체 최대 연결:", font=self.body_font).grid(row=0, column=4, sticky="w", padx=(15, 5), pady=(0, 5))
+        ctk.CTkOptionMenu(body, variable=self.connection_budget_var, values=CONNECTION_BUDGET_CHOICES, width=70, font=self.body_font).grid(row=0, column=5, sticky="w", padx=5, pady=(0, 5))
+
+        ctk.CTkLabel(body, text="전체 속도 제한:", font=self.body_font).grid(row=1, column=0, sticky="w", padx=(15, 5), pady=(0, 5))
+        ctk.CTkOptionMenu(body, variable=self.rate_limit_var, values=list(RATE_LIMIT_CHOICES), width=110, font=self.body_font, command=self._on_rate_limit_changed).grid(row=1, column=1, sticky="w", padx=5, pady=(0, 5))
+
+        # mp3: 음성 원본을 파일로 받지 않고 ffmpeg로 바로 변환 (디스크 사용량 절반, 중단 시 처음부터)
+        ctk.CTkCheckBox(body, text="mp3 스트리밍 변환 (임시 파일 없음)", variable=self.stream_audio_var, font=self.body_font).grid(row=1, column=2, columnspan=4, sticky="w", padx=(15, 5), pady=(0, 5))
+
+        # 저장 폴더가 네트워크 드라이브/HDD일 때: .part 파일과 병합은 빠른 디스크에서, 완성된 파일만 옮김
+        ctk.CTkLabel(body, text="임시 작업 폴더:", font=self.body_font).grid(row=2, column=0, sticky="w", padx=(15, 5), pady=(0, 5))
+        ctk.CTkEntry(body, textvariable=self.staging_var, placeholder_text="비워 두면 저장 폴더에 바로 씀", font=self.body_font).grid(row=2, column=1, columnspan=4, sticky="ew", padx=5, pady=(0, 5))
+        ctk.CTkButton(body, text="찾아보기", width=100, command=self.browse_staging_folder, font=self.body_font).grid(row=2, column=5, sticky="w", padx=5, pady=(0, 5))
+        return body
+
+    def _on_rate_limit_changed(self, choice):
+        """다운로드 중에 속도 제한을 바꾸면 실행 중인 작업들의 몫을 바로 다시 나눔"""
+        if self.is_downloading:
+            self.engine.set_rate_limit(RATE_LIMIT_CHOICES.get(choice))
+
     def _create_controls(self, parent):
         button_frame = ctk.CTkFrame(parent, fg_color="transparent")
         button_frame.grid(row=0, column=0, padx=10, pady=5, sticky="ew")
@@ -300,6 +647,23 @@ class YouTubeDownloaderUI(ctk.CTk):
         self.clear_button = ctk.CTkButton(button_frame, text="로그 지우기", command=self.clear_log, fg_color="gray", hover_color="#616161", font=self.body_font)
         self.clear_button.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
+        worker_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        worker_frame.grid(row=1, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+        ctk.CTkLabel(worker_frame, text="동시 다운로드 수:", font=self.body_font).grid(row=0, column=0, sticky="w", padx=5)
+        self.max_workers_var = ctk.StringVar(value=str(DEFAULT_MAX_WORKERS))
+        self.max_workers_menu = ctk.CTkOptionMenu(worker_frame, variable=self.max_workers_var, values=MAX_WORKERS_CHOICES, width=70, font=self.body_font)
+        self.max_workers_menu.grid(row=0, column=1, sticky="w", padx=5)
+
+        ctk.CTkLabel(worker_frame, text="다운로드 엔진:", font=self.body_font).grid(row=0, column=2, sticky="w", padx=(15, 5))
+        self.backend_var = ctk.StringVar(value=next(iter(BACKEND_CHOICES)))
+        self.backend_menu = ctk.CTkOptionMenu(worker_frame, variable=self.backend_var, values=list(BACKEND_CHOICES), width=200, font=self.body_font)
+        self.backend_menu.grid(row=0, column=3, sticky="w", padx=5)
+
+        self.skip_archived_var = ctk.BooleanVar(value=True)
+        self.skip_archived_check = ctk.CTkCheckBox(worker_frame, text="이미 받은 영상 건너뛰기", variable=self.skip_archived_var, font=self.body_font)
+        self.skip_archived_check.grid(row=0, column=4, sticky="w", padx=(15, 5))
+
     def _create_progress_display(self, parent):
         # 전체 진행률
         self.overall_progress_var = ctk.StringVar(value="대기 중...")
@@ -318,12 +682,147 @@ class YouTubeDownloaderUI(ctk.CTk):
         self.current_progress_bar.set(0)
         self.current_progress_bar.grid(row=3, column=0, sticky="ew", padx=10, pady=(5, 10))
 
+        # 작업별 진행률 (동시 다운로드 중인 작업마다 한 줄씩)
+        self.jobs_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        self.jobs_frame.grid(row=4, column=0, sticky="ew", padx=10, pady=(0, 5))
+        self.jobs_frame.grid_columnconfigure(1, weight=1)
+
+    def _on_metadata(self, url, caption):
+        """미리 가져온 영상 제목/크기를 기억하고 이미 시작한 작업 줄에도 반영 (UI 스레드에서 호출)"""
+        key = canonical_url_key(url)
+        self.video_captions[key] = caption
+        self.log_message(f"📝 {caption}", level="debug")
+        for job_id, job_key in self.job_keys.items():
+            if job_key == key and job_id in self.job_rows:
+                self.job_rows[job_id][0].configure(text=f"#{job_id} {caption}")
+
+    def _job_caption(self, job_id):
+        return self.video_captions.get(self.job_keys.get(job_id), '')
+
+    def _create_job_row(self, job_id, url):
+        """작업별 진행률 줄 생성 (UI 스레드에서 호출)"""
+        if job_id in self.job_rows:
+            return
+        self.job_keys[job_id] = canonical_url_key(url)
+        # 영상 정보를 미리 가져왔으면 URL 대신 제목과 크기를 바로 보여 줌
+        caption = self._job_caption(job_id) or url
+        label = ctk.CTkLabel(self.jobs_frame, text=f"#{job_id} 준비 중... {caption}", font=self.small_font, text_color="gray", anchor="w")
+        label.grid(row=job_id, column=0, sticky="w", padx=(0, 10))
+        bar = ctk.CTkProgressBar(self.jobs_frame, mode='determinate', height=8)
+        bar.set(0)
+        bar.grid(row=job_id, column=1, sticky="ew")
+        # 속도 제한이 걸려 있을 때 이 작업에 대역폭을 더 많이 나눠 줌 (yt-dlp.exe 엔진은 실행 중에 바꿀 수 없음)
+        boost = ctk.CTkButton(self.jobs_frame, text="우선", width=44, height=18, font=self.small_font,
+                              command=lambda: self._prioritize_job(job_id),
+                              state="normal" if self.engine.supports_live_priority() else "disabled")
+        boost.grid(row=job_id, column=2, sticky="e", padx=(5, 0))
+        # 일시정지해도 받은 부분(.part)은 남아 이어받기 때 그 지점부터 계속 받음
+        pause = ctk.CTkButton(self.jobs_frame, text="⏸", width=28, height=18, font=self.small_font,
+                              command=lambda: self._pause_job(job_id))
+        pause.grid(row=job_id, column=3, sticky="e", padx=(5, 0))
+        cancel = ctk.CTkButton(self.jobs_frame, text="✕", width=28, height=18, font=self.small_font,
+                               fg_color="gray", hover_color="#616161", command=lambda: self._cancel_job(job_id))
+        cancel.grid(row=job_id, column=4, sticky="e", padx=(5, 0))
+        self.job_rows[job_id] = (label, bar, boost, pause, cancel)
+
+    def _update_job_row(self, job_id, percent, text):
+        """작업별 진행률 줄 갱신 (UI 스레드에서 호출)"""
+        row = self.job_rows.get(job_id)
+        if not row:
+            return
+        label, bar = row[:2]
+        if percent is not None:
+            bar.set(percent)
+        caption = self._job_caption(job_id)
+        label.configure(text=f"#{job_id} {caption} · {text}" if caption else f"#{job_id} {text}")
+
+    def _prioritize_job(self, job_id):
+        """작업 하나를 높은 우선순위로 바꿔 대역폭을 더 받게 함 (UI 스레드에서 호출)"""
+        if self.engine.set_job_priority(job_id, PRIORITY_HIGH):
+            self.log_message(f"⏫ [{job_id}] 우선 다운로드로 변경했습니다.", job_id=job_id)
+            row = self.job_rows.get(job_id)
+            if row:
+                row[2].configure(state="disabled")
+
+    def _pause_job(self, job_id):
+        """작업 하나를 일시정지 (UI 스레드에서 호출, 결과는 job_paused 이벤트로 반영)"""
+        if not self.engine.pause_job(job_id):
+            self.log_message(f"ℹ️ [{job_id}] 지금은 일시정지할 수 없습니다 (변환 중이거나 이미 끝남).", job_id=job_id)
+
+    def _resume_job(self, job_id):
+        self.engine.resume_job(job_id)
+
+    def _cancel_job(self, job_id):
+        """작업 하나를 취소 (UI 스레드에서 호출, 결과는 job_cancelled 이벤트로 반영)"""
+        if not self.engine.cancel_job(job_id):
+            self.log_message(f"ℹ️ [{job_id}] 지금은 취소할 수 없습니다 (변환 중이거나 이미 끝남).", job_id=job_id)
+
+    def _on_job_paused(self, job_id):
+        """일시정지한 작업 줄을 남겨 두고 재개 버튼으로 바꿈 (UI 스레드에서 호출)"""
+        row = self.job_rows.get(job_id)
+        if not row:
+            return
+        label, _, boost, pause, _ = row
+        caption = self._job_caption(job_id)
+        label.configure(text=f"#{job_id} {caption} · ⏸️ 일시정지됨" if caption else f"#{job_id} ⏸️ 일시정지됨")
+        boost.configure(state="disabled")
+        pause.configure(text="▶", command=lambda: self._resume_job(job_id))
+
+    def _remove_job_row(self, job_id):
+        """작업별 진행률 줄 제거 (UI 스레드에서 호출)"""
+        row = self.job_rows.pop(job_id, None)
+        self.job_keys.pop(job_id, None)
+        if row:
+            for widget in row:
+                widget.destroy()
+
+    def _clear_job_rows(self):
+        for job_id in list(self.job_rows):
+            self._remove_job_row(job_id)
+
     def _create_log_output(self, parent):
-        ctk.CTkLabel(parent, text="로그:", font=ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE, weight="bold")).grid(row=0, column=0, sticky="w", padx=10, pady=(5,5))
+        log_header = ctk.CTkFrame(parent, fg_color="transparent")
+        log_header.grid(row=0, column=0, sticky="ew", padx=10, pady=(5, 5))
+        log_header.columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(log_header, text="로그:", font=ctk.CTkFont(family=BASE_FONT, size=BODY_FONT_SIZE, weight="bold")).grid(row=0, column=0, sticky="w")
+
+        # 로그 필터 (수준 / 작업 번호)
+        self.log_level_var = ctk.StringVar(value=next(iter(LOG_LEVEL_FILTERS)))
+        ctk.CTkOptionMenu(log_header, variable=self.log_level_var, values=list(LOG_LEVEL_FILTERS), width=100,
+                          command=lambda _: self._apply_log_filter(), font=self.small_font).grid(row=0, column=1, padx=(0, 5))
+        self.log_job_var = ctk.StringVar(value="")
+        log_job_entry = ctk.CTkEntry(log_header, textvariable=self.log_job_var, width=90, placeholder_text="작업 번호", font=self.small_font)
+        log_job_entry.grid(row=0, column=2)
+        log_job_entry.bind("<Return>", lambda event: self._apply_log_filter())
+        log_job_entry.bind("<FocusOut>", lambda event: self._apply_log_filter())
+
         self.log_text = ctk.CTkTextbox(parent, corner_radius=8, font=self.body_font)
         self.log_text.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
         self.log_text.configure(state="disabled")
 
+    def _log_record_visible(self, record):
+        levelno, job_id, _ = record
+        if levelno < self.log_min_level:
+            return False
+        return self.log_job_filter is None or job_id == self.log_job_filter
+
+    def _apply_log_filter(self):
+        """필터를 바꾸면 링 버퍼에서 조건에 맞는 마지막 줄들만 다시 그림 (Tk 스레드)"""
+        self.log_min_level = LOG_LEVEL_FILTERS.get(self.log_level_var.get(), logging.DEBUG)
+        job_text = self.log_job_var.get().strip().lstrip('#')
+        self.log_job_filter = int(job_text) if job_text.isdigit() else None
+
+        visible = [record[2] for record in self.log_records if self._log_record_visible(record)]
+        visible = visible[-LOG_VIEW_MAX_LINES:]
+        self.log_text.configure(state="normal")
+        self.log_text.delete("1.0", "end")
+        if visible:
+            self.log_text.insert("end", '\n'.join(visible) + '\n')
+        self.log_view_lines = sum(message.count('\n') + 1 for message in visible)
+        self.log_text.see("end")
+        self.log_text.configure(state="disabled")
+
     def _set_ui_state(self, is_downloading):
         """UI 컨트롤의 상태를 설정합니다."""
         if is_downloading:
@@ -342,55 +841,33 @@ class YouTubeDownloaderUI(ctk.CTk):
             self.overall_progress_bar.set(0)
             self.overall_progress_var.set("대기 중...")
             self.current_progress_var.set("")
+            self._clear_job_rows()
 
     def show_ffmpeg_help(self):
-        """FFmpeg 설치 도움말 창 표시"""
+        """FFmpeg 설치 도움말 창 표시 (처음 열 때 만들고, 닫으면 숨겨 두었다가 다시 보여 줌)"""
+        if self.ffmpeg_help_window is None or not self.ffmpeg_help_window.winfo_exists():
+            self.ffmpeg_help_window = self._build_ffmpeg_help()
+        else:
+            self.ffmpeg_help_window.deiconify()
+            self.ffmpeg_help_window.lift()
+        self.ffmpeg_help_window.grab_set()
+
+    def _hide_ffmpeg_help(self):
+        self.ffmpeg_help_window.grab_release()
+        self.ffmpeg_help_window.withdraw()
+
+    def _build_ffmpeg_help(self):
         help_window = ctk.CTkToplevel(self)
         help_window.title("FFmpeg 설치 도움말")
         help_window.geometry("550x450")
         help_window.transient(self)
-        help_window.grab_set()
+        help_window.protocol("WM_DELETE_WINDOW", self._hide_ffmpeg_help)
         help_window.grid_columnconfigure(0, weight=1)
         help_window.grid_rowconfigure(0, weight=1)
 
         help_text_box = ctk.CTkTextbox(help_window, wrap="word", corner_radius=8, font=self.body_font)
         help_text_box.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-
-        help_content = """FFmpeg 설치 안내
-
-FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로그램입니다.
-고품질 영상/음성 병합이나 음성 추출(mp3 변환)을 위해 필요합니다.
-
-🔹 Windows 설치 방법:
-
-방법 1: winget (Windows 10/11 내장)
-1. Windows PowerShell 또는 명령 프롬프트를 관리자 권한으로 실행
-2. 다음 명령어 입력 후 실행:
-   winget install FFmpeg
-
-방법 2: Chocolatey (패키지 관리자)
-1. Chocolatey가 설치되어 있다면 다음 명령어 실행:
-   choco install ffmpeg
-
-방법 3: 수동 설치
-1. https://ffmpeg.org/download.html 방문
-2. Windows 아이콘 클릭 후, gyan.dev 빌드 다운로드
-3. 압축 해제 후 bin 폴더를 시스템 환경 변수 'Path'에 추가
-
-🔹 설치 확인:
-명령 프롬프트에서 'ffmpeg -version' 입력 시 버전 정보가 표시되면 성공입니다.
-
-🔹 FFmpeg 없이 사용 가능한 기능:
-- 최고 품질 (단일 파일) ✅
-- 720p, 480p 다운로드 ✅
-
-🔹 FFmpeg 필요한 기능:
-- 최고 품질 (병합) ⚠️
-- 음성만 추출 (mp3) ⚠️
-
-설치 후에는 프로그램을 재시작해야 적용됩니다.
-"""
-        help_text_box.insert("1.0", help_content)
+        help_text_box.insert("1.0", FFMPEG_HELP_TEXT)
         help_text_box.configure(state="disabled")
 
         button_frame = ctk.CTkFrame(help_window, fg_color="transparent")
@@ -398,17 +875,26 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
         button_frame.columnconfigure((0,1,2), weight=1)
 
         def open_ffmpeg_site():
+            import webbrowser  # 버튼을 누를 때만 필요 (시작 시간 단축)
             webbrowser.open("https://ffmpeg.org/download.html")
 
         ctk.CTkButton(button_frame, text="FFmpeg 웹사이트", command=open_ffmpeg_site, font=self.body_font).grid(row=0, column=0, padx=5, sticky="ew")
         ctk.CTkButton(button_frame, text="설치 상태 새로고침", command=self.check_ffmpeg_status, font=self.body_font).grid(row=0, column=1, padx=5, sticky="ew")
-        ctk.CTkButton(button_frame, text="닫기", command=help_window.destroy, font=self.body_font).grid(row=0, column=2, padx=5, sticky="ew")
+        ctk.CTkButton(button_frame, text="닫기", command=self._hide_ffmpeg_help, font=self.body_font).grid(row=0, column=2, padx=5, sticky="ew")
+        return help_window
 
     def browse_folder(self):
+        from tkinter import filedialog  # 폴더 선택 창을 열 때만 필요 (시작 시간 단축)
         folder = filedialog.askdirectory()
         if folder:
             self.path_var.set(folder)
 
+    def browse_staging_folder(self):
+        from tkinter import filedialog
+        folder = filedialog.askdirectory()
+        if folder:
+            self.staging_var.set(folder)
+
     def open_download_folder(self):
         """다운로드 폴더를 파일 탐색기에서 열기"""
         try:
@@ -435,7 +921,9 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             messagebox.showerror("오류", f"폴더를 열 수 없습니다.\n{e}")
 
     def clear_log(self):
-        """로그 텍스트 지우기"""
+        """로그 텍스트 지우기 (파일 로그는 유지)"""
+        self.log_records.clear()
+        self.log_view_lines = 0
         self.log_text.configure(state="normal")
         self.log_text.delete("1.0", "end")
         self.log_message("🧹 로그가 지워졌습니다.")
@@ -483,7 +971,7 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             cursor_pos = self.url_textbox.index("insert")
             
             # YouTube URL인지 확인
-            if self._is_valid_youtube_url(clipboard_text):
+            if is_valid_youtube_url(clipboard_text):
                 # 현재 줄의 내용 확인
                 line_num = cursor_pos.split('.')[0]
                 current_line = self.url_textbox.get(f"{line_num}.0", f"{line_num}.end")
@@ -492,17 +980,9 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
                 if current_line.strip():
                     self.url_textbox.insert("insert", "\n")
                 
-                # URL과 줄바꿈을 한 번에 삽입
+                # URL과 줄바꿈을 한 번에 삽입 (번호/개수/큐 반영은 <<Modified>>에서 처리)
                 self.url_textbox.insert("insert", clipboard_text + "\n")
                 
-                # 다운로드 중이면 큐에 추가
-                if self.is_downloading:
-                    self._add_to_download_queue(clipboard_text)
-                
-                # 번호 업데이트
-                self.after(1, self._update_url_numbers)
-                self.after(2, self._update_url_count)
-                
                 # 포커스 유지
                 self.url_textbox.focus_set()
                 
@@ -510,7 +990,7 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             
             # 여러 줄의 텍스트인 경우 각 줄을 확인
             lines = clipboard_text.split('\n')
-            valid_urls = [line.strip() for line in lines if line.strip() and self._is_valid_youtube_url(line.strip())]
+            valid_urls = [line.strip() for line in lines if is_valid_youtube_url(line.strip())]
             
             if valid_urls:
                 # 현재 줄에 내용이 있으면 새 줄로 이동
@@ -519,23 +999,8 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
                 if current_line.strip():
                     self.url_textbox.insert("insert", "\n")
                 
-                # 각 URL을 별도 줄에 삽입 (한 번에 처리)
-                urls_text = ""
-                for i, url in enumerate(valid_urls):
-                    if i > 0:
-                        urls_text += "\n"
-                    urls_text += url
-                    
-                    # 다운로드 중이면 큐에 추가
-                    if self.is_downloading:
-                        self._add_to_download_queue(url)
-                
-                # 모든 URL과 마지막 줄바꿈을 한 번에 삽입
-                self.url_textbox.insert("insert", urls_text + "\n")
-                
-                # 번호 업데이트
-                self.after(1, self._update_url_numbers)
-                self.after(2, self._update_url_count)
+                # 모든 URL을 각각 별도 줄로, 마지막 줄바꿈까지 한 번에 삽입
+                self.url_textbox.insert("insert", '\n'.join(valid_urls) + "\n")
                 
                 # 포커스 유지
                 self.url_textbox.focus_set()
@@ -556,9 +1021,7 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
 
     def _on_enter_key(self, event=None):
         """Enter 키 처리"""
-        # 기본 줄바꿈 허용하고 번호 업데이트
-        self.after(10, self._update_url_numbers)
-        self.after(20, self._update_url_count)
+        # 기본 줄바꿈 허용 (번호 업데이트는 <<Modified>>에서 처리)
         return None
 
     def _on_key_press(self, event=None):
@@ -571,82 +1034,36 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
                 self.url_textbox.configure(text_color=("black", "white"))
         return None
 
-    def _monitor_text_changes(self):
-        """텍스트 변경사항을 모니터링하여 붙여넣기 감지"""
-        try:
-            current_text = self.url_textbox.get("1.0", "end-1c")
-            
-            # 텍스트가 변경되었는지 확인
-            if current_text != self._last_text_content:
-                text_diff = len(current_text) - len(self._last_text_content)
-                
-                # 한 번에 많은 텍스트가 추가되었다면 붙여넣기로 간주
-                if text_diff > 15:  # 임계값을 낮춤
-                    # 새로 추가된 부분에서 URL 찾기
-                    new_content = current_text[len(self._last_text_content):]
-                    self._process_pasted_content(new_content)
-                
-                # 번호 업데이트 (모든 변경에 대해)
-                self.after(50, self._update_url_numbers)
-                
-                self._last_text_content = current_text
-            
-        except Exception as e:
-            pass
-        
-        # 50ms마다 체크 (더 빠르게)
-        self.after(50, self._monitor_text_changes)
+    def _on_url_text_modified(self, event=None):
+        """입력창 내용이 바뀌었을 때 (<<Modified>>) - 같은 틱의 변경은 한 번에 모아서 처리"""
+        if not self.url_textbox.edit_modified():
+            return
+        # 플래그를 내려야 다음 변경에서도 <<Modified>>가 다시 발생함
+        self.url_textbox.edit_modified(False)
+        if not self._url_sync_pending:
+            self._url_sync_pending = True
+            self.after_idle(self._sync_url_model)
+
+    def _sync_url_model(self):
+        """입력창 내용을 URL 모델에 반영 (바뀐 줄만 다시 검사)"""
+        self._url_sync_pending = False
+        content = self.url_textbox.get("1.0", "end-1c")
+        if content == self.placeholder_text:
+            content = ""
+        if content == self.url_model.text:
+            return
+        new_urls = self.url_model.update(content)
+        self._update_url_count()
 
-    def _process_pasted_content(self, content):
-        """붙여넣어진 내용 처리"""
-        try:
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line and self._is_valid_youtube_url(line):
-                    # 다운로드 중이면 큐에 추가
-                    if self.is_downloading:
-                        self._add_to_download_queue(line)
-            
-            # 번호 업데이트
-            self.after(10, self._update_url_numbers)
-            self.after(20, self._update_url_count)
-            
-        except Exception as e:
-            pass
+        # 다운로드 중이면 새로 입력된 URL을 바로 큐에 추가
+        if new_urls and self.is_downloading:
+            for url in new_urls:
+                self._add_to_download_queue(url)
 
-    def _handle_url_paste_direct(self, url_text):
-        """URL 붙여넣기를 직접 처리하는 메서드"""
-        try:
-            # 현재 커서 위치 가져오기
-            cursor_pos = self.url_textbox.index("insert")
-            line_num = cursor_pos.split('.')[0]
-            
-            # 현재 줄의 내용 확인
-            current_line = self.url_textbox.get(f"{line_num}.0", f"{line_num}.end")
-            
-            # 현재 줄에 내용이 있으면 새 줄 추가
-            if current_line.strip():
-                self.url_textbox.insert("insert", "\n")
-            
-            # URL 삽입
-            self.url_textbox.insert("insert", url_text.strip())
-            
-            # 줄바꿈 추가하고 커서를 다음 줄로 이동
-            self.url_textbox.insert("insert", "\n")
-            
-            # 다운로드 중이면 큐에 추가
-            if self.is_downloading:
-                self._add_to_download_queue(url_text.strip())
-            
-            # 번호 업데이트
-            self.after(10, self._update_url_numbers)
-            self.after(20, self._update_url_count)
-            
-            return True
-            
-        except Exception as e:
-            return False
+        # 타이핑 중 과도한 재작성을 막기 위해 번호 정리는 입력이 멈춘 뒤 한 번만
+        if self._url_renumber_job is not None:
+            self.after_cancel(self._url_renumber_job)
+        self._url_renumber_job = self.after(300, self._update_url_numbers)
 
     def _move_cursor_to_next_line(self):
         """커서를 다음 줄 시작 부분으로 이동"""
@@ -709,98 +1126,70 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             pass
 
     def _update_url_numbers(self):
-        """URL 앞에 번호 추가"""
+        """URL 앞에 번호 추가 (번호가 틀린 줄만 고쳐 씀)"""
+        self._url_renumber_job = None
         try:
-            current_text = self.url_textbox.get("1.0", "end-1c")
-            if current_text == self.placeholder_text or not current_text.strip():
+            self._sync_url_model()
+            changes = self.url_model.numbering_changes()
+            if not changes:
                 return
-            
-            lines = current_text.split('\n')
-            numbered_lines = []
-            url_count = 0
-            
-            for line in lines:
-                line = line.strip()
-                if line:
-                    # 기존 번호 제거 (정규식으로)
-                    import re
-                    clean_line = re.sub(r'^\d+\.\s*', '', line)
-                    
-                    # 정리된 줄이 유효한 YouTube URL인지 확인
-                    if self._is_valid_youtube_url(clean_line):
-                        url_count += 1
-                        numbered_lines.append(f"{url_count}. {clean_line}")
-                    else:
-                        # URL이 아닌 경우 원래 줄 유지
-                        numbered_lines.append(line)
-            
-            # 텍스트 업데이트
-            new_text = '\n'.join(numbered_lines)
-            if new_text != current_text:
-                # 텍스트 업데이트 후 커서를 끝으로 이동
+
+            insert_pos = self.url_textbox.index("insert")
+            if len(changes) > URL_RENUMBER_BATCH_LINES:
+                # 앞쪽 줄이 지워져 대부분의 번호가 밀린 경우: 한 번에 다시 쓰는 편이 빠름
+                lines = list(self.url_model.lines)
+                for index, text in changes:
+                    lines[index] = text
                 self.url_textbox.delete("1.0", "end")
-                self.url_textbox.insert("1.0", new_text)
-                
-                # 커서를 텍스트 끝으로 이동 (빈 줄이 있으면 그 줄로)
-                self.url_textbox.mark_set("insert", "end")
-                self.url_textbox.see("insert")
-                    
+                self.url_textbox.insert("1.0", '\n'.join(lines))
+            else:
+                for index, text in changes:
+                    line = index + 1
+                    self.url_textbox.delete(f"{line}.0", f"{line}.end")
+                    self.url_textbox.insert(f"{line}.0", text)
+            # 입력 중이던 위치 유지
+            self.url_textbox.mark_set("insert", insert_pos)
+            self._sync_url_model()
+
         except Exception as e:
             pass
 
     def _remove_completed_url(self, completed_url):
-        """완료된 URL을 제거하고 나머지 URL들의 번호를 재정렬"""
+        """완료된 URL(같은 영상의 다른 형태 URL 포함)이 있는 줄을 제거하고 나머지 번호를 재정렬"""
         try:
-            current_text = self.url_textbox.get("1.0", "end-1c")
-            if current_text == self.placeholder_text:
+            self._sync_url_model()
+            index = self.url_model.find_line(canonical_url_key(completed_url))
+            if index < 0:
                 return
-            
-            lines = current_text.split('\n')
-            new_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                if line:
-                    # 번호 제거하고 URL만 추출
-                    import re
-                    clean_line = re.sub(r'^\d+\.\s*', '', line)
-                    # 완료된 URL이 아닌 경우만 유지
-                    if clean_line != completed_url:
-                        new_lines.append(clean_line)
-            
-            # 텍스트박스 업데이트
-            if new_lines:
-                self.url_textbox.delete("1.0", "end")
-                self.url_textbox.insert("1.0", '\n'.join(new_lines))
-                self.url_textbox.configure(text_color=("black", "white"))
-                # 번호 재정렬
-                self._update_url_numbers()
-            else:
+
+            line = index + 1
+            self.url_textbox.delete(f"{line}.0", f"{line + 1}.0")
+            if not self.url_textbox.get("1.0", "end-1c").strip():
                 # 모든 URL이 완료된 경우 플레이스홀더 표시
                 self.url_textbox.delete("1.0", "end")
                 self.url_textbox.insert("1.0", self.placeholder_text)
                 self.url_textbox.configure(text_color="gray")
-            
-            self._update_url_count()
+            # 번호 재정렬은 <<Modified>> 이후 한 번에 처리
+            self._sync_url_model()
             
         except Exception as e:
             self.log_message(f"URL 제거 중 오류: {e}")
 
-    def _add_to_download_queue(self, url):
+    def _add_to_download_queue(self, url, priority=PRIORITY_NORMAL):
         """다운로드 큐에 URL 추가"""
         try:
-            with self.queue_lock:
-                # 이미 큐에 있거나 처리 중인 URL은 추가하지 않음
-                if url not in self.download_queue and url not in self.processed_urls:
-                    self.download_queue.append(url)
-                    queue_count = len(self.download_queue)
-                    self.log_message(f"�  다운로드 큐에 추가됨: {url}")
-                    self.log_message(f"📋 현재 대기 중인 URL: {queue_count}개")
-                    
-                    # UI 진행률 표시 업데이트 (락 해제 후 안전하게)
-                    self.after(1, lambda count=queue_count: self._update_queue_display_safe(count))
-                else:
-                    self.log_message(f"⚠️ 이미 처리 중이거나 대기 중인 URL: {url}")
+            result = self.engine.enqueue(url, priority)
+            if result == 'archived':
+                self.log_message(f"⏭️ 이미 다운로드한 영상이라 건너뜁니다: {url}")
+            elif result == 'queued':
+                queue_count = len(self.engine.queue)
+                self.log_message(f"📥 다운로드 큐에 추가됨: {url}")
+                self.log_message(f"📋 현재 대기 중인 URL: {queue_count}개")
+
+                # UI 진행률 표시 업데이트
+                self.after(1, lambda count=queue_count: self._update_queue_display_safe(count))
+            else:
+                self.log_message(f"⚠️ 이미 처리 중이거나 대기 중인 URL: {url}")
         except Exception as e:
             self.log_message(f"큐 추가 중 오류: {e}")
 
@@ -817,7 +1206,6 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
                 current_text = self.current_progress_var.get()
                 if "대기:" in current_text:
                     # 기존 대기 개수 부분을 새로운 개수로 교체
-                    import re
                     new_text = re.sub(r'대기: \d+개', f'대기: {queue_count}개', current_text)
                     self.current_progress_var.set(new_text)
                 else:
@@ -827,20 +1215,6 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
         except Exception as e:
             pass
 
-    def _get_next_url_from_queue(self):
-        """큐에서 다음 URL 가져오기"""
-        try:
-            with self.queue_lock:
-                if self.download_queue:
-                    url = self.download_queue.pop(0)
-                    # 처리 중인 URL로 표시
-                    self.processed_urls.add(url)
-                    return url
-                return None
-        except Exception as e:
-            self.log_message(f"큐에서 URL 가져오기 오류: {e}")
-            return None
-
     def _update_queue_from_textbox(self):
         """텍스트박스의 URL들을 큐에 동기화"""
         try:
@@ -853,254 +1227,96 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             # 현재 텍스트박스가 비어있거나 플레이스홀더 상태면 큐 업데이트 하지 않음
             if not current_urls:
                 return
-                
-            with self.queue_lock:
-                # 새로운 URL들만 큐에 추가 (이미 처리 중이거나 완료된 URL 제외)
-                new_urls = [url for url in current_urls 
-                           if url not in self.download_queue and url not in self.processed_urls]
-                if new_urls:
-                    self.download_queue.extend(new_urls)
-                    for url in new_urls:
-                        self.log_message(f"📝 키보드 입력으로 큐에 추가됨: {url}")
-                    queue_count = len(self.download_queue)
-                    self.log_message(f"📋 현재 대기 중인 URL: {queue_count}개")
-                    
-                    # UI 진행률 표시 업데이트 (락 해제 후 안전하게)
-                    self.after(1, lambda count=queue_count: self._update_queue_display_safe(count))
+
+            # 새로운 URL들만 큐에 추가 (이미 처리 중이거나 완료된 URL 제외)
+            new_urls = [url for url in current_urls if self.engine.enqueue(url) == 'queued']
+            if new_urls:
+                for url in new_urls:
+                    self.log_message(f"📝 키보드 입력으로 큐에 추가됨: {url}")
+                queue_count = len(self.engine.queue)
+                self.log_message(f"📋 현재 대기 중인 URL: {queue_count}개")
+
+                # UI 진행률 표시 업데이트
+                self._update_queue_display_safe(queue_count)
         except Exception as e:
             self.log_message(f"큐 동기화 중 오류: {e}")
 
     def _update_url_count(self, event=None):
         """URL 개수 업데이트"""
-        # 키 입력 후 번호 업데이트 (딜레이를 두어 타이핑 중 과도한 업데이트 방지)
-        if event and hasattr(event, 'keysym'):
-            self.after(500, self._update_url_numbers)
-            # 다운로드 중이고 실제 키보드 입력이 있을 때만 큐 업데이트
-            if (self.is_downloading and 
-                hasattr(event, 'char') and 
-                event.char and 
-                event.char.isprintable()):
-                self.after(1000, self._update_queue_from_textbox)
-        
-        urls = self._parse_urls()
-        count = len(urls)
-        color = "red" if count > 10 else "gray" if count == 0 else "green"
-        self.url_count_label.configure(text=f"{count}/10", text_color=color)
+        count = self.url_model.count
+        color = "gray" if count == 0 else "green"
+        self.url_count_label.configure(text=f"{count}개", text_color=color)
 
     def _parse_urls(self):
         """텍스트박스에서 URL들을 파싱하여 유효한 YouTube URL만 반환"""
-        content = self.url_textbox.get("1.0", "end").strip()
-        if not content or content == self.placeholder_text or content.startswith("여기에 YouTube URL을"):
-            return []
-        
-        lines = content.split('\n')
-        urls = []
-        
-        # 디버깅: 전체 텍스트 내용 로깅
-        self.log_message(f"🔍 텍스트박스 내용 분석 중... (총 {len(lines)}줄)")
-        
-        for line in lines:
-            line = line.strip()
-            # 예시 텍스트나 플레이스홀더 라인들 완전히 제외
-            if (line and 
-                not line.startswith("여기에") and 
-                not line.startswith("예시") and
-                "형식:" not in line and
-                "VIDEO_ID" not in line and
-                "PLAYLIST_ID" not in line):
-                
-                # 번호 제거하고 URL만 추출
-                import re
-                clean_line = re.sub(r'^\d+\.\s*', '', line)
-                
-                # 유효한 YouTube URL인지 확인 (이미 예시 텍스트는 _is_valid_youtube_url에서 필터링됨)
-                if clean_line and self._is_valid_youtube_url(clean_line):
-                    urls.append(clean_line)
-                    self.log_message(f"✅ 유효한 URL 추가: {clean_line}")
-                elif clean_line:
-                    self.log_message(f"❌ 무효한 URL 제외: {clean_line}")
-        
-        self.log_message(f"📋 최종 파싱 결과: {len(urls)}개의 유효한 URL")
-        return urls
+        self._sync_url_model()
+        return self.url_model.urls
 
     def _is_valid_youtube_url(self, url):
         """YouTube URL 유효성 검사"""
-        # 예시 텍스트나 플레이스홀더는 무조건 제외
-        if (not url or 
-            "VIDEO_ID" in url or 
-            "PLAYLIST_ID" in url or
-            url.startswith("여기에") or
-            url.startswith("예시") or
-            "형식:" in url):
-            return False
-            
-        youtube_patterns = [
-            r'https?://(?:www\.)?youtube\.com/watch\?v=[\w-]{11}',  # YouTube 비디오 ID는 정확히 11자
-            r'https?://(?:www\.)?youtu\.be/[\w-]{11}',  # 단축 URL도 11자
-            r'https?://(?:www\.)?youtube\.com/playlist\?list=[\w-]+',
-            r'https?://(?:www\.)?youtube\.com/shorts/[\w-]{11}',
-            r'https?://(?:m\.)?youtube\.com/watch\?v=[\w-]{11}',
-        ]
-        
-        import re
-        for pattern in youtube_patterns:
-            if re.match(pattern, url):
-                return True
-        return False
-
-    def download_multiple_videos(self, urls):
-        """여러 비디오를 순차적으로 다운로드"""
-        total_count = len(urls)
-        successful_downloads = 0
-        failed_downloads = 0
-
-        self.log_message(f"📋 총 {total_count}개의 URL을 다운로드합니다.")
-        
-        for i, url in enumerate(urls, 1):
-            if self.stop_event.is_set():
-                self.log_message("🛑 사용자에 의해 다운로드가 중단되었습니다.")
-                break
-                
-            # 전체 진행률 업데이트
-            overall_progress = (i - 1) / total_count
-            self.overall_progress_bar.set(overall_progress)
-            self.overall_progress_var.set(f"전체 진행률: {i-1}/{total_count} 완료")
-            
-            self.log_message(f"\n📥 [{i}/{total_count}] 다운로드 시작: {url}")
-            self.current_progress_var.set(f"현재: [{i}/{total_count}] 다운로드 중...")
-            
-            # 개별 비디오 다운로드
-            success = self.download_single_video(url)
-            
-            if success:
-                successful_downloads += 1
-                self.log_message(f"✅ [{i}/{total_count}] 다운로드 성공!")
-                # 성공한 URL을 텍스트박스에서 제거
-                self.after(100, lambda u=url: self._remove_completed_url(u))
-            else:
-                failed_downloads += 1
-                self.log_message(f"❌ [{i}/{total_count}] 다운로드 실패!")
-                
-            # 전체 진행률 업데이트
-            overall_progress = i / total_count
-            self.overall_progress_bar.set(overall_progress)
-            self.overall_progress_var.set(f"전체 진행률: {i}/{total_count} 완료")
-            
-            if self.stop_event.is_set():
-                break
-        
-        # 최종 결과 표시
-        if not self.stop_event.is_set():
-            self.overall_progress_bar.set(1.0)
-            self.overall_progress_var.set("모든 다운로드 완료!")
-            self.current_progress_var.set("")
-            self.current_progress_bar.set(0)
-            
-            self.log_message(f"\n🎉 다운로드 완료!")
-            self.log_message(f"✅ 성공: {successful_downloads}개")
-            if failed_downloads > 0:
-                self.log_message(f"❌ 실패: {failed_downloads}개")
-            
-            output_path = self.path_var.get()
-            self.log_message(f"📁 저장 위치: {output_path}")
-            
-            # 완료 메시지박스
-            if failed_downloads == 0:
-                messagebox.showinfo("다운로드 완료", f"모든 비디오 다운로드가 완료되었습니다!\n성공: {successful_downloads}개")
-            else:
-                messagebox.showwarning("다운로드 완료", f"다운로드가 완료되었습니다.\n성공: {successful_downloads}개\n실패: {failed_downloads}개")
-        
-        self.after(100, self._set_ui_state, False)
+        return is_valid_youtube_url(url)
 
     def download_with_dynamic_queue(self):
-        """동적 큐를 사용한 다운로드 시스템"""
-        successful_downloads = 0
-        failed_downloads = 0
-        total_processed = 0
-
-        self.log_message(f"📋 다운로드 시작 - 동적 큐 시스템 활성화")
+        """동적 큐를 여러 워커가 동시에 처리하는 다운로드 시스템 (다운로드 스레드에서 실행)"""
         self.log_message(f"💡 다운로드 중에도 새로운 URL을 추가할 수 있습니다!")
-        
-        while True:
-            if self.stop_event.is_set():
-                self.log_message("🛑 사용자에 의해 다운로드가 중단되었습니다.")
-                break
-            
-            # 큐에서 다음 URL 가져오기
-            current_url = self._get_next_url_from_queue()
-            
-            if current_url is None:
-                # 큐가 비어있으면 잠시 대기 후 다시 확인
-                self.update_idletasks()
-                time.sleep(0.5)
-                
-                # 텍스트박스에서 새로운 URL 확인
-                self._update_queue_from_textbox()
-                current_url = self._get_next_url_from_queue()
-                
-                if current_url is None:
-                    # 더 이상 다운로드할 URL이 없으면 종료
-                    break
-            
-            total_processed += 1
-            
-            # 현재 큐 상태 표시
-            with self.queue_lock:
-                remaining_count = len(self.download_queue)
-            
-            self.log_message(f"\n📥 [{total_processed}] 다운로드 시작: {current_url}")
-            self.log_message(f"📋 대기 중인 URL: {remaining_count}개")
-            
-            self.current_progress_var.set(f"현재: [{total_processed}] 다운로드 중... (대기: {remaining_count}개)")
-            self.overall_progress_var.set(f"총 {total_processed}개 처리 중 (성공: {successful_downloads}, 실패: {failed_downloads})")
-            
-            # 개별 비디오 다운로드
-            success = self.download_single_video(current_url)
-            
-            if success:
-                successful_downloads += 1
-                self.log_message(f"✅ [{total_processed}] 다운로드 성공!")
-                # 성공한 URL을 텍스트박스에서 제거
-                self.after(100, lambda u=current_url: self._remove_completed_url(u))
-            else:
-                failed_downloads += 1
-                self.log_message(f"❌ [{total_processed}] 다운로드 실패!")
-            
-            # 진행률 업데이트
-            self.overall_progress_var.set(f"총 {total_processed}개 처리됨 (성공: {successful_downloads}, 실패: {failed_downloads})")
-            
-            if self.stop_event.is_set():
-                break
-        
-        # 최종 결과 표시
-        if not self.stop_event.is_set():
-            self.overall_progress_var.set("모든 다운로드 완료!")
-            self.current_progress_var.set("")
-            self.current_progress_bar.set(0)
-            
-            self.log_message(f"\n🎉 다운로드 완료!")
-            self.log_message(f"✅ 성공: {successful_downloads}개")
-            if failed_downloads > 0:
-                self.log_message(f"❌ 실패: {failed_downloads}개")
-            
-            output_path = self.path_var.get()
-            self.log_message(f"📁 저장 위치: {output_path}")
-            
-            # 완료 메시지박스
-            if failed_downloads == 0:
-                messagebox.showinfo("다운로드 완료", f"모든 비디오 다운로드가 완료되었습니다!\n성공: {successful_downloads}개")
-            else:
-                messagebox.showwarning("다운로드 완료", f"다운로드가 완료되었습니다.\n성공: {successful_downloads}개\n실패: {failed_downloads}개")
-        
-        self.after(100, self._set_ui_state, False)
+        result = self.engine.run(self.download_settings)
+        if result is None:
+            self._post_ui(messagebox.showerror, "오류", "yt-dlp.exe를 찾을 수 없습니다. 프로그램 폴더에 파일이 있는지 확인하세요.")
+        elif not self.engine.stop_event.is_set():
+            self._post_ui(self._show_download_summary, *result)
+
+        self._post_ui(self._set_ui_state, False)
+
+    def _show_download_summary(self, successful_downloads, failed_downloads):
+        """모든 다운로드가 끝났을 때 결과 표시 (Tk 스레드)"""
+        self.overall_progress_var.set("모든 다운로드 완료!")
+        self.current_progress_var.set("")
+        self.current_progress_bar.set(0)
 
-    def log_message(self, message):
-        """로그 텍스트에 메시지 추가"""
+        # 완료 메시지박스
+        if failed_downloads == 0:
+            messagebox.showinfo("다운로드 완료", f"모든 비디오 다운로드가 완료되었습니다!\n성공: {successful_downloads}개")
+        else:
+            messagebox.showwarning("다운로드 완료", f"다운로드가 완료되었습니다.\n성공: {successful_downloads}개\n실패: {failed_downloads}개")
+
+    def _update_overall_status(self):
+        """워커 풀 통계를 전체 진행률 표시에 반영"""
+        successful, failed, active, remaining_count = self.engine.stats()
+        status = f"총 {successful + failed + active}개 처리 중 (성공: {successful}, 실패: {failed})"
+        if active and self.transfer_stats and self.transfer_stats['speed']:
+            status += f" · 전체 속도: {format_speed(self.transfer_stats['speed'])}"
+            if self.transfer_stats['eta'] is not None:
+                status += f" · 남은 시간: {format_eta(self.transfer_stats['eta'])}"
+        self.overall_progress_var.set(status)
+        self.current_progress_var.set(f"진행 중: {active}개 (대기: {remaining_count}개)")
+
+    def log_message(self, message, level=None, job_id=None):
+        """로그 메시지 추가 (어느 스레드에서나 호출 가능, 다음 UI 주기에 한꺼번에 표시)
+
+        level은 "debug"/"info"/"warning"/"error" 중 하나이며 생략하면 메시지 앞 표시로 추정합니다.
+        job_id를 주면 로그 창에서 작업 번호로 걸러 볼 수 있습니다.
+        """
+        levelno = LOG_LEVELS.get(level or infer_log_level(message), logging.INFO)
+        job_tag = f"[#{job_id}] " if job_id is not None else ""
+        file_logger.log(levelno, f"{job_tag}{message}")
+        self.ui_events.post('log', levelno, job_id, message)
+
+    def _append_log_records(self, records):
+        """새 로그를 링 버퍼에 넣고, 보이는 줄만 한 번의 insert로 추가 (Tk 스레드)"""
+        self.log_records.extend(records)
+        visible = [record[2] for record in records if self._log_record_visible(record)]
+        if not visible:
+            return
         self.log_text.configure(state="normal")
-        self.log_text.insert("end", f"{message}\n")
+        self.log_text.insert("end", '\n'.join(visible) + '\n')
+        self.log_view_lines += sum(message.count('\n') + 1 for message in visible)
+        # 표시 줄 수 제한: 넘친 만큼 앞에서부터 한 번에 삭제
+        excess = self.log_view_lines - LOG_VIEW_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_view_lines -= excess
         self.log_text.see("end")
         self.log_text.configure(state="disabled")
-        self.update_idletasks()
 
     def start_download(self):
         # 텍스트박스 내용이 플레이스홀더인지 확인
@@ -1114,10 +1330,6 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
             messagebox.showerror("오류", "유효한 YouTube URL을 입력해주세요.")
             return
 
-        if len(urls) > 10:
-            messagebox.showerror("오류", f"최대 10개의 URL만 입력할 수 있습니다. (현재: {len(urls)}개)")
-            return
-
         quality = self.quality_var.get()
         # FFmpeg check is still relevant for the UI warning, but the logic is now handled by yt-dlp.exe
         ffmpeg_needed = "bestvideo" in quality or "bestaudio" in quality
@@ -1132,158 +1344,75 @@ FFmpeg는 비디오와 오디오를 처리하는 강력한 오픈소스 프로
         if self.download_thread and self.download_thread.is_alive():
             return
 
-        # 다운로드 큐 초기화
-        with self.queue_lock:
-            self.download_queue = urls.copy()
-            # 처리된 URL 목록 초기화
-            self.processed_urls.clear()
+        # 다운로드 큐 초기화 (처리된 URL 기록 포함)
+        self.engine.reset()
+        self.engine.skip_archived = self.skip_archived_var.get()
+        if self.engine.skip_archived:
+            self.engine.archive.load()
+        results = [self.engine.enqueue(url) for url in urls]
+        duplicate_count = results.count('duplicate')
+        archived_count = results.count('archived')
+        if duplicate_count:
+            self.log_message(f"♻️ 같은 영상을 가리키는 중복 URL {duplicate_count}개를 제외했습니다.")
+        if archived_count:
+            self.log_message(f"⏭️ 이미 다운로드한 영상 {archived_count}개를 건너뜁니다. (기록: {self.engine.archive.path})")
+        if not len(self.engine.queue):
+            messagebox.showinfo("알림", "입력한 영상은 모두 이미 다운로드되었습니다.\n다시 받으려면 '이미 받은 영상 건너뛰기'를 해제하세요.")
+            return
         
+        try:
+            max_workers = int(self.max_workers_var.get())
+        except ValueError:
+            max_workers = DEFAULT_MAX_WORKERS
+        try:
+            concurrent_fragments = int(self.fragments_var.get())
+            connection_budget = int(self.connection_budget_var.get())
+        except ValueError:
+            concurrent_fragments, connection_budget = DEFAULT_CONCURRENT_FRAGMENTS, DEFAULT_CONNECTION_BUDGET
+        # 워커 스레드가 Tk 변수를 직접 읽지 않도록 시작 시점의 설정을 복사해 둠
+        self.download_settings = {
+            'output_path': self.path_var.get() or DEFAULT_OUTPUT_PATH,
+            'quality': self.quality_var.get(),
+            'max_workers': max_workers,
+            'backend': BACKEND_CHOICES.get(self.backend_var.get(), BACKEND_SUBPROCESS),
+            'backend_label': self.backend_var.get(),
+            'concurrent_fragments': concurrent_fragments,
+            'external_downloader': EXTERNAL_DOWNLOADER_CHOICES.get(self.external_downloader_var.get()),
+            'connection_budget': connection_budget,
+            'rate_limit': RATE_LIMIT_CHOICES.get(self.rate_limit_var.get()),
+            'stream_audio': self.stream_audio_var.get(),
+            'staging_path': self.staging_var.get().strip() or None,
+        }
+
         self._set_ui_state(is_downloading=True)
         self.is_downloading = True
-        self.stop_event.clear()
 
         self.download_thread = Thread(target=self.download_with_dynamic_queue, daemon=True)
         self.download_thread.start()
 
     def stop_download(self):
-        """다운로드 정지"""
+        """다운로드 정지 (실행 중인 모든 워커의 프로세스 종료)"""
         if self.download_thread and self.download_thread.is_alive():
-            self.stop_event.set()
-            self.progress_var.set("다운로드 정지 중...")
+            self.overall_progress_var.set("다운로드 정지 중...")
             self.log_message("⚠️ 다운로드 정지를 요청했습니다...")
-
-    def download_single_video(self, url):
-        """단일 비디오 다운로드 (성공/실패 반환)"""
-        try:
-            output_path = self.path_var.get()
-            if not output_path:
-                output_path = os.path.join(os.path.expanduser("~"), "Downloads", "YouTube")
-            
-            os.makedirs(output_path, exist_ok=True)
-            
-            quality = self.quality_var.get()
-
-            # Determine path to yt-dlp.exe
-            yt_dlp_path = self._get_yt_dlp_path()
-
-            if not yt_dlp_path or not os.path.exists(yt_dlp_path):
-                self.log_message(f"❌ yt-dlp.exe를 찾을 수 없습니다! (경로: {yt_dlp_path})")
-                messagebox.showerror("오류", "yt-dlp.exe를 찾을 수 없습니다. 프로그램 폴더에 파일이 있는지 확인하세요.")
-                self.after(100, self._set_ui_state, False)
-                return
-
-            # Build the command
-            command = [
-                yt_dlp_path,
-                '--progress',
-                '--progress-template', '%(progress.percentage)s;%(progress.speed)s;%(progress.eta)s',
-                '-o', os.path.join(output_path, '%(uploader)s - %(title)s.%(ext)s'),
-                '--no-warnings',
-                '--encoding', 'utf-8', # Ensure output is utf-8
-                '--no-check-certificate', # SSL 인증서 검증 비활성화
-            ]
-
-            # Format selection
-            if quality == "bestaudio/best":
-                command.extend(['-x', '--audio-format', 'mp3', '--audio-quality', '192'])
-            else:
-                command.extend(['-f', quality])
-            
-            command.append(url)
-            
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace', # Avoid encoding errors
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            # Threads to read stdout and stderr to prevent deadlocks
-            stdout_thread = Thread(target=self._read_progress_output, args=(process.stdout,), daemon=True)
-            stderr_thread = Thread(target=self._read_stderr_output, args=(process.stderr,), daemon=True)
-            stdout_thread.start()
-            stderr_thread.start()
-
-            # Wait for the process to finish
-            while process.poll() is None:
-                if self.stop_event.is_set():
-                    process.terminate() # Send SIGTERM
-                    self.log_message("⏳ 프로세스를 종료하는 중...")
-                    break
-                self.update_idletasks() # Keep UI responsive
-                time.sleep(0.1)
-
-            stdout_thread.join(timeout=1)
-            stderr_thread.join(timeout=1)
-            
-            return_code = process.returncode
-
-            if self.stop_event.is_set():
-                return False
-
-            if return_code == 0:
-                # The final '100%' might not be caught by the progress reader, so set it manually
-                self.current_progress_bar.set(1)
-                return True
-            else:
-                self.log_message(f"❌ 다운로드 오류 발생 (종료 코드: {return_code})")
-                return False
-
-        except Exception as e:
-            self.log_message(f"❌ 치명적인 오류 발생: {e}")
-            import traceback
-            self.log_message(traceback.format_exc())
-            return False
-
-    def _read_progress_output(self, stream):
-        for line in iter(stream.readline, ''):
-            if self.stop_event.is_set():
-                break
-            
-            line = line.strip()
-            if not line:
-                continue
-
-            if '%' in line:
-                try:
-                    # My custom template: '%(progress.percentage)s;%(progress.speed)s;%(progress.eta)s'
-                    parts = line.split(';')
-                    if len(parts) >= 1:
-                        percentage_str = parts[0].replace('%','').strip()
-                        percent_float = float(percentage_str) / 100
-                        
-                        speed_str = f"속도: {parts[1]}" if len(parts) > 1 and parts[1] else ''
-                        eta_str = f"남은 시간: {parts[2]}" if len(parts) > 2 and parts[2] else ''
-
-                        self.current_progress_bar.configure(mode='determinate')
-                        self.current_progress_bar.set(percent_float)
-                        self.current_progress_var.set(f"다운로드 중... {percentage_str}% {speed_str} {eta_str}")
-                except (ValueError, IndexError):
-                    # Not a progress line I can parse, treat as a log message
-                    self.log_message(f"[yt-dlp] {line}")
-            else:
-                # Regular log message from yt-dlp
-                self.log_message(f"[yt-dlp] {line}")
-        stream.close()
-
-    def _read_stderr_output(self, stream):
-        for line in iter(stream.readline, ''):
-            if self.stop_event.is_set():
-                break
-            self.log_message(f"[오류] {line.strip()}")
-        stream.close()
+            self.engine.stop()
 
 def main():
+    # --profile-startup: import/창 생성/첫 화면까지 걸린 시간을 표준 오류로 출력하고 종료
+    # (import를 재려면 모듈을 불러오기 전에 켜야 하므로 sys.argv에서 바로 확인함)
+    startup_profiler.stop_import_timing()
+    startup_profiler.mark("import")
+
     # Windows에서 DPI 스케일링 문제 해결 (ctypes는 customtkinter에서 관리)
     app = YouTubeDownloaderUI()
+    startup_profiler.mark("창 생성")
 
     def on_closing():
         if app.download_thread and app.download_thread.is_alive():
-            if messagebox.askokcancel("종료", "다운로드가 진행 중입니다. 정말 종료하시겠습니까?"):
-                app.stop_event.set()
+            if messagebox.askokcancel("종료", "다운로드가 진행 중입니다. 정말 종료하시겠습니까?\n남은 작업은 다음 실행 때 이어받을 수 있습니다."):
+                # 프로세스를 끊기 전에 큐를 저장해야 받던 작업도 기록됨 (.part 파일은 남겨 둠)
+                app.save_queue_state()
+                app.engine.stop()
                 app.destroy()
         else:
             app.destroy()